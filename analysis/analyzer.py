@@ -1,23 +1,32 @@
 import json
 import re
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Callable, Optional, Protocol
+from analysis.fingerprint import config_fingerprints
+from analysis.local_checks import apply_local_checks, determine_status
 from analysis.prompts import build_compliance_prompt
-from core.models import AnalysisResult, PostResult, ComplianceStatus, ComplianceConfig
+from utils import image_buffers
+from core.models import (
+    AnalysisResult, AnalysisTelemetry, PostResult, ComplianceStatus, ComplianceConfig,
+    LogoMatch, UsageStats, VisionResponse,
+)
 
 
-def _extract_json(text: str) -> dict:
+def _extract_json_with_strategy(text: str) -> tuple[dict, str]:
     """Extrae un objeto JSON de la respuesta del modelo, sin importar texto extra.
 
-    Intenta multiples estrategias:
-    1. Parsear directamente como JSON
-    2. Extraer bloque ```json ... ```
-    3. Buscar el primer { ... } balanceado en el texto
+    Intenta multiples estrategias y retorna (json, estrategia usada):
+    1. "directo": parsear directamente como JSON
+    2. "markdown": extraer bloque ```json ... ```
+    3. "balanceado": buscar el primer { ... } balanceado en el texto
     """
     text = text.strip()
 
     # Estrategia 1: JSON directo
     try:
-        return json.loads(text)
+        return json.loads(text), "directo"
     except json.JSONDecodeError:
         pass
 
@@ -25,7 +34,7 @@ def _extract_json(text: str) -> dict:
     match = re.search(r"```(?:json)?\s*\n?(.*?)\n?\s*```", text, re.DOTALL)
     if match:
         try:
-            return json.loads(match.group(1).strip())
+            return json.loads(match.group(1).strip()), "markdown"
         except json.JSONDecodeError:
             pass
 
@@ -40,46 +49,148 @@ def _extract_json(text: str) -> dict:
                 depth -= 1
                 if depth == 0:
                     try:
-                        return json.loads(text[start:i + 1])
+                        return json.loads(text[start:i + 1]), "balanceado"
                     except json.JSONDecodeError:
                         break
 
     raise json.JSONDecodeError("No se encontro JSON valido en la respuesta", text, 0)
 
 
+def _extract_json(text: str) -> dict:
+    """Extrae un objeto JSON de la respuesta del modelo, sin importar texto extra."""
+    return _extract_json_with_strategy(text)[0]
+
+
+def _parse_confidence(value) -> float:
+    """Normaliza la confianza reportada por el modelo a [0, 1]. Sin dato -> 0.0."""
+    try:
+        confidence = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return min(max(confidence, 0.0), 1.0)
+
+
 class VisionClient(Protocol):
-    """Interfaz comun para clientes de vision (Gemini, Ollama, etc.)."""
+    """Interfaz comun para clientes de vision (Gemini, Ollama, etc.).
+
+    Los clientes pueden ademas exponer `generate(image_bytes, prompt) -> VisionResponse`
+    para reportar los tokens de cada llamada.
+    """
     def analyze_image_and_text(self, image_bytes: bytes, prompt: str) -> str: ...
 
 
-def create_vision_client(config: ComplianceConfig) -> VisionClient:
-    """Crea el cliente de vision segun la configuracion."""
-    if config.ai_backend.value == "ollama":
+def _call_client(client: VisionClient, image_bytes: bytes, prompt: str) -> VisionResponse:
+    if hasattr(client, "generate"):
+        return client.generate(image_bytes, prompt)
+    return VisionResponse(text=client.analyze_image_and_text(image_bytes, prompt))
+
+
+def _build_vision_client(backend: str, model_name: str, config: ComplianceConfig) -> VisionClient:
+    """Crea un cliente de vision para un backend y modelo especificos."""
+    if backend == "ollama":
         from analysis.ollama_client import OllamaClient
-        return OllamaClient(
-            model_name=config.ollama_model,
-            base_url=config.ollama_url,
-        )
+        from analysis.ollama_pool import OllamaPool, ollama_endpoints
+        endpoints = ollama_endpoints(config)
+        if len(endpoints) == 1 and endpoints[0].max_concurrent <= 1:
+            return OllamaClient(
+                model_name=model_name,
+                base_url=config.ollama_url,
+            )
+        return OllamaPool(model_name=model_name, endpoints=endpoints)
     else:
         import os
         from analysis.gemini_client import GeminiClient
+        from analysis.rate_limiter import get_rate_limiter
         api_key = os.getenv("GEMINI_API_KEY", "")
         if not api_key:
             raise ValueError("GEMINI_API_KEY no esta configurada en el archivo .env")
         return GeminiClient(
             api_key=api_key,
-            model_name=config.gemini_model,
+            model_name=model_name,
+            rate_limiter=get_rate_limiter(
+                f"gemini:{model_name}", config.gemini_rpm, config.gemini_tpm
+            ),
+            max_retries=config.gemini_max_retries,
         )
 
 
+def _model_for_backend(backend: str, config: ComplianceConfig) -> str:
+    return config.ollama_model if backend == "ollama" else config.gemini_model
+
+
+def create_vision_client(config: ComplianceConfig) -> VisionClient:
+    """Crea el cliente de vision segun la configuracion."""
+    backend = config.ai_backend.value
+    return _build_vision_client(backend, _model_for_backend(backend, config), config)
+
+
+def create_fast_vision_client(config: ComplianceConfig) -> VisionClient:
+    """Crea el cliente del modelo rapido (primer nivel de la cascada)."""
+    return _build_vision_client(
+        config.cascade_fast_backend.value, config.cascade_fast_model, config
+    )
+
+
+def describe_model(config: ComplianceConfig) -> str:
+    """Etiqueta legible del motor principal, ej: 'gemini:gemini-2.0-flash'."""
+    backend = config.ai_backend.value
+    return f"{backend}:{_model_for_backend(backend, config)}"
+
+
+def create_analyzer(config: ComplianceConfig) -> "ComplianceAnalyzer":
+    """Crea el analizador segun la configuracion (simple o en cascada)."""
+    from analysis.logo_detector import load_logo_detector
+    logo_detector = load_logo_detector(config)
+
+    strong = ComplianceAnalyzer(
+        create_vision_client(config), label=describe_model(config), logo_detector=logo_detector
+    )
+    if not config.cascade_enabled:
+        return strong
+
+    from analysis.cascade import CascadeAnalyzer
+    fast_label = f"{config.cascade_fast_backend.value}:{config.cascade_fast_model}"
+    fast = ComplianceAnalyzer(
+        create_fast_vision_client(config), label=fast_label, logo_detector=logo_detector
+    )
+    return CascadeAnalyzer(fast, strong)
+
+
 class ComplianceAnalyzer:
     """Orquestador de analisis: envia screenshots al modelo de vision y parsea resultados."""
 
-    def __init__(self, vision_client: VisionClient):
+    def __init__(self, vision_client: VisionClient, label: str = "", logo_detector=None):
         self.client = vision_client
+        self.label = label
+        self.logo_detector = logo_detector
+
+    @property
+    def concurrency(self) -> int:
+        """Cuantas llamadas simultaneas admite el cliente (1 si no lo declara)."""
+        return getattr(self.client, "max_concurrency", 1)
 
-    def analyze_post(self, post: PostResult, config: ComplianceConfig) -> PostResult:
-        """Analiza un post capturado contra la configuracion de cumplimiento."""
+    def usage_by_model(self) -> dict[str, UsageStats]:
+        """Consumo acumulado (peticiones, tokens, reintentos) por modelo."""
+        usage = getattr(self.client, "usage", None)
+        return {self.label: usage} if usage is not None else {}
+
+    def check_health(self):
+        """Revisa los servidores del cliente si los tiene (ej: OllamaPool).
+
+        Los expulsados en un batch anterior vuelven si responden, y los caidos
+        se descartan antes de enviarles posts.
+        """
+        check = getattr(self.client, "check_health", None)
+        if check is not None:
+            check()
+
+    def analyze_post(
+        self, post: PostResult, config: ComplianceConfig, logo_match: Optional[LogoMatch] = None
+    ) -> PostResult:
+        """Analiza un post capturado contra la configuracion de cumplimiento.
+
+        `logo_match` evita repetir la deteccion del logo si ya se hizo sobre el mismo screenshot.
+        """
         if post.status == ComplianceStatus.ERROR:
             return post
 
@@ -97,36 +208,58 @@ class ComplianceAnalyzer:
         full_prompt = f"{prompt}\n\nTexto extraido del post:\n{post.extracted_text}"
 
         raw_response = ""
+        backend, _, model = self.label.partition(":")
+        telemetry = AnalysisTelemetry(backend=backend, model=model, created_at=datetime.now())
         try:
-            with open(post.screenshot_path, "rb") as f:
-                image_bytes = f.read()
+            # Recien capturado sigue en memoria; si no, se lee de disco
+            image_bytes = image_buffers.read(post.screenshot_path)
 
-            raw_response = self.client.analyze_image_and_text(image_bytes, full_prompt)
+            telemetry.payload_bytes = len(image_bytes) + len(full_prompt.encode("utf-8"))
+            post.telemetry.append(telemetry)
+            started = time.perf_counter()
+            try:
+                response = _call_client(self.client, image_bytes, full_prompt)
+            finally:
+                telemetry.latency_ms = round((time.perf_counter() - started) * 1000, 1)
+            telemetry.input_tokens = response.input_tokens
+            telemetry.output_tokens = response.output_tokens
+            raw_response = response.text
 
-            parsed = _extract_json(raw_response)
+            parsed, telemetry.parse_strategy = _extract_json_with_strategy(raw_response)
+            model_fp, local_fp = config_fingerprints(config)
 
             analysis = AnalysisResult(
                 hashtags_present=parsed.get("hashtags_encontrados", []),
-                hashtags_missing=parsed.get("hashtags_faltantes", []),
                 emotional_score=float(parsed.get("puntaje_emotivo", 0.0)),
                 tone_label=parsed.get("etiqueta_tono", "informativo"),
-                brand_identity=parsed.get("identidad_marca", False),
+                brand_identity=bool(parsed.get("identidad_marca", False)),
+                ai_brand_identity=bool(parsed.get("identidad_marca", False)),
                 design_errors=parsed.get("errores_diseno", []),
                 common_errors=parsed.get("errores_comunes", []),
                 suggested_corrections=parsed.get("correcciones_sugeridas", []),
+                confidence=_parse_confidence(parsed.get("confianza")),
+                analyzed_by=self.label,
+                model_fingerprint=model_fp,
                 raw_ai_response=raw_response,
             )
+            # Hashtags y logo (si hay logos registrados) se deciden localmente
+            apply_local_checks(
+                analysis,
+                post.extracted_text,
+                config,
+                local_fp,
+                logo_detector=self.logo_detector,
+                image_bytes=image_bytes,
+                logo_match=logo_match,
+            )
             post.analysis = analysis
 
             # Determinar cumplimiento general
-            has_errors = (
-                len(analysis.hashtags_missing) > 0
-                or not analysis.brand_identity
-                or len(analysis.design_errors) > 0
-            )
-            post.status = ComplianceStatus.NO_CUMPLE if has_errors else ComplianceStatus.CUMPLE
+            post.status = determine_status(analysis)
+            telemetry.success = True
 
         except json.JSONDecodeError:
+            telemetry.parse_strategy = "fallido"
             post.analysis = AnalysisResult(raw_ai_response=raw_response)
             post.status = ComplianceStatus.ERROR
             preview = raw_response[:200] if raw_response else "(vacio)"
@@ -142,15 +275,34 @@ class ComplianceAnalyzer:
         posts: list[PostResult],
         config: ComplianceConfig,
         progress_callback: Optional[Callable] = None,
+        max_workers: Optional[int] = None,
     ) -> list[PostResult]:
-        """Analiza un batch de posts con reporte de progreso."""
-        results = []
-        for i, post in enumerate(posts):
-            result = self.analyze_post(post, config)
-            results.append(result)
-            if progress_callback:
-                progress_callback(
-                    (i + 1) / len(posts),
-                    f"Analizando {i + 1}/{len(posts)}...",
-                )
+        """Analiza un batch de posts con reporte de progreso.
+
+        Si el cliente admite concurrencia (ej: un pool de servidores Ollama) los
+        posts se analizan en paralelo. El callback siempre se invoca desde el
+        thread que llama, para no tocar Streamlit desde los workers.
+        """
+        if posts:
+            self.check_health()
+        workers = max_workers or self.concurrency
+        total = len(posts)
+        results: list[Optional[PostResult]] = [None] * total
+
+        if workers <= 1 or total <= 1:
+            for i, post in enumerate(posts):
+                results[i] = self.analyze_post(post, config)
+                if progress_callback:
+                    progress_callback((i + 1) / total, f"Analizando {i + 1}/{total}...")
+            return results
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self.analyze_post, post, config): i
+                for i, post in enumerate(posts)
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = future.result()
+                if progress_callback:
+                    progress_callback(done / total, f"Analizando {done}/{total}...")
         return results
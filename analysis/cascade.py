@@ -0,0 +1,88 @@
+import threading
+from typing import Optional
+from analysis.analyzer import ComplianceAnalyzer
+from analysis.rate_limiter import merge_usage
+from core.models import PostResult, ComplianceStatus, ComplianceConfig, LogoMatch, UsageStats
+
+
+class CascadeAnalyzer(ComplianceAnalyzer):
+    """Analizador en dos niveles: un modelo rapido evalua primero y solo los
+    posts dudosos (baja confianza o fallo) se escalan al modelo robusto.
+
+    Reutiliza analyze_batch de ComplianceAnalyzer; solo cambia analyze_post.
+    """
+
+    def __init__(self, fast: ComplianceAnalyzer, strong: ComplianceAnalyzer):
+        super().__init__(strong.client, label=strong.label)
+        self.fast = fast
+        self.strong = strong
+        self._lock = threading.Lock()
+        self.stats = {
+            "llamadas_rapido": 0,
+            "llamadas_robusto": 0,
+            "resueltos_rapido": 0,
+            "escalados": 0,
+        }
+
+    @property
+    def concurrency(self) -> int:
+        return max(self.fast.concurrency, self.strong.concurrency)
+
+    def usage_by_model(self) -> dict[str, UsageStats]:
+        usage: dict[str, UsageStats] = {}
+        for tier in (self.fast, self.strong):
+            for label, stats in tier.usage_by_model().items():
+                usage[label] = merge_usage([usage.get(label), stats])
+        return usage
+
+    def check_health(self):
+        self.fast.check_health()
+        self.strong.check_health()
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def needs_escalation(self, result: PostResult, config: ComplianceConfig) -> bool:
+        """Decide si el resultado del modelo rapido debe revisarlo el modelo robusto."""
+        if result.status == ComplianceStatus.ERROR or result.analysis is None:
+            return True
+        if result.analysis.confidence < config.cascade_confidence_threshold:
+            return True
+        if config.cascade_escalate_no_cumple and result.status == ComplianceStatus.NO_CUMPLE:
+            return True
+        return False
+
+    def analyze_post(
+        self, post: PostResult, config: ComplianceConfig, logo_match: Optional[LogoMatch] = None
+    ) -> PostResult:
+        """Analiza con el modelo rapido y escala al robusto solo si hace falta."""
+        if post.status == ComplianceStatus.ERROR or not post.screenshot_path:
+            return self.strong.analyze_post(post, config, logo_match=logo_match)
+
+        # El analizador muta el post; el nivel robusto parte de una copia limpia
+        original = post.model_copy(deep=True)
+
+        self._count("llamadas_rapido")
+        fast_result = self.fast.analyze_post(post, config, logo_match=logo_match)
+        if not self.needs_escalation(fast_result, config):
+            self._count("resueltos_rapido")
+            return fast_result
+
+        self._count("escalados")
+        self._count("llamadas_robusto")
+        # Conservar la telemetria de la llamada al modelo rapido
+        original.telemetry = list(fast_result.telemetry)
+        # El logo ya se detecto sobre el mismo screenshot en el nivel rapido
+        logo_match = fast_result.analysis.logo_match if fast_result.analysis else None
+        return self.strong.analyze_post(original, config, logo_match=logo_match)
+
+    def stats_summary(self) -> str:
+        """Resumen legible de cuantas llamadas atendio cada nivel."""
+        s = self.stats
+        return (
+            f"Modelo rapido ({self.fast.label}): {s['llamadas_rapido']} llamadas, "
+            f"{s['resueltos_rapido']} resueltas. "
+            f"Modelo robusto ({self.strong.label}): {s['llamadas_robusto']} llamadas "
+            f"({s['escalados']} escaladas)."
+        )
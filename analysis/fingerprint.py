@@ -0,0 +1,77 @@
+"""Huellas de la configuracion que produjo cada analisis.
+
+- model_fingerprint: todo lo que cambia la respuesta del modelo (prompt, modelo y
+  cascada). Si cambia, el post debe volver a analizarse con el modelo.
+- local_fingerprint: lo que se evalua localmente sin modelo (hashtags obligatorios
+  y logos registrados). Si solo cambia esta, basta con recalcular localmente.
+"""
+import hashlib
+import json
+from analysis.logo_detector import list_logos
+from analysis.prompts import build_compliance_prompt
+from core.database import config_version_of
+from core.models import ComplianceConfig
+
+# Incrementar cuando cambie la forma en que se interpreta la respuesta del modelo
+ANALYSIS_VERSION = 1
+
+# Huellas de la ultima version de configuracion guardada: {version: (modelo, local)}
+_cache: dict[int, tuple[str, str]] = {}
+
+
+def _digest(payload) -> str:
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def model_fingerprint(config: ComplianceConfig) -> str:
+    """Huella del prompt (sin hashtags, que se verifican localmente), del modelo principal
+    y de la cascada si esta activa."""
+    backend = config.ai_backend.value
+    model = config.ollama_model if backend == "ollama" else config.gemini_model
+    prompt = build_compliance_prompt([], config.emotional_keywords, config.brand_guidelines_notes)
+    cascade = None
+    if config.cascade_enabled:
+        # Con cascada la respuesta guardada puede venir del modelo rapido
+        cascade = {
+            "model": f"{config.cascade_fast_backend.value}:{config.cascade_fast_model}",
+            "threshold": config.cascade_confidence_threshold,
+            "escalate_no_cumple": config.cascade_escalate_no_cumple,
+        }
+    return _digest({
+        "version": ANALYSIS_VERSION,
+        "prompt": prompt,
+        "model": f"{backend}:{model}",
+        "cascade": cascade,
+    })
+
+
+def local_fingerprint(config: ComplianceConfig) -> str:
+    """Huella de los criterios que se evaluan sin modelo."""
+    logos = []
+    if config.logo_detection_enabled:
+        logos = [(p.name, p.stat().st_mtime) for p in list_logos()]
+    return _digest({
+        "version": ANALYSIS_VERSION,
+        "hashtags": sorted(h.lower() for h in config.required_hashtags),
+        "logo_detection": config.logo_detection_enabled,
+        "logo_threshold": config.logo_match_threshold if logos else None,
+        "logos": logos,
+    })
+
+
+def config_fingerprints(config: ComplianceConfig) -> tuple[str, str]:
+    """(model_fingerprint, local_fingerprint) de `config`.
+
+    Si `config` es la configuracion guardada (ver load_config) se calculan una
+    vez por version de configuracion y no en cada post.
+    """
+    version = config_version_of(config)
+    if version is None:
+        return model_fingerprint(config), local_fingerprint(config)
+    cached = _cache.get(version)
+    if cached is None:
+        cached = (model_fingerprint(config), local_fingerprint(config))
+        _cache.clear()
+        _cache[version] = cached
+    return cached
@@ -1,20 +1,126 @@
+import random
+import re
+import threading
+import time
+from typing import Optional
+import httpx
 from google import genai
+from google.genai import errors as genai_errors
+from analysis.rate_limiter import RateLimiter
+from core.models import UsageStats, VisionResponse
+
+# Codigos HTTP que vale la pena reintentar (cuota, sobrecarga, fallas transitorias)
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# Estimacion previa de tokens por llamada: screenshot ~4 tiles de 258 tokens + respuesta JSON
+IMAGE_TOKEN_ESTIMATE = 1032
+OUTPUT_TOKEN_ESTIMATE = 500
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 60.0
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Lee el tiempo de espera sugerido por la API (header Retry-After o RetryInfo)."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+
+    details = getattr(error, "details", None)
+    if isinstance(details, dict):
+        for item in details.get("error", {}).get("details", []) or []:
+            delay = item.get("retryDelay") if isinstance(item, dict) else None
+            if delay:
+                match = re.match(r"([\d.]+)s", str(delay))
+                if match:
+                    return float(match.group(1))
+    return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, genai_errors.APIError):
+        return error.code in RETRYABLE_STATUS
+    # httpx.TransportError cubre timeouts y fallas de conexion del transporte del SDK
+    return isinstance(error, (ConnectionError, TimeoutError, httpx.TransportError))
 
 
 class GeminiClient:
-    """Wrapper del SDK google-genai para analisis de imagenes."""
+    """Wrapper del SDK google-genai para analisis de imagenes.
 
-    def __init__(self, api_key: str, model_name: str = "gemini-2.0-flash"):
+    Con `rate_limiter` cada llamada espera turno (peticiones y tokens por minuto).
+    Los errores reintentables (429, 5xx, red) se reintentan con backoff exponencial,
+    respetando Retry-After; los demas se propagan de inmediato.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str = "gemini-2.0-flash",
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = 5,
+    ):
         self.client = genai.Client(api_key=api_key)
         self.model_name = model_name
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.usage = UsageStats()
+        self._usage_lock = threading.Lock()
 
     def analyze_image_and_text(self, image_bytes: bytes, prompt: str) -> str:
         """Envia imagen + prompt a Gemini. Retorna respuesta como texto."""
+        return self.generate(image_bytes, prompt).text
+
+    def generate(self, image_bytes: bytes, prompt: str) -> VisionResponse:
+        """Como analyze_image_and_text, pero incluye los tokens reportados por la API."""
         image_part = genai.types.Part.from_bytes(
-            data=image_bytes, mime_type="image/png"
+            data=bytes(image_bytes), mime_type="image/png"
         )
-        response = self.client.models.generate_content(
-            model=self.model_name,
-            contents=[image_part, prompt],
+        estimated = IMAGE_TOKEN_ESTIMATE + len(prompt) // 4 + OUTPUT_TOKEN_ESTIMATE
+
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                waited = self.rate_limiter.acquire(estimated)
+                if waited:
+                    self._add_usage(throttled_seconds=waited)
+            try:
+                response = self.client.models.generate_content(
+                    model=self.model_name,
+                    contents=[image_part, prompt],
+                )
+                break
+            except Exception as e:
+                if not _is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                retry_after = _retry_after_seconds(e)
+                backoff = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+                delay = max(retry_after or 0.0, random.uniform(backoff / 2, backoff))
+                rate_limited = getattr(e, "code", None) == 429
+                self._add_usage(retries=1, rate_limited=int(rate_limited))
+                if rate_limited and self.rate_limiter:
+                    # La pausa frena a todos los clientes del modelo; este la espera
+                    # en el proximo acquire(), que ya suma el tiempo a throttled_seconds
+                    self.rate_limiter.pause(delay)
+                else:
+                    self._add_usage(throttled_seconds=delay)
+                    time.sleep(delay)
+                attempt += 1
+
+        metadata = getattr(response, "usage_metadata", None)
+        input_tokens = getattr(metadata, "prompt_token_count", None) or 0
+        output_tokens = getattr(metadata, "candidates_token_count", None) or 0
+        if self.rate_limiter:
+            self.rate_limiter.record_usage(estimated, input_tokens + output_tokens)
+        self._add_usage(requests=1, input_tokens=input_tokens, output_tokens=output_tokens)
+        return VisionResponse(
+            text=response.text or "", input_tokens=input_tokens, output_tokens=output_tokens
         )
-        return response.text
+
+    def _add_usage(self, **deltas):
+        with self._usage_lock:
+            for field, delta in deltas.items():
+                setattr(self.usage, field, getattr(self.usage, field) + delta)
@@ -0,0 +1,80 @@
+"""Verificaciones que se resuelven sin modelo: hashtags, logo y estado final."""
+import re
+from typing import Optional
+from core.models import AnalysisResult, ComplianceStatus, ComplianceConfig, LogoMatch
+
+HASHTAG_RE = re.compile(r"#\w+", re.UNICODE)
+
+
+def hashtag_key(tag: str) -> str:
+    """Clave de comparacion de un hashtag: sin '#' inicial y en minusculas."""
+    return tag.strip().lstrip("#").lower()
+
+
+def normalize_hashtag(tag: str) -> str:
+    """Hashtag con un solo '#' inicial ('verano' -> '#verano')."""
+    return "#" + tag.strip().lstrip("#")
+
+
+def find_hashtags(text: str) -> list[str]:
+    """Hashtags presentes en un texto, sin duplicados (sin distinguir mayusculas)."""
+    seen = set()
+    found = []
+    for tag in HASHTAG_RE.findall(text or ""):
+        if tag.lower() not in seen:
+            seen.add(tag.lower())
+            found.append(tag)
+    return found
+
+
+def check_hashtags(
+    text: str, required: list[str], detected: Optional[list[str]] = None
+) -> tuple[list[str], list[str]]:
+    """Retorna (presentes, faltantes).
+
+    Presentes son los hashtags del texto mas los que el modelo vio en la imagen
+    (`detected`, con o sin '#'); faltantes son los obligatorios que no aparecen
+    en ninguno. La comparacion ignora el '#' y las mayusculas en ambos lados.
+    """
+    detected_tags = [normalize_hashtag(h) for h in detected or [] if hashtag_key(h)]
+    present = find_hashtags(" ".join([text or ""] + detected_tags))
+    present_keys = {hashtag_key(h) for h in present}
+    missing = [h for h in required if hashtag_key(h) not in present_keys]
+    return present, missing
+
+
+def determine_status(analysis: AnalysisResult) -> ComplianceStatus:
+    """Cumplimiento general a partir del analisis."""
+    has_errors = (
+        len(analysis.hashtags_missing) > 0
+        or not analysis.brand_identity
+        or len(analysis.design_errors) > 0
+    )
+    return ComplianceStatus.NO_CUMPLE if has_errors else ComplianceStatus.CUMPLE
+
+
+def apply_local_checks(
+    analysis: AnalysisResult,
+    extracted_text: str,
+    config: ComplianceConfig,
+    local_fp: str,
+    logo_detector=None,
+    image_bytes: Optional[bytes] = None,
+    logo_match: Optional[LogoMatch] = None,
+):
+    """Recalcula in-place los hashtags y el logo, y sella la huella local.
+
+    `logo_match` reutiliza una deteccion ya hecha sobre la misma imagen. Sin
+    detector de logos se usa la respuesta original del modelo (ai_brand_identity).
+    """
+    analysis.hashtags_present, analysis.hashtags_missing = check_hashtags(
+        extracted_text, config.required_hashtags, analysis.hashtags_present
+    )
+    if logo_detector is not None and (logo_match is not None or image_bytes is not None):
+        match = logo_match if logo_match is not None else logo_detector.detect(image_bytes)
+        analysis.logo_match = match
+        analysis.brand_identity = match.present
+    else:
+        analysis.logo_match = None
+        analysis.brand_identity = analysis.ai_brand_identity
+    analysis.local_fingerprint = local_fp
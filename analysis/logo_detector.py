@@ -0,0 +1,230 @@
+"""Deteccion local del logo oficial por template matching multi-escala.
+
+Los logos de referencia se guardan en LOGOS_DIR (se cargan desde la pagina de
+Configuracion). Cada screenshot se compara contra ellos con correlacion cruzada
+normalizada (NCC) calculada via FFT, en varias escalas, sin llamar al modelo.
+"""
+import re
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from PIL import Image
+from config.settings import LOGOS_DIR
+from core.models import ComplianceConfig, LogoMatch
+
+# Busqueda en dos pasos: todas las escalas sobre una version chica del screenshot
+# y luego solo alrededor del mejor candidato al ancho de trabajo
+WORK_WIDTH = 640
+COARSE_WIDTH = 320
+# Tamano del logo relativo al ancho del screenshot (min, max) y numero de escalas
+LOGO_WIDTH_RANGE = (0.04, 0.40)
+NUM_SCALES = 8
+REFINE_SCALES = 5
+MIN_TEMPLATE_SIDE = 12
+
+_template_cache: dict[str, tuple[float, np.ndarray]] = {}
+
+
+def list_logos() -> list[Path]:
+    """Logos de referencia registrados."""
+    logos_dir = Path(LOGOS_DIR)
+    if not logos_dir.exists():
+        return []
+    return sorted(logos_dir.glob("*.png"))
+
+
+def save_logo(name: str, image_bytes: bytes) -> str:
+    """Registra un logo de referencia (normalizado a PNG) y retorna la ruta."""
+    logos_dir = Path(LOGOS_DIR)
+    logos_dir.mkdir(parents=True, exist_ok=True)
+
+    safe_name = re.sub(r"[^A-Za-z0-9_-]+", "_", Path(name).stem).strip("_") or "logo"
+    path = logos_dir / f"{safe_name}.png"
+    Image.open(BytesIO(image_bytes)).save(path, "PNG")
+    return str(path)
+
+
+def delete_logo(name: str):
+    """Elimina un logo de referencia por nombre (sin extension)."""
+    path = Path(LOGOS_DIR) / f"{name}.png"
+    if path.exists():
+        path.unlink()
+    _template_cache.pop(str(path), None)
+
+
+def _to_gray(img: Image.Image) -> Image.Image:
+    """Convierte a escala de grises; la transparencia se recorta y se aplana sobre blanco."""
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        bbox = img.getchannel("A").getbbox()
+        if bbox:
+            img = img.crop(bbox)
+        background = Image.new("RGBA", img.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(background, img)
+    return img.convert("L")
+
+
+def _load_template(path: Path) -> np.ndarray:
+    """Carga un logo en gris, cacheado por fecha de modificacion."""
+    key = str(path)
+    mtime = path.stat().st_mtime
+    cached = _template_cache.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with Image.open(path) as img:
+        template = np.asarray(_to_gray(img), dtype=np.float32)
+    _template_cache[key] = (mtime, template)
+    return template
+
+
+def _ncc_map(image: np.ndarray, image_fft: np.ndarray, integrals, template: np.ndarray) -> np.ndarray:
+    """NCC de `template` sobre todas las posiciones validas de `image`.
+
+    La correlacion se calcula con FFT del tamano de la imagen: la parte circular
+    solo contamina posiciones fuera de la region valida.
+    """
+    H, W = image.shape
+    th, tw = template.shape
+    n = th * tw
+
+    t = template - template.mean()
+    t_norm = float(np.sqrt((t * t).sum()))
+    if t_norm < 1e-6:
+        return np.zeros((H - th + 1, W - tw + 1), dtype=np.float32)
+
+    t_fft = np.fft.rfft2(t[::-1, ::-1], s=(H, W))
+    corr = np.fft.irfft2(image_fft * t_fft, s=(H, W))[th - 1:H, tw - 1:W]
+
+    S, S2 = integrals
+    win_sum = S[th:, tw:] - S[:-th, tw:] - S[th:, :-tw] + S[:-th, :-tw]
+    win_sq = S2[th:, tw:] - S2[:-th, tw:] - S2[th:, :-tw] + S2[:-th, :-tw]
+    var = np.maximum(win_sq - win_sum * win_sum / n, 0.0)
+
+    denom = np.sqrt(var) * t_norm
+    ncc = np.zeros_like(corr)
+    valid = denom > 1e-3 * t_norm
+    ncc[valid] = corr[valid] / denom[valid]
+    return ncc
+
+
+def _gray_array(gray: Image.Image, width: int) -> tuple[np.ndarray, float]:
+    """Screenshot en gris reducido a `width` como maximo. Retorna (pixeles, factor)."""
+    orig_w, orig_h = gray.size
+    factor = min(1.0, width / orig_w)
+    if factor < 1.0:
+        gray = gray.resize((int(orig_w * factor), max(1, int(orig_h * factor))), Image.Resampling.BILINEAR)
+    return np.asarray(gray, dtype=np.float64), factor
+
+
+def _integrals(image: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Imagenes integrales de la imagen y de su cuadrado (sumas por ventana en O(1))."""
+    H, W = image.shape
+    S = np.zeros((H + 1, W + 1))
+    S[1:, 1:] = image.cumsum(0).cumsum(1)
+    S2 = np.zeros((H + 1, W + 1))
+    S2[1:, 1:] = (image * image).cumsum(0).cumsum(1)
+    return S, S2
+
+
+def _best_match(
+    image: np.ndarray, image_fft: np.ndarray, integrals, tpl_img: Image.Image,
+    widths, min_side: float,
+) -> Optional[tuple[float, int, int, int, int]]:
+    """Mejor (puntaje, x, y, ancho, alto) del template a los anchos `widths` en pixeles."""
+    H, W = image.shape
+    aspect = tpl_img.height / tpl_img.width
+    best = None
+    for width in widths:
+        tw = int(round(width))
+        th = int(round(tw * aspect))
+        if min(tw, th) < min_side or tw > W or th > H:
+            continue
+        scaled = np.asarray(tpl_img.resize((tw, th), Image.Resampling.BILINEAR), dtype=np.float64)
+        ncc = _ncc_map(image, image_fft, integrals, scaled)
+        idx = int(np.argmax(ncc))
+        score = float(ncc.flat[idx])
+        if best is None or score > best[0]:
+            y, x = divmod(idx, ncc.shape[1])
+            best = (score, x, y, tw, th)
+    return best
+
+
+def _refine(work: np.ndarray, tpl_img: Image.Image, x: int, y: int, tw: int, th: int, step: float):
+    """Repite la busqueda al ancho de trabajo solo en la zona del candidato y escalas vecinas."""
+    H, W = work.shape
+    pad = int(max(tw, th) * step / 2) + 4
+    x0, y0 = max(0, x - pad), max(0, y - pad)
+    x1, y1 = min(W, x + int(tw * step) + pad), min(H, y + int(th * step) + pad)
+    crop = work[y0:y1, x0:x1]
+    widths = np.geomspace(tw / np.sqrt(step), tw * np.sqrt(step), REFINE_SCALES)
+    best = _best_match(crop, np.fft.rfft2(crop), _integrals(crop), tpl_img, widths, MIN_TEMPLATE_SIDE)
+    if best is None:
+        return None
+    score, bx, by, btw, bth = best
+    return score, bx + x0, by + y0, btw, bth
+
+
+class LogoDetector:
+    """Busca los logos registrados en un screenshot a varias escalas.
+
+    Todas las escalas se prueban sobre el screenshot a COARSE_WIDTH; el mejor
+    candidato de cada logo se refina a WORK_WIDTH en un recorte a su alrededor.
+    """
+
+    def __init__(self, templates: dict[str, np.ndarray], threshold: float = 0.7):
+        self.templates = templates
+        self.threshold = threshold
+
+    def detect(self, image_bytes: bytes) -> LogoMatch:
+        """Retorna el mejor match (presencia, ubicacion en pixeles originales y puntaje)."""
+        with Image.open(BytesIO(image_bytes)) as img:
+            gray = _to_gray(img) if img.mode in ("RGBA", "LA", "P") else img.convert("L")
+        coarse, coarse_factor = _gray_array(gray, COARSE_WIDTH)
+        work, factor = _gray_array(gray, WORK_WIDTH)
+        coarse_fft = np.fft.rfft2(coarse)
+        coarse_integrals = _integrals(coarse)
+
+        rel_widths = np.geomspace(*LOGO_WIDTH_RANGE, NUM_SCALES)
+        step = float(rel_widths[1] / rel_widths[0])
+        to_work = factor / coarse_factor
+        best = LogoMatch()
+        for name, template in self.templates.items():
+            tpl_img = Image.fromarray(template.astype(np.uint8))
+            candidate = _best_match(
+                coarse, coarse_fft, coarse_integrals, tpl_img,
+                rel_widths * coarse.shape[1], MIN_TEMPLATE_SIDE / to_work,
+            )
+            if candidate is None:
+                continue
+            _, x, y, tw, th = candidate
+            refined = _refine(
+                work, tpl_img,
+                int(x * to_work), int(y * to_work), int(round(tw * to_work)), int(round(th * to_work)), step,
+            )
+            if refined is None:
+                continue
+            score, x, y, tw, th = refined
+            if score > best.score:
+                best = LogoMatch(
+                    logo_name=name,
+                    score=round(score, 4),
+                    x=int(x / factor),
+                    y=int(y / factor),
+                    width=int(tw / factor),
+                    height=int(th / factor),
+                )
+
+        best.present = best.score >= self.threshold
+        return best
+
+
+def load_logo_detector(config: ComplianceConfig) -> Optional[LogoDetector]:
+    """Crea el detector con los logos registrados. None si esta desactivado o no hay logos."""
+    if not config.logo_detection_enabled:
+        return None
+    logos = list_logos()
+    if not logos:
+        return None
+    templates = {path.stem: _load_template(path) for path in logos}
+    return LogoDetector(templates, threshold=config.logo_match_threshold)
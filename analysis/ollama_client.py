@@ -1,7 +1,9 @@
 import base64
 import json
+import threading
 import urllib.request
 import urllib.error
+from core.models import UsageStats, VisionResponse
 
 
 class OllamaClient:
@@ -10,9 +12,15 @@ class OllamaClient:
     def __init__(self, model_name: str = "llama3.2-vision", base_url: str = "http://localhost:11434"):
         self.model_name = model_name
         self.base_url = base_url.rstrip("/")
+        self.usage = UsageStats()
+        self._usage_lock = threading.Lock()
 
     def analyze_image_and_text(self, image_bytes: bytes, prompt: str) -> str:
         """Envia imagen + prompt a Ollama. Retorna respuesta como texto."""
+        return self.generate(image_bytes, prompt).text
+
+    def generate(self, image_bytes: bytes, prompt: str) -> VisionResponse:
+        """Como analyze_image_and_text, pero incluye los tokens reportados por Ollama."""
         image_b64 = base64.b64encode(image_bytes).decode("utf-8")
 
         payload = {
@@ -35,8 +43,23 @@ class OllamaClient:
         try:
             with urllib.request.urlopen(req, timeout=120) as resp:
                 result = json.loads(resp.read().decode("utf-8"))
-                return result.get("response", "")
-        except urllib.error.URLError as e:
+                input_tokens = result.get("prompt_eval_count", 0) or 0
+                output_tokens = result.get("eval_count", 0) or 0
+                with self._usage_lock:
+                    self.usage.requests += 1
+                    self.usage.input_tokens += input_tokens
+                    self.usage.output_tokens += output_tokens
+                return VisionResponse(
+                    text=result.get("response", ""),
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                )
+        except urllib.error.HTTPError as e:
+            # El servidor respondio: no es un problema de conexion y no debe
+            # provocar failover (ej: modelo inexistente o error interno)
+            detail = e.read().decode("utf-8", errors="replace")[:500]
+            raise RuntimeError(f"Ollama en {self.base_url} respondio HTTP {e.code}: {detail}") from e
+        except (urllib.error.URLError, OSError) as e:
             raise ConnectionError(
                 f"No se pudo conectar a Ollama en {self.base_url}. "
                 f"Asegurate de que Ollama este corriendo. Error: {e}"
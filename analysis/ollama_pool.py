@@ -0,0 +1,175 @@
+import threading
+import time
+from typing import Callable, Optional
+from analysis.ollama_client import OllamaClient
+from analysis.rate_limiter import merge_usage
+from core.models import ComplianceConfig, OllamaEndpoint, UsageStats, VisionResponse
+
+
+def ollama_endpoints(config: ComplianceConfig) -> list[OllamaEndpoint]:
+    """Lista efectiva de servidores Ollama: el principal mas los adicionales."""
+    primary = OllamaEndpoint(url=config.ollama_url, max_concurrent=config.ollama_max_concurrent)
+    extra = [e for e in config.ollama_extra_endpoints if e.url.rstrip("/") != config.ollama_url.rstrip("/")]
+    return [primary] + extra
+
+
+class _Node:
+    """Estado de un servidor dentro del pool."""
+
+    def __init__(self, endpoint: OllamaEndpoint, client):
+        self.url = endpoint.url.rstrip("/")
+        self.max_concurrent = max(1, endpoint.max_concurrent)
+        self.client = client
+        self.outstanding = 0
+        self.healthy = True
+        self.retry_at = 0.0
+        self.checking = False
+        self.served = 0
+        self.failures = 0
+
+
+class OllamaPool:
+    """Balancea llamadas entre varios servidores Ollama.
+
+    - Enruta cada llamada al servidor con menos peticiones en curso
+      (relativo a su limite de concurrencia) y espera si todos estan llenos.
+    - Un servidor que falla con ConnectionError se expulsa y la llamada se
+      reintenta en otro servidor. Los errores HTTP (el servidor respondio) se
+      propagan sin expulsarlo.
+    - Los servidores expulsados se revisan con OllamaClient.check_connection
+      cada `health_check_interval` segundos y vuelven al pool si responden;
+      check_health revisa todos antes de cada batch (ver analyze_batch).
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        endpoints: list[OllamaEndpoint],
+        health_check_interval: float = 30.0,
+        client_factory: Callable[..., object] = OllamaClient,
+        health_check: Callable[[str], bool] = OllamaClient.check_connection,
+    ):
+        if not endpoints:
+            raise ValueError("Se requiere al menos un servidor Ollama")
+        self.model_name = model_name
+        self.health_check_interval = health_check_interval
+        self._health_check = health_check
+        self._nodes = [
+            _Node(e, client_factory(model_name=model_name, base_url=e.url))
+            for e in endpoints
+        ]
+        self._cond = threading.Condition()
+
+    @property
+    def max_concurrency(self) -> int:
+        """Capacidad total del pool (suma de limites por servidor)."""
+        return sum(n.max_concurrent for n in self._nodes)
+
+    @property
+    def usage(self) -> UsageStats:
+        """Consumo acumulado de todos los servidores."""
+        return merge_usage([getattr(n.client, "usage", None) for n in self._nodes])
+
+    def analyze_image_and_text(self, image_bytes: bytes, prompt: str) -> str:
+        return self.generate(image_bytes, prompt).text
+
+    def generate(self, image_bytes: bytes, prompt: str) -> VisionResponse:
+        """Envia la llamada al servidor menos cargado, con failover a los demas."""
+        self._revive_due_nodes()
+        tried: set[str] = set()
+        last_error: Optional[Exception] = None
+
+        while True:
+            node = self._acquire(tried)
+            if node is None:
+                break
+            try:
+                response = node.client.generate(image_bytes, prompt)
+                with self._cond:
+                    node.served += 1
+                return response
+            except ConnectionError as e:
+                last_error = e
+                tried.add(node.url)
+                self._eject(node)
+            finally:
+                self._release(node)
+
+        raise ConnectionError(
+            f"Ningun servidor Ollama disponible ({len(self._nodes)} configurados). "
+            f"Ultimo error: {last_error}"
+        )
+
+    def check_health(self) -> dict[str, bool]:
+        """Revisa todos los servidores ahora y actualiza su estado."""
+        status = {}
+        for node in self._nodes:
+            ok = self._health_check(node.url)
+            with self._cond:
+                node.healthy = ok
+                node.retry_at = 0.0 if ok else time.monotonic() + self.health_check_interval
+                self._cond.notify_all()
+            status[node.url] = ok
+        return status
+
+    def stats(self) -> list[dict]:
+        """Estado por servidor: salud, peticiones en curso, atendidas y fallos."""
+        with self._cond:
+            return [
+                {
+                    "url": n.url,
+                    "saludable": n.healthy,
+                    "en_curso": n.outstanding,
+                    "max_concurrente": n.max_concurrent,
+                    "atendidas": n.served,
+                    "fallos": n.failures,
+                }
+                for n in self._nodes
+            ]
+
+    def _acquire(self, exclude: set[str]) -> Optional[_Node]:
+        """Reserva un cupo en el servidor menos cargado. None si no queda ninguno."""
+        with self._cond:
+            while True:
+                candidates = [n for n in self._nodes if n.healthy and n.url not in exclude]
+                if not candidates:
+                    return None
+                free = [n for n in candidates if n.outstanding < n.max_concurrent]
+                if free:
+                    node = min(free, key=lambda n: (n.outstanding / n.max_concurrent, n.outstanding))
+                    node.outstanding += 1
+                    return node
+                self._cond.wait()
+
+    def _release(self, node: _Node):
+        with self._cond:
+            node.outstanding -= 1
+            self._cond.notify_all()
+
+    def _eject(self, node: _Node):
+        with self._cond:
+            node.healthy = False
+            node.failures += 1
+            node.retry_at = time.monotonic() + self.health_check_interval
+            self._cond.notify_all()
+
+    def _revive_due_nodes(self):
+        """Revisa (fuera del lock) los servidores expulsados cuyo plazo ya vencio."""
+        now = time.monotonic()
+        with self._cond:
+            due = [
+                n for n in self._nodes
+                if not n.healthy and not n.checking and n.retry_at <= now
+            ]
+            for n in due:
+                n.checking = True
+
+        for node in due:
+            ok = self._health_check(node.url)
+            with self._cond:
+                node.checking = False
+                if ok:
+                    node.healthy = True
+                    self._cond.notify_all()
+                else:
+                    node.retry_at = time.monotonic() + self.health_check_interval
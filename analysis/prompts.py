@@ -18,7 +18,8 @@ Responde en formato JSON estricto con la siguiente estructura (sin markdown, sin
   "identidad_marca": true o false,
   "errores_diseno": ["lista de errores de diseno detectados"],
   "errores_comunes": ["lista de errores generales de comunicacion"],
-  "correcciones_sugeridas": ["lista de correcciones recomendadas"]
+  "correcciones_sugeridas": ["lista de correcciones recomendadas"],
+  "confianza": 0.0 a 1.0
 }}
 
 Lineamientos a evaluar:
@@ -34,4 +35,5 @@ Reglas de evaluacion:
 5. Identifica errores de diseno segun lineamientos institucionales (uso de colores, tipografia, composicion).
 6. En errores_comunes incluye problemas frecuentes como: falta de hashtags, mala calidad de imagen, texto ilegible, etc.
 7. Las correcciones_sugeridas deben ser accionables y especificas.
-8. Responde UNICAMENTE con el JSON, sin texto adicional, sin bloques de codigo markdown."""
+8. En confianza indica que tan seguro estas de tu evaluacion completa, de 0.0 (nada seguro) a 1.0 (totalmente seguro).
+9. Responde UNICAMENTE con el JSON, sin texto adicional, sin bloques de codigo markdown."""
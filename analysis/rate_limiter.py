@@ -0,0 +1,109 @@
+import threading
+import time
+from core.models import UsageStats
+
+_limiters: dict[str, "RateLimiter"] = {}
+_limiters_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Token bucket thread-safe: `capacity` unidades que se recargan a `refill_rate` por segundo."""
+
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = float(capacity)
+        self.refill_rate = float(refill_rate)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Consume `amount` unidades, bloqueando hasta que haya saldo. Retorna segundos esperados.
+
+        Una peticion mayor que la capacidad se deja pasar con el bucket lleno.
+        """
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                wait = (amount - self._tokens) / self.refill_rate
+            time.sleep(wait)
+            waited += wait
+
+    def adjust(self, amount: float):
+        """Corrige el saldo tras conocer el consumo real (positivo = se consumio mas)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+
+class RateLimiter:
+    """Limita peticiones por minuto y tokens por minuto, y respeta pausas tipo Retry-After."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self._tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, estimated_tokens: int) -> float:
+        """Espera turno para una peticion de ~`estimated_tokens`. Retorna segundos esperados."""
+        waited = 0.0
+        with self._lock:
+            pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+            waited += pause
+        waited += self._requests.acquire(1)
+        waited += self._tokens.acquire(estimated_tokens)
+        return waited
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """Ajusta el bucket de tokens con el consumo real reportado por la API."""
+        if actual_tokens > 0:
+            self._tokens.adjust(actual_tokens - estimated_tokens)
+
+    def pause(self, seconds: float):
+        """Detiene todas las peticiones durante `seconds` (ej: al recibir un 429 con Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def get_rate_limiter(key: str, requests_per_minute: int, tokens_per_minute: int) -> RateLimiter:
+    """Limitador compartido por proceso para `key` (ej: 'gemini:gemini-2.0-flash').
+
+    Las cuotas son por proyecto y modelo, no por cliente: todos los clientes del
+    mismo modelo deben compartir el mismo limitador entre reruns de Streamlit.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if (
+            limiter is None
+            or limiter.requests_per_minute != requests_per_minute
+            or limiter.tokens_per_minute != tokens_per_minute
+        ):
+            limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+            _limiters[key] = limiter
+        return limiter
+
+
+def merge_usage(items: list) -> UsageStats:
+    """Suma varios UsageStats (ignora None)."""
+    total = UsageStats()
+    for usage in items:
+        if usage is None:
+            continue
+        for field in UsageStats.model_fields:
+            setattr(total, field, getattr(total, field) + getattr(usage, field))
+    return total
@@ -0,0 +1,84 @@
+"""Re-evaluacion incremental de posts ya capturados cuando cambia la configuracion.
+
+Cada analisis guarda la huella del prompt/modelo y la de los criterios locales.
+Solo los posts con huella de modelo desactualizada se vuelven a enviar al modelo
+(usando el screenshot y el texto guardados); si solo cambiaron los criterios
+locales (hashtags, logos) se recalculan sin ninguna llamada al modelo.
+"""
+from pathlib import Path
+from typing import Callable, Optional, Union
+from analysis.fingerprint import config_fingerprints
+from analysis.local_checks import apply_local_checks, determine_status
+from core.models import PostResult, PostRecord, ComplianceStatus, ComplianceConfig
+from utils import image_buffers
+
+# Columnas que necesita classify_posts (para query_post_records)
+CLASSIFY_COLUMNS = ["screenshot_path", "analysis_json"]
+
+
+def classify_posts(
+    posts: list[Union[PostResult, PostRecord]], config: ComplianceConfig
+) -> tuple[list, list, list]:
+    """Separa los posts en (requieren modelo, solo recalculo local, al dia).
+
+    Acepta PostRecord con CLASSIFY_COLUMNS. Los posts sin screenshot en disco no
+    se pueden re-evaluar y se omiten.
+    """
+    model_fp, local_fp = config_fingerprints(config)
+
+    needs_model, needs_local, up_to_date = [], [], []
+    for post in posts:
+        if not post.screenshot_path or not Path(post.screenshot_path).exists():
+            continue
+        analysis = post.analysis
+        if analysis is None or not analysis.model_fingerprint or analysis.model_fingerprint != model_fp:
+            needs_model.append(post)
+        elif analysis.local_fingerprint != local_fp:
+            needs_local.append(post)
+        else:
+            up_to_date.append(post)
+    return needs_model, needs_local, up_to_date
+
+
+def reevaluate_posts(
+    posts: list[PostResult],
+    config: ComplianceConfig,
+    analyzer_factory: Optional[Callable] = None,
+    progress_callback: Optional[Callable] = None,
+) -> dict[str, list[PostResult]]:
+    """Re-evalua solo los posts desactualizados. Retorna los posts modificados por tipo.
+
+    `analyzer_factory(config)` solo se invoca si algun post necesita el modelo.
+    """
+    from analysis.logo_detector import load_logo_detector
+
+    needs_model, needs_local, up_to_date = classify_posts(posts, config)
+
+    _, local_fp = config_fingerprints(config)
+    logo_detector = load_logo_detector(config)
+    for post in needs_local:
+        image_bytes = image_buffers.read(post.screenshot_path) if logo_detector else None
+        apply_local_checks(
+            post.analysis,
+            post.extracted_text,
+            config,
+            local_fp,
+            logo_detector=logo_detector,
+            image_bytes=image_bytes,
+        )
+        post.status = determine_status(post.analysis)
+
+    if needs_model:
+        if analyzer_factory is None:
+            from analysis.analyzer import create_analyzer
+            analyzer_factory = create_analyzer
+        analyzer = analyzer_factory(config)
+        for post in needs_model:
+            post.status = ComplianceStatus.PENDIENTE
+            post.error_message = ""
+            post.telemetry = []
+        needs_model = analyzer.analyze_batch(
+            needs_model, config, progress_callback=progress_callback
+        )
+
+    return {"modelo": needs_model, "local": needs_local, "al_dia": up_to_date}
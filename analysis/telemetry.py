@@ -0,0 +1,66 @@
+"""Resumen de la telemetria de analisis: latencia, throughput, tokens y costo por batch."""
+import math
+from datetime import datetime
+from config.settings import MODEL_PRICES_PER_MTOK
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Percentil por interpolacion lineal (pct entre 0 y 100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lower, upper = math.floor(k), math.ceil(k)
+    if lower == upper:
+        return ordered[int(k)]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def estimate_cost(backend: str, model: str, input_tokens: int, output_tokens: int) -> float:
+    """Costo estimado en USD. Ollama y modelos sin precio conocido cuestan 0."""
+    if backend != "gemini":
+        return 0.0
+    price_in, price_out = MODEL_PRICES_PER_MTOK.get(model, (0.0, 0.0))
+    return (input_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+
+def summarize_telemetry(rows: list[dict]) -> list[dict]:
+    """Agrupa filas de analysis_telemetry por (batch, backend, modelo).
+
+    El throughput usa el tiempo de pared del batch: desde la primera llamada
+    hasta el fin de la ultima, por lo que refleja el paralelismo real.
+    """
+    groups: dict[tuple[str, str, str], list[dict]] = {}
+    for row in rows:
+        key = (row["batch_id"], row["backend"], row["model"])
+        groups.setdefault(key, []).append(row)
+
+    summary = []
+    for (batch_id, backend, model), calls in groups.items():
+        latencies = [c["latency_ms"] for c in calls]
+        starts = [datetime.fromisoformat(c["created_at"]).timestamp() for c in calls]
+        ends = [start + c["latency_ms"] / 1000 for start, c in zip(starts, calls)]
+        wall_seconds = max(ends) - min(starts)
+        input_tokens = sum(c["input_tokens"] for c in calls)
+        output_tokens = sum(c["output_tokens"] for c in calls)
+        failed_parse = sum(1 for c in calls if c["parse_strategy"] == "fallido")
+
+        summary.append({
+            "batch": batch_id[:8],
+            "inicio": datetime.fromtimestamp(min(starts)).strftime("%Y-%m-%d %H:%M"),
+            "backend": backend,
+            "modelo": model,
+            "llamadas": len(calls),
+            "exitosas": sum(1 for c in calls if c["success"]),
+            "posts/min": round(len(calls) / wall_seconds * 60, 1) if wall_seconds > 0 else 0.0,
+            "p50 ms": round(percentile(latencies, 50)),
+            "p95 ms": round(percentile(latencies, 95)),
+            "KB enviados (prom.)": round(sum(c["payload_bytes"] for c in calls) / len(calls) / 1024, 1),
+            "tokens entrada": input_tokens,
+            "tokens salida": output_tokens,
+            "JSON no parseable": failed_parse,
+            "costo USD": round(estimate_cost(backend, model, input_tokens, output_tokens), 4),
+        })
+
+    summary.sort(key=lambda r: r["inicio"], reverse=True)
+    return summary
@@ -0,0 +1,59 @@
+"""Benchmark de exportacion Excel: Workbook en memoria vs modo write-only por bloques.
+
+Uso: python benchmarks/bench_excel_export.py [--rows 100000]
+
+Mide tiempo y pico de memoria (tracemalloc) de generate_excel_report sobre
+get_all_posts() contra write_excel_report leyendo la DB en bloques.
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import core.database as db
+from bench_read_path import _make_posts
+from reports.excel_export import generate_excel_report, write_excel_report
+
+
+def _measured(label: str, fn) -> float:
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<44} {elapsed:>8,.1f} s {peak / 1024 / 1024:>10,.1f} MB pico {size / 1024 / 1024:>8,.1f} MB archivo")
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DATABASE_PATH = str(Path(tmp) / "bench.db")
+        db.init_db()
+        print(f"Insertando {args.rows:,} posts...")
+        db.save_posts(_make_posts(args.rows))
+        print()
+
+        out = Path(tmp) / "reporte.xlsx"
+        base = _measured(
+            "get_all_posts() + generate_excel_report",
+            lambda: len(generate_excel_report(db.get_all_posts())),
+        )
+        streamed = _measured(
+            "write_excel_report (write-only, por bloques)",
+            lambda: Path(write_excel_report(str(out))).stat().st_size,
+        )
+        print(f"\nMemoria: x{base / streamed:,.1f} menos")
+        db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
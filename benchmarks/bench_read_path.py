@@ -0,0 +1,101 @@
+"""Benchmark de lectura de posts: hidratacion completa vs proyecciones livianas.
+
+Uso: python benchmarks/bench_read_path.py [--rows 100000]
+
+Crea una DB temporal con posts analizados y mide cuanto tarda cada forma de
+obtener el conteo por estado y plataforma (lo que muestran las metricas del
+Dashboard y Reportes).
+"""
+import argparse
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import core.database as db
+from core.models import AnalysisResult, ComplianceStatus, Platform, PostResult
+
+
+def _make_posts(n: int):
+    platforms = list(Platform)
+    statuses = [ComplianceStatus.CUMPLE, ComplianceStatus.NO_CUMPLE, ComplianceStatus.ERROR]
+    start = datetime(2026, 1, 1)
+    for i in range(n):
+        analysis = AnalysisResult(
+            hashtags_present=["#BogotaMiCiudad"],
+            hashtags_missing=["#AlcaldiaDeBogota"] if i % 3 else [],
+            emotional_score=(i % 10) / 10,
+            tone_label="emotivo" if i % 2 else "informativo",
+            brand_identity=bool(i % 4),
+            design_errors=["Logo con baja resolucion"] if i % 5 == 0 else [],
+            common_errors=["Falta hashtag de campana"] if i % 3 else [],
+            suggested_corrections=["Agregar el hashtag de la campana al final del texto"],
+            confidence=0.9,
+            analyzed_by="gemini:gemini-2.0-flash",
+        )
+        yield PostResult(
+            post_id=f"post-{i:07d}",
+            url=f"https://www.instagram.com/p/{i:07d}/",
+            platform=platforms[i % len(platforms)],
+            status=statuses[i % len(statuses)],
+            extracted_text="Texto de ejemplo de la publicacion " * 5,
+            analysis=analysis,
+            created_at=start + timedelta(seconds=i),
+            batch_id=f"batch-{i // 1000}",
+        )
+
+
+def _count_columns() -> Counter:
+    columns = db.query_post_columns(["status", "platform"])
+    return Counter(zip(columns["status"], columns["platform"]))
+
+
+def _timed(label: str, fn, baseline: Optional[float] = None) -> tuple:
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    speedup = f"  x{baseline / elapsed:,.0f}" if baseline else ""
+    print(f"{label:<48} {elapsed * 1000:>10,.1f} ms{speedup}")
+    return elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DATABASE_PATH = str(Path(tmp) / "bench.db")
+        db.init_db()
+        print(f"Insertando {args.rows:,} posts...")
+        db.save_posts(_make_posts(args.rows))
+        print()
+
+        base, posts = _timed(
+            "get_all_posts() + Counter (pydantic completo)",
+            lambda: Counter((p.status, p.platform) for p in db.get_all_posts()),
+        )
+        _, records = _timed(
+            "query_post_records(status, platform)",
+            lambda: Counter((r.status, r.platform) for r in db.query_post_records(["status", "platform"])),
+            base,
+        )
+        _timed(
+            "query_post_records() sin acceder a analysis",
+            lambda: db.query_post_records(),
+            base,
+        )
+        _timed("query_post_columns(status, platform)", _count_columns, base)
+        _timed("count_posts_by_platform() (GROUP BY en SQL)", db.count_posts_by_platform, base)
+
+        assert sum(posts.values()) == sum(records.values()) == args.rows
+        db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Microbenchmark de agregacion: un recorrido por grafico vs ComplianceSummary.
+
+Uso: python benchmarks/bench_summary.py [--rows 100000] [--hashtags 5]
+
+Compara las pasadas separadas que hacian los graficos y el PDF (incluida la
+busqueda de hashtags O(H*P*K)) contra summarize_posts (una pasada en memoria)
+y get_compliance_summary (tablas resumen en SQLite).
+"""
+import argparse
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import core.database as db
+from bench_read_path import _make_posts
+from reports.summary import summarize_posts
+
+
+def _separate_passes(posts, hashtags):
+    """Lo que calculaban por separado pie, barras de errores, hashtags, plataformas y PDF."""
+    pie = Counter(p.status.value for p in posts)
+    errors = []
+    for p in posts:
+        if p.analysis:
+            errors.extend(p.analysis.design_errors)
+            errors.extend(p.analysis.common_errors)
+    top_errors = Counter(errors).most_common(10)
+    analyzed = len([p for p in posts if p.analysis])
+    usage = {
+        hashtag: sum(
+            1 for p in posts
+            if p.analysis and hashtag.lower() in [h.lower() for h in p.analysis.hashtags_present]
+        )
+        for hashtag in hashtags
+    }
+    platforms = {}
+    for p in posts:
+        platforms.setdefault(p.platform.value, Counter())[p.status.value] += 1
+    pdf_status = Counter(p.status.value for p in posts)
+    return pie, top_errors, analyzed, usage, platforms, pdf_status
+
+
+def _timed(label: str, fn, baseline=None) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    speedup = f"  x{baseline / elapsed:,.0f}" if baseline else ""
+    print(f"{label:<48} {elapsed * 1000:>10,.1f} ms{speedup}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--hashtags", type=int, default=5)
+    args = parser.parse_args()
+    hashtags = ["#BogotaMiCiudad", "#AlcaldiaDeBogota"] + [f"#Campana{i}" for i in range(args.hashtags - 2)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DATABASE_PATH = str(Path(tmp) / "bench.db")
+        db.init_db()
+        print(f"Insertando {args.rows:,} posts...")
+        db.save_posts(_make_posts(args.rows))
+        posts = db.get_all_posts()
+        print()
+
+        base = _timed("pasadas separadas (graficos + PDF)", lambda: _separate_passes(posts, hashtags))
+        _timed("summarize_posts (una pasada)", lambda: summarize_posts(posts, hashtags), base)
+        _timed("get_compliance_summary (tablas resumen)", lambda: db.get_compliance_summary(hashtags), base)
+
+        in_memory = summarize_posts(posts, hashtags)
+        assert in_memory == db.get_compliance_summary(hashtags)
+        db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
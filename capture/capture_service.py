@@ -1,6 +1,8 @@
 import sys
 import asyncio
 import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from uuid import uuid4
 from typing import Callable, Optional
 from capture.browser import BrowserManager
@@ -13,7 +15,9 @@ from capture.strategies import (
 )
 from capture.selectors import PLATFORM_SELECTORS
 from core.models import Platform, PostResult, ComplianceStatus
-from utils.image_helpers import save_screenshot, create_thumbnail
+from config.settings import DERIVATIVE_WORKERS
+from utils import image_buffers
+from utils.image_helpers import save_screenshot, create_derivatives, derivative_path
 
 
 def _run_in_playwright_thread(func, *args, **kwargs):
@@ -47,6 +51,58 @@ def _run_in_playwright_thread(func, *args, **kwargs):
     return result[0]
 
 
+_derivative_pool: Optional[ProcessPoolExecutor] = None
+_derivative_pool_lock = threading.Lock()
+
+
+def _derivatives_executor() -> ProcessPoolExecutor:
+    """Pool de procesos para los derivados, creado una vez y compartido entre batches."""
+    global _derivative_pool
+    with _derivative_pool_lock:
+        if _derivative_pool is None:
+            _derivative_pool = ProcessPoolExecutor(max_workers=DERIVATIVE_WORKERS)
+        return _derivative_pool
+
+
+def _reset_derivatives_executor(broken: ProcessPoolExecutor):
+    """Descarta el pool si un worker murio; el proximo batch crea uno nuevo."""
+    global _derivative_pool
+    with _derivative_pool_lock:
+        if _derivative_pool is broken:
+            _derivative_pool = None
+    broken.shutdown(wait=False)
+
+
+def _submit_derivatives(pool: ProcessPoolExecutor, screenshot_path: str) -> Future:
+    """Agenda los derivados cuando el blob ya esta en disco.
+
+    Al worker solo viaja la ruta (no los bytes): lee el archivo escrito por
+    image_buffers. El Future retornado se completa cuando terminan los derivados.
+    """
+    result: Future = Future()
+
+    def copy_result(job: Future):
+        error = job.exception()
+        if isinstance(error, BrokenProcessPool):
+            _reset_derivatives_executor(pool)
+        if error is not None:
+            result.set_exception(error)
+        else:
+            result.set_result(job.result())
+
+    def submit(_):
+        try:
+            pool.submit(create_derivatives, screenshot_path).add_done_callback(copy_result)
+        except BrokenProcessPool as e:
+            _reset_derivatives_executor(pool)
+            result.set_exception(e)
+        except Exception as e:
+            result.set_exception(e)
+
+    image_buffers.written(screenshot_path).add_done_callback(submit)
+    return result
+
+
 class CaptureService:
     """Orquestador de captura: recibe URLs, delega a estrategias, retorna PostResult."""
 
@@ -58,8 +114,18 @@ class CaptureService:
             Platform.TIKTOK: TikTokStrategy(),
         }
 
-    def _do_capture_single(self, browser_manager: BrowserManager, url: str, platform: Platform) -> PostResult:
-        """Captura una sola URL (debe ejecutarse dentro del thread de Playwright)."""
+    def _do_capture_single(
+        self,
+        browser_manager: BrowserManager,
+        url: str,
+        platform: Platform,
+        derivatives: Optional[ProcessPoolExecutor] = None,
+    ) -> PostResult:
+        """Captura una sola URL (debe ejecutarse dentro del thread de Playwright).
+
+        Los thumbnails se generan en `derivatives` (pool de procesos) para no
+        frenar el navegador ni el analisis; sin pool se generan aqui mismo.
+        """
         post_id = str(uuid4())
         context = browser_manager.new_context()
         page = context.new_page()
@@ -77,8 +143,13 @@ class CaptureService:
 
             screenshot_bytes, text = strategy.capture(page, url, selectors)
 
-            screenshot_path = save_screenshot(post_id, screenshot_bytes)
-            thumbnail_path = create_thumbnail(screenshot_path)
+            screenshot_path = save_screenshot(screenshot_bytes)
+            # La ruta es fija; si el derivado falla se regenera al pedirlo (get_derivative)
+            thumbnail_path = derivative_path(screenshot_path, "grid")
+            if derivatives is not None:
+                _submit_derivatives(derivatives, screenshot_path)
+            else:
+                create_derivatives(screenshot_path, data=screenshot_bytes)
 
             return PostResult(
                 post_id=post_id,
@@ -109,12 +180,17 @@ class CaptureService:
         browser_manager = BrowserManager()
         browser_manager.start()
         results = []
+        derivatives = _derivatives_executor()
         try:
             for i, (url, platform) in enumerate(urls):
-                result = self._do_capture_single(browser_manager, url, platform)
+                result = self._do_capture_single(browser_manager, url, platform, derivatives)
                 results.append(result)
         finally:
             browser_manager.close()
+            # Los posts se guardan al volver: sus screenshots deben estar en disco.
+            # Los derivados no se esperan: terminan en segundo plano y los que
+            # falten (o fallen) se regeneran al mostrarse (get_derivative)
+            image_buffers.flush()
         return results
 
     def capture_batch(
@@ -4,6 +4,12 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATABASE_PATH = str(BASE_DIR / "data" / "cumplimiento.db")
 SCREENSHOTS_DIR = str(BASE_DIR / "data" / "screenshots")
+LOGOS_DIR = str(BASE_DIR / "data" / "logos")
+# Carpeta publicada por Streamlit en app/static (ver .streamlit/config.toml)
+STATIC_DIR = str(BASE_DIR / "static")
+STATIC_URL = "app/static"
+DERIVATIVES_DIR = str(BASE_DIR / "static" / "derivatives")
+REPORT_CACHE_DIR = str(BASE_DIR / "data" / "report_cache")
 
 SUPPORTED_PLATFORMS = {
     "instagram": "instagram.com",
@@ -24,4 +30,19 @@ DEFAULT_TONE_KEYWORDS_INFORMATIVO = [
 
 SCREENSHOT_TIMEOUT_MS = 30000
 MAX_CONCURRENT_CAPTURES = 3
+# Procesos que generan los thumbnails mientras el navegador sigue capturando
+DERIVATIVE_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+# Memoria maxima para screenshots en transito entre captura y analisis
+IMAGE_BUFFER_BUDGET_MB = 256
 GEMINI_MODEL_NAME = "gemini-2.0-flash"
+
+# Precio en USD por millon de tokens (entrada, salida) para estimar costos.
+# Los modelos locales (Ollama) no tienen costo por token.
+MODEL_PRICES_PER_MTOK = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+}
@@ -1,21 +1,85 @@
 import sqlite3
 import json
+import re
+import threading
+from datetime import date, datetime, timedelta
+from enum import Enum
+from itertools import islice
 from pathlib import Path
-from typing import Optional
-from core.models import PostResult, ComplianceConfig, AnalysisResult
+from typing import Iterable, Iterator, Optional
+from core.models import (
+    PostResult, PostRecord, ComplianceConfig, ComplianceStatus, ComplianceSummary, AnalysisResult, UsageStats,
+)
 from config.settings import DATABASE_PATH
+from analysis.local_checks import hashtag_key
+
+
+BUSY_TIMEOUT_MS = 5000
+
+# Pragmas por conexion: WAL permite lectores concurrentes mientras un batch escribe,
+# y con WAL synchronous=NORMAL es seguro y evita un fsync por cada commit.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+)
+
+# Version del esquema (PRAGMA user_version); ver _migrate()
+SCHEMA_VERSION = 7
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized_paths: set[str] = set()
 
 
 def _get_connection() -> sqlite3.Connection:
+    """Conexion persistente del thread actual (una por thread y archivo de DB).
+
+    No se cierra despues de cada operacion; las escrituras usan `with conn:`
+    para confirmar o revertir su transaccion.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == DATABASE_PATH:
+        return conn
+    if conn is not None:
+        conn.close()
+
     Path(DATABASE_PATH).parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = sqlite3.connect(DATABASE_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
     conn.row_factory = sqlite3.Row
+    for pragma in _PRAGMAS:
+        conn.execute(pragma)
+    _local.conn = conn
+    _local.path = DATABASE_PATH
     return conn
 
 
+def close_connection():
+    """Cierra la conexion del thread actual (ej: al terminar un worker)."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
 def init_db():
-    conn = _get_connection()
-    try:
+    """Crea el esquema una vez por proceso; las llamadas siguientes no tocan la DB."""
+    if DATABASE_PATH in _initialized_paths:
+        return
+    with _init_lock:
+        if DATABASE_PATH in _initialized_paths:
+            return
+        _create_schema(_get_connection())
+        _initialized_paths.add(DATABASE_PATH)
+
+
+def _create_schema(conn: sqlite3.Connection):
+    # Solo tiene efecto en una DB nueva; las existentes se convierten en la migracion v4
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    with conn:
         conn.execute("""
             CREATE TABLE IF NOT EXISTS posts (
                 post_id TEXT PRIMARY KEY,
@@ -28,123 +92,1530 @@ def init_db():
                 analysis_json TEXT DEFAULT '',
                 created_at TEXT NOT NULL,
                 error_message TEXT DEFAULT '',
-                batch_id TEXT DEFAULT ''
+                batch_id TEXT DEFAULT '',
+                brand_identity INTEGER,
+                tone_label TEXT,
+                emotional_score REAL
+            )
+        """)
+        # Columnas agregadas despues de la primera version del esquema
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(posts)")}
+        for column, ddl in _ANALYSIS_COLUMNS_DDL.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE posts ADD COLUMN {column} {ddl}")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS post_hashtags (
+                post_id TEXT NOT NULL,
+                hashtag TEXT NOT NULL,
+                present INTEGER NOT NULL,
+                PRIMARY KEY (post_id, hashtag, present)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS post_errors (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                post_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                description TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS batch_usage (
+                batch_id TEXT NOT NULL,
+                model TEXT NOT NULL,
+                requests INTEGER DEFAULT 0,
+                input_tokens INTEGER DEFAULT 0,
+                output_tokens INTEGER DEFAULT 0,
+                retries INTEGER DEFAULT 0,
+                rate_limited INTEGER DEFAULT 0,
+                throttled_seconds REAL DEFAULT 0,
+                PRIMARY KEY (batch_id, model)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_telemetry (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                post_id TEXT NOT NULL,
+                batch_id TEXT DEFAULT '',
+                backend TEXT DEFAULT '',
+                model TEXT DEFAULT '',
+                latency_ms REAL DEFAULT 0,
+                payload_bytes INTEGER DEFAULT 0,
+                input_tokens INTEGER DEFAULT 0,
+                output_tokens INTEGER DEFAULT 0,
+                parse_strategy TEXT DEFAULT '',
+                success INTEGER DEFAULT 0,
+                created_at TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_batch ON posts(batch_id, created_at, post_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_status ON posts(status, created_at, post_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_platform ON posts(platform, created_at, post_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_created ON posts(created_at, post_id)")
+        # Conteo de referencias a las imagenes (varios posts pueden compartir un blob)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_screenshot ON posts(screenshot_path)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_thumbnail ON posts(thumbnail_path)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_hashtags_usage ON post_hashtags(hashtag, present, post_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_errors_post ON post_errors(post_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_errors_description ON post_errors(description, kind)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_telemetry_post ON analysis_telemetry(post_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_telemetry_batch ON analysis_telemetry(batch_id)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS batches (
+                batch_id TEXT PRIMARY KEY,
+                started_at TEXT NOT NULL,
+                finished_at TEXT DEFAULT '',
+                url_count INTEGER DEFAULT 0,
+                model TEXT DEFAULT '',
+                config_json TEXT DEFAULT '',
+                pinned INTEGER DEFAULT 0
+            )
+        """)
+        # Series de tendencia: aporte de cada batch por dia y plataforma. No se
+        # borran con la retencion, para conservar la historia.
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS trend_counts (
+                batch_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                posts INTEGER DEFAULT 0,
+                cumple INTEGER DEFAULT 0,
+                no_cumple INTEGER DEFAULT 0,
+                errores INTEGER DEFAULT 0,
+                analyzed INTEGER DEFAULT 0,
+                PRIMARY KEY (batch_id, day, platform)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS trend_hashtags (
+                batch_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                hashtag TEXT NOT NULL,
+                posts INTEGER DEFAULT 0,
+                PRIMARY KEY (batch_id, day, platform, hashtag)
             )
         """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_trend_counts_day ON trend_counts(day)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_trend_hashtags_day ON trend_hashtags(hashtag, day)")
         conn.execute("""
             CREATE TABLE IF NOT EXISTS config (
                 key TEXT PRIMARY KEY,
                 value_json TEXT NOT NULL
             )
         """)
-        conn.commit()
-    finally:
-        conn.close()
+        for statement in _SUMMARY_SCHEMA + _SEARCH_SCHEMA + _DATA_VERSION_SCHEMA:
+            conn.execute(statement)
+    _migrate(conn)
 
 
-def save_post(post: PostResult):
+def _migrate(conn: sqlite3.Connection):
+    """Migraciones de datos segun PRAGMA user_version."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        # v1: columnas y tablas hijas del analisis, pobladas desde analysis_json
+        last_id = ""
+        while True:
+            rows = conn.execute(
+                "SELECT post_id, analysis_json FROM posts WHERE post_id > ? ORDER BY post_id LIMIT ?",
+                (last_id, SAVE_CHUNK_SIZE),
+            ).fetchall()
+            if not rows:
+                break
+            posts = [
+                (row["post_id"], _parse_analysis(row["analysis_json"])) for row in rows
+            ]
+            with conn:
+                conn.executemany(
+                    "UPDATE posts SET brand_identity = ?, tone_label = ?, emotional_score = ? WHERE post_id = ?",
+                    [(*_analysis_params(analysis), post_id) for post_id, analysis in posts],
+                )
+                _save_analysis_children(conn, posts)
+            last_id = rows[-1]["post_id"]
+    if version < 2:
+        # v2: tablas resumen mantenidas por triggers
+        _rebuild_summaries(conn)
+    if version < 3:
+        # v3: indice de busqueda full-text
+        _rebuild_search_index(conn)
+    if version < 4:
+        # v4: registro de batches (desde los posts existentes) y vacuum incremental
+        with conn:
+            conn.execute("""
+                INSERT OR IGNORE INTO batches (batch_id, started_at, finished_at, url_count)
+                SELECT batch_id, MIN(created_at), MAX(created_at), COUNT(*)
+                FROM posts WHERE batch_id != '' GROUP BY batch_id
+            """)
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+    if version < 5:
+        # v5: series de tendencia desde los batches existentes
+        batch_ids = [row[0] for row in conn.execute("SELECT batch_id FROM batches")]
+        _record_batch_trends(conn, batch_ids)
+    if version < 6:
+        # v6: post_hashtags guarda la clave del hashtag (sin '#'), igual que check_hashtags
+        with conn:
+            conn.execute("""
+                UPDATE OR IGNORE post_hashtags SET hashtag = ltrim(trim(hashtag), '#')
+                WHERE hashtag != ltrim(trim(hashtag), '#')
+            """)
+            # Las que chocan con una fila ya normalizada del mismo post sobran
+            conn.execute("DELETE FROM post_hashtags WHERE hashtag != ltrim(trim(hashtag), '#')")
+        _rebuild_summaries(conn)
+    if version < 7:
+        # v7: trend_hashtags con la misma clave; se conserva la historia de batches ya borrados
+        with conn:
+            conn.execute("""
+                INSERT INTO trend_hashtags (batch_id, day, platform, hashtag, posts)
+                SELECT batch_id, day, platform, ltrim(trim(hashtag), '#'), posts
+                FROM trend_hashtags WHERE hashtag != ltrim(trim(hashtag), '#')
+                ON CONFLICT(batch_id, day, platform, hashtag) DO UPDATE SET
+                    posts = posts + excluded.posts
+            """)
+            conn.execute("DELETE FROM trend_hashtags WHERE hashtag != ltrim(trim(hashtag), '#')")
+    if version < SCHEMA_VERSION:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+# --- Tablas resumen ---
+# Conteos por (batch, dia, ...) mantenidos por triggers al insertar, actualizar o
+# borrar posts y sus tablas hijas. Las metricas y graficos leen de aqui en
+# O(grupos) en vez de recorrer todos los posts. Ver check_summaries/rebuild_summaries.
+
+_SUMMARY_UPSERT_COUNTS = """
+    INSERT INTO summary_counts (batch_id, day, platform, status, posts, analyzed)
+    VALUES ({row}.batch_id, substr({row}.created_at, 1, 10), {row}.platform, {row}.status,
+            {sign}1, {sign}({row}.tone_label IS NOT NULL))
+    ON CONFLICT(batch_id, day, platform, status) DO UPDATE SET
+        posts = posts + excluded.posts, analyzed = analyzed + excluded.analyzed;
+"""
+_SUMMARY_PRUNE_COUNTS = """
+    DELETE FROM summary_counts
+    WHERE (batch_id, day, platform, status) = (OLD.batch_id, substr(OLD.created_at, 1, 10), OLD.platform, OLD.status)
+      AND posts <= 0;
+"""
+# Aporte de las filas hijas de un post a su grupo (batch, dia), con signo
+_SUMMARY_CHILD_ERRORS = """
+    INSERT INTO summary_errors (batch_id, day, kind, description, occurrences)
+    SELECT {post}.batch_id, substr({post}.created_at, 1, 10), e.kind, e.description, {sign}COUNT(*)
+    FROM post_errors AS e WHERE e.post_id = {post}.post_id
+    GROUP BY e.kind, e.description
+    ON CONFLICT(batch_id, day, kind, description) DO UPDATE SET
+        occurrences = occurrences + excluded.occurrences;
+"""
+_SUMMARY_CHILD_HASHTAGS = """
+    INSERT INTO summary_hashtags (batch_id, day, hashtag, present, posts)
+    SELECT {post}.batch_id, substr({post}.created_at, 1, 10), h.hashtag, h.present, {sign}COUNT(*)
+    FROM post_hashtags AS h WHERE h.post_id = {post}.post_id
+    GROUP BY h.hashtag, h.present
+    ON CONFLICT(batch_id, day, hashtag, present) DO UPDATE SET
+        posts = posts + excluded.posts;
+"""
+
+_SUMMARY_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS summary_counts (
+        batch_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        platform TEXT NOT NULL,
+        status TEXT NOT NULL,
+        posts INTEGER NOT NULL DEFAULT 0,
+        analyzed INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (batch_id, day, platform, status)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS summary_errors (
+        batch_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        description TEXT NOT NULL,
+        occurrences INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (batch_id, day, kind, description)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS summary_hashtags (
+        batch_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        hashtag TEXT NOT NULL,
+        present INTEGER NOT NULL,
+        posts INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (batch_id, day, hashtag, present)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_summary_counts_day ON summary_counts(day)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_posts_summary_insert AFTER INSERT ON posts
+    BEGIN
+        {_SUMMARY_UPSERT_COUNTS.format(row="NEW", sign="")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_posts_summary_delete AFTER DELETE ON posts
+    BEGIN
+        {_SUMMARY_UPSERT_COUNTS.format(row="OLD", sign="-")}
+        {_SUMMARY_PRUNE_COUNTS}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_posts_summary_update
+    AFTER UPDATE OF platform, status, batch_id, created_at, tone_label ON posts
+    WHEN OLD.platform IS NOT NEW.platform
+      OR OLD.status IS NOT NEW.status
+      OR OLD.batch_id IS NOT NEW.batch_id
+      OR substr(OLD.created_at, 1, 10) IS NOT substr(NEW.created_at, 1, 10)
+      OR (OLD.tone_label IS NULL) IS NOT (NEW.tone_label IS NULL)
+    BEGIN
+        {_SUMMARY_UPSERT_COUNTS.format(row="OLD", sign="-")}
+        {_SUMMARY_PRUNE_COUNTS}
+        {_SUMMARY_UPSERT_COUNTS.format(row="NEW", sign="")}
+    END
+    """,
+    # Si un post cambia de batch o de dia, sus errores y hashtags cambian de grupo
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_posts_summary_move_children
+    AFTER UPDATE OF batch_id, created_at ON posts
+    WHEN OLD.batch_id IS NOT NEW.batch_id
+      OR substr(OLD.created_at, 1, 10) IS NOT substr(NEW.created_at, 1, 10)
+    BEGIN
+        {_SUMMARY_CHILD_ERRORS.format(post="OLD", sign="-")}
+        {_SUMMARY_CHILD_ERRORS.format(post="NEW", sign="")}
+        {_SUMMARY_CHILD_HASHTAGS.format(post="OLD", sign="-")}
+        {_SUMMARY_CHILD_HASHTAGS.format(post="NEW", sign="")}
+        DELETE FROM summary_errors
+        WHERE batch_id = OLD.batch_id AND day = substr(OLD.created_at, 1, 10) AND occurrences <= 0;
+        DELETE FROM summary_hashtags
+        WHERE batch_id = OLD.batch_id AND day = substr(OLD.created_at, 1, 10) AND posts <= 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_errors_summary_insert AFTER INSERT ON post_errors
+    BEGIN
+        INSERT INTO summary_errors (batch_id, day, kind, description, occurrences)
+        SELECT p.batch_id, substr(p.created_at, 1, 10), NEW.kind, NEW.description, 1
+        FROM posts AS p WHERE p.post_id = NEW.post_id
+        ON CONFLICT(batch_id, day, kind, description) DO UPDATE SET occurrences = occurrences + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_errors_summary_delete AFTER DELETE ON post_errors
+    BEGIN
+        UPDATE summary_errors SET occurrences = occurrences - 1
+        WHERE (batch_id, day, kind, description) = (
+            SELECT p.batch_id, substr(p.created_at, 1, 10), OLD.kind, OLD.description
+            FROM posts AS p WHERE p.post_id = OLD.post_id
+        );
+        DELETE FROM summary_errors
+        WHERE (batch_id, day, kind, description) = (
+            SELECT p.batch_id, substr(p.created_at, 1, 10), OLD.kind, OLD.description
+            FROM posts AS p WHERE p.post_id = OLD.post_id
+        ) AND occurrences <= 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_hashtags_summary_insert AFTER INSERT ON post_hashtags
+    BEGIN
+        INSERT INTO summary_hashtags (batch_id, day, hashtag, present, posts)
+        SELECT p.batch_id, substr(p.created_at, 1, 10), NEW.hashtag, NEW.present, 1
+        FROM posts AS p WHERE p.post_id = NEW.post_id
+        ON CONFLICT(batch_id, day, hashtag, present) DO UPDATE SET posts = posts + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_hashtags_summary_delete AFTER DELETE ON post_hashtags
+    BEGIN
+        UPDATE summary_hashtags SET posts = posts - 1
+        WHERE (batch_id, day, hashtag, present) = (
+            SELECT p.batch_id, substr(p.created_at, 1, 10), OLD.hashtag, OLD.present
+            FROM posts AS p WHERE p.post_id = OLD.post_id
+        );
+        DELETE FROM summary_hashtags
+        WHERE (batch_id, day, hashtag, present) = (
+            SELECT p.batch_id, substr(p.created_at, 1, 10), OLD.hashtag, OLD.present
+            FROM posts AS p WHERE p.post_id = OLD.post_id
+        ) AND posts <= 0;
+    END
+    """,
+)
+
+# Contenido esperado de cada tabla resumen, calculado desde cero
+_SUMMARY_EXPECTED = {
+    "summary_counts": """
+        SELECT batch_id, substr(created_at, 1, 10), platform, status,
+               COUNT(*), SUM(tone_label IS NOT NULL)
+        FROM posts GROUP BY 1, 2, 3, 4
+    """,
+    "summary_errors": """
+        SELECT p.batch_id, substr(p.created_at, 1, 10), e.kind, e.description, COUNT(*)
+        FROM post_errors AS e JOIN posts AS p ON p.post_id = e.post_id
+        GROUP BY 1, 2, 3, 4
+    """,
+    "summary_hashtags": """
+        SELECT p.batch_id, substr(p.created_at, 1, 10), h.hashtag, h.present, COUNT(*)
+        FROM post_hashtags AS h JOIN posts AS p ON p.post_id = h.post_id
+        GROUP BY 1, 2, 3, 4
+    """,
+}
+_SUMMARY_COLUMNS = {
+    "summary_counts": "batch_id, day, platform, status, posts, analyzed",
+    "summary_errors": "batch_id, day, kind, description, occurrences",
+    "summary_hashtags": "batch_id, day, hashtag, present, posts",
+}
+
+
+def _rebuild_summaries(conn: sqlite3.Connection):
+    with conn:
+        for table, expected in _SUMMARY_EXPECTED.items():
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(f"INSERT INTO {table} ({_SUMMARY_COLUMNS[table]}) {expected}")
+
+
+def rebuild_summaries() -> dict[str, int]:
+    """Recalcula las tablas resumen desde posts. Retorna las filas de cada una."""
     conn = _get_connection()
-    try:
-        analysis_json = ""
-        if post.analysis:
-            analysis_json = post.analysis.model_dump_json()
+    _rebuild_summaries(conn)
+    return {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in _SUMMARY_EXPECTED
+    }
 
-        conn.execute("""
-            INSERT OR REPLACE INTO posts
-            (post_id, url, platform, status, extracted_text, screenshot_path,
-             thumbnail_path, analysis_json, created_at, error_message, batch_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            post.post_id, post.url, post.platform.value, post.status.value,
-            post.extracted_text, post.screenshot_path, post.thumbnail_path,
-            analysis_json, post.created_at.isoformat(), post.error_message,
-            post.batch_id,
-        ))
-        conn.commit()
-    finally:
-        conn.close()
 
+def check_summaries() -> dict[str, int]:
+    """Compara las tablas resumen con un recalculo completo.
 
-def get_all_posts(batch_id: Optional[str] = None) -> list[PostResult]:
+    Retorna la cantidad de grupos que difieren por tabla (0 = consistente).
+    """
+    conn = _get_connection()
+    differences = {}
+    for table, expected in _SUMMARY_EXPECTED.items():
+        actual = f"SELECT {_SUMMARY_COLUMNS[table]} FROM {table}"
+        differences[table] = conn.execute(f"""
+            SELECT
+                (SELECT COUNT(*) FROM (SELECT * FROM ({expected}) EXCEPT SELECT * FROM ({actual})))
+              + (SELECT COUNT(*) FROM (SELECT * FROM ({actual}) EXCEPT SELECT * FROM ({expected})))
+        """).fetchone()[0]
+    return differences
+
+
+# --- Busqueda full-text ---
+# posts_fts indexa el texto extraido, los errores y las correcciones sugeridas
+# (leidos de analysis_json). Comparte rowid con posts y se mantiene por triggers.
+def _json_list_text(row: str, *paths: str) -> str:
+    """Expresion SQL que une los elementos de las listas `paths` de analysis_json."""
+    items = " UNION ALL ".join(
+        f"SELECT value FROM json_each({row}.analysis_json, '{path}')" for path in paths
+    )
+    return (
+        f"CASE WHEN json_valid({row}.analysis_json) THEN "
+        f"(SELECT group_concat(value, ' | ') FROM ({items})) END"
+    )
+
+
+def _fts_select(row: str) -> str:
+    return (
+        f"SELECT {row}.rowid, {row}.post_id, {row}.extracted_text, "
+        f"{_json_list_text(row, '$.design_errors', '$.common_errors')}, "
+        f"{_json_list_text(row, '$.suggested_corrections')}"
+    )
+
+
+_FTS_INSERT = "INSERT INTO posts_fts (rowid, post_id, extracted_text, errors, corrections)"
+
+_SEARCH_SCHEMA = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        post_id UNINDEXED,
+        extracted_text,
+        errors,
+        corrections,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_posts_fts_insert AFTER INSERT ON posts
+    BEGIN
+        {_FTS_INSERT} {_fts_select("NEW")};
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_posts_fts_delete AFTER DELETE ON posts
+    BEGIN
+        DELETE FROM posts_fts WHERE rowid = OLD.rowid;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_posts_fts_update AFTER UPDATE OF extracted_text, analysis_json ON posts
+    WHEN OLD.extracted_text IS NOT NEW.extracted_text OR OLD.analysis_json IS NOT NEW.analysis_json
+    BEGIN
+        DELETE FROM posts_fts WHERE rowid = OLD.rowid;
+        {_FTS_INSERT} {_fts_select("NEW")};
+    END
+    """,
+)
+
+
+# --- Version de los datos ---
+# Cualquier cambio en posts incrementa config['data_version'] (clave de los reportes cacheados)
+_BUMP_DATA_VERSION_SQL = """
+    INSERT INTO config (key, value_json) VALUES ('data_version', '1')
+    ON CONFLICT(key) DO UPDATE SET value_json = CAST(value_json AS INTEGER) + 1
+"""
+
+_DATA_VERSION_SCHEMA = tuple(
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_posts_data_version_{event.lower()} AFTER {event} ON posts
+    BEGIN
+        {_BUMP_DATA_VERSION_SQL};
+    END
+    """
+    for event in ("INSERT", "UPDATE", "DELETE")
+)
+
+
+def get_data_version() -> int:
+    """Version de los posts: cambia con cada alta, modificacion o borrado (0 si nunca hubo)."""
+    row = _get_connection().execute(
+        "SELECT value_json FROM config WHERE key = 'data_version'"
+    ).fetchone()
+    return int(row["value_json"]) if row else 0
+
+
+def _rebuild_search_index(conn: sqlite3.Connection):
+    with conn:
+        conn.execute("DELETE FROM posts_fts")
+        conn.execute(f"{_FTS_INSERT} {_fts_select('posts')} FROM posts")
+
+
+def rebuild_search_index() -> int:
+    """Regenera el indice full-text desde posts. Retorna los posts indexados."""
     conn = _get_connection()
+    _rebuild_search_index(conn)
+    return conn.execute("SELECT COUNT(*) FROM posts_fts").fetchone()[0]
+
+
+def _fts_query(text: str) -> str:
+    """Convierte el texto del usuario en una consulta FTS5 segura.
+
+    Cada palabra se busca literal (todas deben aparecer) y la ultima como prefijo,
+    para que 'logo pixel' encuentre 'logo pixelado'.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return ""
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_posts(text: str, limit: int = 50, **filters) -> list[tuple[PostRecord, str]]:
+    """Busca en texto extraido, errores y correcciones, ordenado por relevancia (bm25).
+
+    Retorna [(post, fragmento)] donde el fragmento resalta las coincidencias con **.
+    Acepta los mismos filtros que query_posts.
+    """
+    query = _fts_query(text)
+    if not query:
+        return []
+    where, params = _build_where(**filters)
+    where += (" AND " if where else "WHERE ") + "posts_fts MATCH ?"
+    params.append(query)
+    cursor = _tuple_cursor(f"""
+        SELECT {", ".join(f"posts.{c}" for c in _POST_COLUMNS)},
+               snippet(posts_fts, -1, '**', '**', '...', 16) AS snippet
+        FROM posts_fts JOIN posts ON posts.rowid = posts_fts.rowid
+        {where}
+        ORDER BY bm25(posts_fts, 0.0, 1.0, 2.0, 1.0)
+        LIMIT ?
+    """, params + [limit])
+    rows = cursor.fetchall()
+    records = PostRecord.from_rows(list(_POST_COLUMNS), [row[:-1] for row in rows])
+    return [(record, row[-1]) for record, row in zip(records, rows)]
+
+_ANALYSIS_COLUMNS_DDL = {
+    "brand_identity": "INTEGER",
+    "tone_label": "TEXT",
+    "emotional_score": "REAL",
+}
+
+_POST_COLUMNS = (
+    "post_id", "url", "platform", "status", "extracted_text", "screenshot_path",
+    "thumbnail_path", "analysis_json", "created_at", "error_message", "batch_id",
+    *_ANALYSIS_COLUMNS_DDL,
+)
+
+# Columnas que se derivan del analisis: solo se escriben junto con analysis_json
+_DERIVED_COLUMNS = {"analysis_json", *_ANALYSIS_COLUMNS_DDL}
+
+# Upsert: si el post ya existe solo se actualiza cuando algun valor cambio
+# (sin borrar ni reinsertar la fila como hacia INSERT OR REPLACE).
+_UPSERT_POST_SQL = f"""
+    INSERT INTO posts ({", ".join(_POST_COLUMNS)})
+    VALUES ({", ".join("?" for _ in _POST_COLUMNS)})
+    ON CONFLICT(post_id) DO UPDATE SET
+        {", ".join(f"{c} = excluded.{c}" for c in _POST_COLUMNS[1:])}
+    WHERE {" OR ".join(f"posts.{c} IS NOT excluded.{c}" for c in _POST_COLUMNS[1:])}
+"""
+
+SAVE_CHUNK_SIZE = 1000
+
+
+def _parse_analysis(analysis_json: str) -> Optional[AnalysisResult]:
+    if not analysis_json:
+        return None
     try:
-        if batch_id:
-            rows = conn.execute(
-                "SELECT * FROM posts WHERE batch_id = ? ORDER BY created_at DESC", (batch_id,)
-            ).fetchall()
+        return AnalysisResult.model_validate_json(analysis_json)
+    except Exception:
+        return None
+
+
+def _analysis_params(analysis: Optional[AnalysisResult]) -> tuple:
+    """Valores de brand_identity, tone_label y emotional_score (NULL sin analisis)."""
+    if analysis is None:
+        return (None, None, None)
+    return (int(analysis.brand_identity), analysis.tone_label, analysis.emotional_score)
+
+
+def _post_params(post: PostResult) -> tuple:
+    analysis_json = post.analysis.model_dump_json() if post.analysis else ""
+    return (
+        post.post_id, post.url, post.platform.value, post.status.value,
+        post.extracted_text, post.screenshot_path, post.thumbnail_path,
+        analysis_json, post.created_at.isoformat(), post.error_message,
+        post.batch_id, *_analysis_params(post.analysis),
+    )
+
+
+def _save_analysis_children(conn: sqlite3.Connection, posts: list[tuple[str, Optional[AnalysisResult]]]):
+    """Reemplaza las filas de post_hashtags y post_errors de cada (post_id, analisis)."""
+    ids = [(post_id,) for post_id, _ in posts]
+    conn.executemany("DELETE FROM post_hashtags WHERE post_id = ?", ids)
+    conn.executemany("DELETE FROM post_errors WHERE post_id = ?", ids)
+
+    hashtags, errors = [], []
+    for post_id, analysis in posts:
+        if analysis is None:
+            continue
+        hashtags.extend((post_id, hashtag_key(h), 1) for h in analysis.hashtags_present)
+        hashtags.extend((post_id, hashtag_key(h), 0) for h in analysis.hashtags_missing)
+        errors.extend((post_id, "diseno", e) for e in analysis.design_errors)
+        errors.extend((post_id, "comun", e) for e in analysis.common_errors)
+    conn.executemany(
+        "INSERT OR IGNORE INTO post_hashtags (post_id, hashtag, present) VALUES (?, ?, ?)", hashtags
+    )
+    conn.executemany(
+        "INSERT INTO post_errors (post_id, kind, description) VALUES (?, ?, ?)", errors
+    )
+
+
+def save_post(post: PostResult):
+    save_posts([post])
+
+
+def save_posts(posts: Iterable[PostResult], chunk_size: int = SAVE_CHUNK_SIZE) -> int:
+    """Guarda (upsert) muchos posts con executemany. Retorna cuantos se procesaron.
+
+    Cada bloque de `chunk_size` posts es una sola transaccion (un solo commit),
+    para no retener el lock de escritura ni la memoria en batches muy grandes.
+    Hashtags, errores y telemetria solo se reescriben en los posts cuyo analisis
+    cambio respecto de lo guardado.
+    """
+    conn = _get_connection()
+    total = 0
+    iterator = iter(posts)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            break
+        params = [_post_params(p) for p in chunk]
+        with conn:
+            stored = _stored_analysis(conn, [p.post_id for p in chunk])
+            conn.executemany(_UPSERT_POST_SQL, params)
+            # Las filas hijas solo se reescriben si cambio el analisis guardado
+            changed = {
+                p.post_id for p, row in zip(chunk, params)
+                if p.post_id not in stored or stored[p.post_id][0] != row[_ANALYSIS_JSON_INDEX]
+            }
+            _save_analysis_children(conn, [(p.post_id, p.analysis) for p in chunk if p.post_id in changed])
+            _save_telemetry(conn, [
+                p for p in chunk
+                if p.telemetry and (p.post_id in changed or stored[p.post_id][1] != len(p.telemetry))
+            ])
+        total += len(chunk)
+    return total
+
+
+_ANALYSIS_JSON_INDEX = _POST_COLUMNS.index("analysis_json")
+
+
+def _stored_analysis(conn: sqlite3.Connection, post_ids: list[str]) -> dict[str, tuple[str, int]]:
+    """analysis_json guardado y cantidad de filas de telemetria de los posts que ya existen."""
+    rows = conn.execute(f"""
+        SELECT p.post_id, p.analysis_json,
+               (SELECT COUNT(*) FROM analysis_telemetry AS t WHERE t.post_id = p.post_id)
+        FROM posts AS p WHERE p.post_id IN ({", ".join("?" for _ in post_ids)})
+    """, post_ids).fetchall()
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+
+def _save_telemetry(conn: sqlite3.Connection, posts: list[PostResult]):
+    """Reemplaza la telemetria de los posts: corresponde a su ultimo analisis."""
+    if not posts:
+        return
+    conn.executemany(
+        "DELETE FROM analysis_telemetry WHERE post_id = ?", [(p.post_id,) for p in posts]
+    )
+    conn.executemany("""
+        INSERT INTO analysis_telemetry
+        (post_id, batch_id, backend, model, latency_ms, payload_bytes,
+         input_tokens, output_tokens, parse_strategy, success, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (
+            p.post_id, p.batch_id, t.backend, t.model, t.latency_ms,
+            t.payload_bytes, t.input_tokens, t.output_tokens,
+            t.parse_strategy, int(t.success), t.created_at.isoformat(),
+        )
+        for p in posts
+        for t in p.telemetry
+    ])
+
+
+def update_post_fields(post_id: str, **fields) -> bool:
+    """Actualiza solo las columnas indicadas de un post (ej: status durante el proceso).
+
+    El analisis no se actualiza por aqui (usar save_posts) para que las tablas
+    derivadas no queden desincronizadas. Retorna False si el post no existe.
+    """
+    invalid = set(fields) - (set(_POST_COLUMNS[1:]) - _DERIVED_COLUMNS)
+    if invalid:
+        raise ValueError(f"Columnas no validas: {', '.join(sorted(invalid))}")
+    if not fields:
+        return True
+
+    values = [v.value if hasattr(v, "value") else v for v in fields.values()]
+    assignments = ", ".join(f"{c} = ?" for c in fields)
+    conn = _get_connection()
+    with conn:
+        cursor = conn.execute(
+            f"UPDATE posts SET {assignments} WHERE post_id = ?", (*values, post_id)
+        )
+    return cursor.rowcount > 0
+
+
+def update_post_status(post_id: str, status: ComplianceStatus, error_message: Optional[str] = None) -> bool:
+    """Atajo para cambiar el estado de un post sin reescribir el resto de la fila."""
+    if error_message is None:
+        return update_post_fields(post_id, status=status)
+    return update_post_fields(post_id, status=status, error_message=error_message)
+
+
+_SORTABLE_COLUMNS = {"created_at", "platform", "status", "url"}
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    if isinstance(value, (str, Enum)):
+        return [value]
+    return list(value)
+
+
+def _add_match(column: str, value, clauses: list, params: list):
+    """Agrega `column = ?` o `column IN (...)` segun se reciba un valor o una lista."""
+    values = [v.value if isinstance(v, Enum) else v for v in _as_list(value)]
+    if len(values) == 1:
+        clauses.append(f"{column} = ?")
+        params.extend(values)
+    elif values:
+        clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+        params.extend(values)
+
+
+def _summary_where(
+    keys: set[str],
+    platform=None,
+    status=None,
+    batch_id=None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> Optional[tuple[str, list]]:
+    """WHERE sobre una tabla resumen con columnas `keys`.
+
+    Retorna None si los filtros no se pueden responder con ella (filtro por una
+    columna que no tiene, o fechas con hora); en ese caso se consulta posts.
+    """
+    if isinstance(date_from, datetime) or isinstance(date_to, datetime):
+        return None
+    clauses, params = [], []
+    for column, value in (("platform", platform), ("status", status), ("batch_id", batch_id)):
+        if _as_list(value) and column not in keys:
+            return None
+        _add_match(column, value, clauses, params)
+    if date_from is not None:
+        clauses.append("day >= ?")
+        params.append(date_from.isoformat())
+    if date_to is not None:
+        clauses.append("day <= ?")
+        params.append(date_to.isoformat())
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+_COUNTS_KEYS = {"batch_id", "platform", "status"}
+_CHILD_SUMMARY_KEYS = {"batch_id"}
+
+
+def _build_where(
+    platform=None,
+    status=None,
+    batch_id=None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> tuple[str, list]:
+    """Construye la clausula WHERE para los filtros de posts.
+
+    `platform`, `status` y `batch_id` aceptan un valor o una lista de valores.
+    `date_to` es inclusiva: una fecha sin hora incluye todo ese dia.
+    """
+    clauses, params = [], []
+    for column, value in (("platform", platform), ("status", status), ("batch_id", batch_id)):
+        _add_match(column, value, clauses, params)
+    if date_from is not None:
+        clauses.append("created_at >= ?")
+        params.append(date_from.isoformat())
+    if date_to is not None:
+        if not isinstance(date_to, datetime):
+            date_to = datetime.combine(date_to + timedelta(days=1), datetime.min.time())
+            clauses.append("created_at < ?")
         else:
-            rows = conn.execute(
-                "SELECT * FROM posts ORDER BY created_at DESC"
-            ).fetchall()
-        return [_row_to_post(row) for row in rows]
-    finally:
-        conn.close()
+            clauses.append("created_at <= ?")
+        params.append(date_to.isoformat())
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def _select_list(columns: Optional[Iterable[str]]) -> str:
+    """Lista de columnas para SELECT (todas si es None). post_id siempre se incluye."""
+    if columns is None:
+        return ", ".join(_POST_COLUMNS)
+    columns = list(columns)
+    invalid = set(columns) - set(_POST_COLUMNS)
+    if invalid:
+        raise ValueError(f"Columnas no validas: {', '.join(sorted(invalid))}")
+    if "post_id" not in columns:
+        columns.insert(0, "post_id")
+    return ", ".join(columns)
+
+
+def _posts_sql(
+    select: str,
+    platform=None,
+    status=None,
+    batch_id=None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    order_by: str = "created_at",
+    descending: bool = True,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> tuple[str, list]:
+    if order_by not in _SORTABLE_COLUMNS:
+        raise ValueError(f"No se puede ordenar por '{order_by}'")
+    where, params = _build_where(platform, status, batch_id, date_from, date_to)
+    direction = "DESC" if descending else "ASC"
+    sql = f"SELECT {select} FROM posts {where} ORDER BY {order_by} {direction}, post_id {direction}"
+    if limit is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+    return sql, params
+
+
+def _tuple_cursor(sql: str, params: list) -> sqlite3.Cursor:
+    """Cursor que retorna tuplas simples (sin el costo de sqlite3.Row)."""
+    cursor = _get_connection().cursor()
+    cursor.row_factory = None
+    return cursor.execute(sql, params)
+
+
+def _records(cursor: sqlite3.Cursor) -> list[PostRecord]:
+    return PostRecord.from_rows([d[0] for d in cursor.description], cursor)
+
+
+def query_posts(**query) -> list[PostResult]:
+    """Posts filtrados, ordenados y limitados en SQL (usa los indices de posts).
+
+    Acepta platform, status, batch_id, date_from, date_to, order_by, descending,
+    limit y offset. Valida cada fila con pydantic; para listados o conteos
+    usar query_post_records o query_post_columns.
+    """
+    sql, params = _posts_sql("*", **query)
+    rows = _get_connection().execute(sql, params).fetchall()
+    return [_row_to_post(row) for row in rows]
+
+
+def query_post_records(columns: Optional[Iterable[str]] = None, **query) -> list[PostRecord]:
+    """Como query_posts, pero retorna PostRecord livianos con solo `columns`.
+
+    El analisis (columna analysis_json) se decodifica al acceder a record.analysis.
+    """
+    return _records(_tuple_cursor(*_posts_sql(_select_list(columns), **query)))
+
+
+def iter_post_records(
+    columns: Optional[Iterable[str]] = None, chunk_size: int = 1000, **query
+) -> Iterator[list[PostRecord]]:
+    """Como query_post_records, pero en bloques de `chunk_size` (memoria constante para exportar)."""
+    cursor = _tuple_cursor(*_posts_sql(_select_list(columns), **query))
+    names = [d[0] for d in cursor.description]
+    while rows := cursor.fetchmany(chunk_size):
+        yield PostRecord.from_rows(names, rows)
+
+
+def iter_post_errors(chunk_size: int = 1000, **filters) -> Iterator[list[tuple]]:
+    """Errores de analisis como (url, plataforma, tipo, descripcion), en bloques.
+
+    Mismo orden que los posts (mas recientes primero) y, dentro de cada post,
+    primero los de diseno. Acepta los filtros de count_posts.
+    """
+    where, params = _build_where(**filters)
+    cursor = _tuple_cursor(f"""
+        SELECT p.url, p.platform, e.kind, e.description
+        FROM (SELECT post_id, url, platform, created_at FROM posts {where}) AS p
+        JOIN post_errors AS e ON e.post_id = p.post_id
+        ORDER BY p.created_at DESC, p.post_id DESC, e.kind = 'comun', e.id
+    """, params)
+    while rows := cursor.fetchmany(chunk_size):
+        yield rows
+
+
+def query_post_columns(columns: Iterable[str], **query) -> dict[str, list]:
+    """Resultado en formato columnar: {'status': [...], 'platform': [...], ...}.
+
+    Los valores quedan tal cual estan en la DB (strings, sin convertir a enums).
+    """
+    cursor = _tuple_cursor(*_posts_sql(_select_list(columns), **query))
+    names = [d[0] for d in cursor.description]
+    rows = cursor.fetchall()
+    if not rows:
+        return {name: [] for name in names}
+    return {name: list(values) for name, values in zip(names, zip(*rows))}
+
+
+def get_posts_page(
+    page_size: int = 50,
+    cursor: Optional[tuple[str, str]] = None,
+    records: bool = False,
+    **filters,
+) -> tuple[list, Optional[tuple[str, str]]]:
+    """Una pagina de posts (mas recientes primero) con paginacion por keyset.
+
+    `cursor` es el (created_at, post_id) del ultimo post de la pagina anterior.
+    Retorna (posts, cursor_siguiente); el cursor es None en la ultima pagina.
+    A diferencia de OFFSET, el costo no crece con el numero de pagina.
+    Con `records=True` retorna PostRecord en vez de PostResult.
+    """
+    where, params = _build_where(**filters)
+    if cursor is not None:
+        where += (" AND " if where else "WHERE ") + "(created_at, post_id) < (?, ?)"
+        params += list(cursor)
+    sql = f"SELECT * FROM posts {where} ORDER BY created_at DESC, post_id DESC LIMIT ?"
+    params.append(page_size + 1)
+    if records:
+        posts = _records(_tuple_cursor(sql, params))
+    else:
+        posts = [_row_to_post(row) for row in _get_connection().execute(sql, params)]
+    next_cursor = None
+    if len(posts) > page_size:
+        posts = posts[:page_size]
+        last = posts[-1]
+        next_cursor = (last.created_at.isoformat(), last.post_id)
+    return posts, next_cursor
+
+
+def _count_rows(group_by: list[str], measure: str = "posts", **filters) -> list[tuple]:
+    """Conteo de posts agrupado por `group_by` (columnas de posts): [(*grupo, n)].
+
+    Usa summary_counts cuando los filtros lo permiten; si no, cuenta sobre posts.
+    `measure` es 'posts' o 'analyzed' (solo posts con analisis).
+    """
+    summary = _summary_where(_COUNTS_KEYS, **filters)
+    if summary is not None:
+        where, params = summary
+        table, count = "summary_counts", f"COALESCE(SUM({measure}), 0)"
+    else:
+        where, params = _build_where(**filters)
+        if measure == "analyzed":
+            where += (" AND " if where else "WHERE ") + "tone_label IS NOT NULL"
+        table, count = "posts", "COUNT(*)"
+    groups = f"GROUP BY {', '.join(group_by)}" if group_by else ""
+    rows = _get_connection().execute(
+        f"SELECT {', '.join(group_by + [count])} FROM {table} {where} {groups}", params
+    ).fetchall()
+    return [tuple(row) for row in rows if row[-1] > 0 or not group_by]
+
+
+def count_posts(**filters) -> int:
+    """Cantidad de posts que cumplen los filtros (mismos argumentos que query_posts)."""
+    return _count_rows([], **filters)[0][0]
+
+
+def count_posts_by_status(**filters) -> dict[str, int]:
+    """Conteo por estado ({'cumple': n, ...})."""
+    return dict(_count_rows(["status"], **filters))
+
+
+def start_batch(batch_id: str, url_count: int, model: str, config: ComplianceConfig):
+    """Registra un batch al iniciar el procesamiento, con la configuracion usada."""
+    conn = _get_connection()
+    with conn:
+        conn.execute("""
+            INSERT OR REPLACE INTO batches (batch_id, started_at, url_count, model, config_json)
+            VALUES (?, ?, ?, ?, ?)
+        """, (batch_id, datetime.now().isoformat(), url_count, model, config.model_dump_json()))
+
+
+def finish_batch(batch_id: str):
+    conn = _get_connection()
+    with conn:
+        conn.execute(
+            "UPDATE batches SET finished_at = ? WHERE batch_id = ?",
+            (datetime.now().isoformat(), batch_id),
+        )
+
+
+def set_batch_pinned(batch_id: str, pinned: bool):
+    """Un batch fijado nunca se elimina por la politica de retencion."""
+    conn = _get_connection()
+    with conn:
+        conn.execute("UPDATE batches SET pinned = ? WHERE batch_id = ?", (int(pinned), batch_id))
+
+
+def list_batches() -> list[dict]:
+    """Batches registrados, del mas reciente al mas antiguo, con su cantidad de posts."""
+    rows = _get_connection().execute("""
+        SELECT b.batch_id, b.started_at, b.finished_at, b.url_count, b.model, b.pinned,
+               COALESCE(c.posts, 0) AS posts
+        FROM batches AS b
+        LEFT JOIN (
+            SELECT batch_id, SUM(posts) AS posts FROM summary_counts GROUP BY batch_id
+        ) AS c ON c.batch_id = b.batch_id
+        ORDER BY b.started_at DESC
+    """).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _joined_where(**filters) -> tuple[str, str, list]:
+    """JOIN con posts (solo si hay filtros) y clausula WHERE para tablas hijas."""
+    where, params = _build_where(**filters)
+    join = "JOIN posts ON posts.post_id = child.post_id" if where else ""
+    return join, where, params
+
+
+def get_top_errors(limit: int = 10, kind: Optional[str] = None, **filters) -> list[tuple[str, int]]:
+    """Errores mas frecuentes [(descripcion, veces)] de diseno y/o comunes."""
+    summary = _summary_where(_CHILD_SUMMARY_KEYS, **filters)
+    if summary is not None:
+        where, params = summary
+        if kind:
+            where += (" AND " if where else "WHERE ") + "kind = ?"
+            params.append(kind)
+        rows = _get_connection().execute(f"""
+            SELECT description, SUM(occurrences) AS n
+            FROM summary_errors {where}
+            GROUP BY description
+            HAVING n > 0
+            ORDER BY n DESC, description
+            LIMIT ?
+        """, params + [limit]).fetchall()
+        return [(row["description"], row["n"]) for row in rows]
+
+    join, where, params = _joined_where(**filters)
+    if kind:
+        where += (" AND " if where else "WHERE ") + "child.kind = ?"
+        params.append(kind)
+    rows = _get_connection().execute(f"""
+        SELECT child.description AS description, COUNT(*) AS n
+        FROM post_errors AS child {join} {where}
+        GROUP BY child.description
+        ORDER BY n DESC, child.description
+        LIMIT ?
+    """, params + [limit]).fetchall()
+    return [(row["description"], row["n"]) for row in rows]
+
+
+def get_hashtag_usage(hashtags: list[str], **filters) -> dict[str, int]:
+    """Cantidad de posts donde se encontro cada hashtag (sin distinguir mayusculas ni '#')."""
+    if not hashtags:
+        return {}
+    keys = sorted({hashtag_key(h) for h in hashtags})
+    placeholders = ", ".join("?" for _ in keys)
+    summary = _summary_where(_CHILD_SUMMARY_KEYS, **filters)
+    if summary is not None:
+        where, params = summary
+        where += (" AND " if where else "WHERE ") + f"present = 1 AND hashtag IN ({placeholders})"
+        rows = _get_connection().execute(f"""
+            SELECT hashtag, SUM(posts) AS n FROM summary_hashtags {where} GROUP BY hashtag
+        """, params + keys).fetchall()
+    else:
+        join, where, params = _joined_where(**filters)
+        where += (" AND " if where else "WHERE ") + f"child.present = 1 AND child.hashtag IN ({placeholders})"
+        rows = _get_connection().execute(f"""
+            SELECT child.hashtag AS hashtag, COUNT(DISTINCT child.post_id) AS n
+            FROM post_hashtags AS child {join} {where}
+            GROUP BY child.hashtag
+        """, params + keys).fetchall()
+    counts = {row["hashtag"]: row["n"] for row in rows}
+    return {h: counts.get(hashtag_key(h), 0) for h in hashtags}
+
+
+def count_analyzed_posts(**filters) -> int:
+    """Cantidad de posts con analisis guardado."""
+    return _count_rows([], measure="analyzed", **filters)[0][0]
+
+
+def count_posts_by_platform(**filters) -> dict[str, dict[str, int]]:
+    """Conteo por plataforma y estado ({'instagram': {'cumple': n, ...}})."""
+    counts: dict[str, dict[str, int]] = {}
+    for platform, status, n in _count_rows(["platform", "status"], **filters):
+        counts.setdefault(platform, {})[status] = n
+    return counts
+
+
+def get_compliance_summary(hashtags: list[str], top_errors: int = 10, **filters) -> ComplianceSummary:
+    """Estadisticas para graficos y reportes, desde las tablas resumen cuando los filtros lo permiten.
+
+    `hashtags` son los obligatorios cuyo uso se cuenta; con `top_errors=0` no se consultan errores.
+    """
+    by_platform = count_posts_by_platform(**filters)
+    by_status: dict[str, int] = {}
+    for counts in by_platform.values():
+        for status, n in counts.items():
+            by_status[status] = by_status.get(status, 0) + n
+    return ComplianceSummary(
+        total=sum(by_status.values()),
+        analyzed=count_analyzed_posts(**filters),
+        by_status=by_status,
+        by_platform=by_platform,
+        top_errors=get_top_errors(limit=top_errors, **filters) if top_errors else [],
+        hashtag_usage=get_hashtag_usage(hashtags, **filters),
+    )
+
+
+def get_status_rollup(by: str = "batch", **filters) -> list[dict]:
+    """Conteo por estado de cada batch (`by='batch'`) o dia (`by='day'`).
+
+    Retorna [{'grupo': ..., 'total': n, 'cumple': n, ...}] del mas reciente al mas antiguo.
+    """
+    column = {"batch": "batch_id", "day": "day"}[by]
+    summary = _summary_where(_COUNTS_KEYS, **filters)
+    if summary is None:
+        raise ValueError("El rollup solo admite filtros por dia (sin hora)")
+    where, params = summary
+    rows = _get_connection().execute(f"""
+        SELECT {column} AS grupo, MIN(day) AS desde, status, SUM(posts) AS n
+        FROM summary_counts {where}
+        GROUP BY {column}, status
+    """, params).fetchall()
+    rollup: dict[str, dict] = {}
+    for row in rows:
+        if row["n"] <= 0:
+            continue
+        entry = rollup.setdefault(row["grupo"], {"grupo": row["grupo"], "desde": row["desde"], "total": 0})
+        entry["desde"] = min(entry["desde"], row["desde"])
+        entry[row["status"]] = row["n"]
+        entry["total"] += row["n"]
+    return sorted(rollup.values(), key=lambda r: (r["desde"], r["grupo"]), reverse=True)
+
+
+def get_all_posts(batch_id: Optional[str] = None) -> list[PostResult]:
+    return query_posts(batch_id=batch_id or None)
 
 
 def get_post(post_id: str) -> Optional[PostResult]:
     conn = _get_connection()
-    try:
-        row = conn.execute(
-            "SELECT * FROM posts WHERE post_id = ?", (post_id,)
-        ).fetchone()
-        if row:
-            return _row_to_post(row)
-        return None
-    finally:
-        conn.close()
+    row = conn.execute(
+        "SELECT * FROM posts WHERE post_id = ?", (post_id,)
+    ).fetchone()
+    if row:
+        return _row_to_post(row)
+    return None
+
+
+def get_posts(post_ids: Iterable[str], chunk_size: int = 500) -> list[PostResult]:
+    """Posts con los ids indicados (los que no existen se omiten)."""
+    conn = _get_connection()
+    post_ids = list(post_ids)
+    posts = []
+    for start in range(0, len(post_ids), chunk_size):
+        chunk = post_ids[start:start + chunk_size]
+        rows = conn.execute(
+            f"SELECT * FROM posts WHERE post_id IN ({', '.join('?' for _ in chunk)})", chunk
+        ).fetchall()
+        posts.extend(_row_to_post(row) for row in rows)
+    return posts
+
+
+def _remove_files(paths: Iterable[str]) -> int:
+    """Borra los archivos indicados (ignora vacios y los que ya no existen)."""
+    removed = 0
+    for path in paths:
+        if path:
+            try:
+                Path(path).unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+def _delete_posts_where(conn: sqlite3.Connection, where: str, params: tuple = ()) -> tuple[int, list[str]]:
+    """Borra los posts que cumplen `where` con sus filas hijas y telemetria.
+
+    Las hijas se borran antes que el post para que los triggers de las tablas
+    resumen encuentren su batch y dia. Retorna (posts borrados, rutas de imagen
+    que ya no referencia ningun post); los blobs se comparten entre posts identicos.
+    """
+    files = {
+        path
+        for row in conn.execute(f"SELECT screenshot_path, thumbnail_path FROM posts {where}", params)
+        for path in row
+        if path
+    }
+    subquery = f"SELECT post_id FROM posts {where}"
+    for table in ("post_hashtags", "post_errors", "analysis_telemetry"):
+        conn.execute(f"DELETE FROM {table} WHERE post_id IN ({subquery})", params)
+    cursor = conn.execute(f"DELETE FROM posts {where}", params)
+    released = [
+        path for path in sorted(files)
+        if conn.execute("""
+            SELECT NOT EXISTS (SELECT 1 FROM posts WHERE screenshot_path = ?)
+               AND NOT EXISTS (SELECT 1 FROM posts WHERE thumbnail_path = ?)
+        """, (path, path)).fetchone()[0]
+    ]
+    return cursor.rowcount, released
 
 
 def delete_post(post_id: str):
+    """Elimina un post, sus filas derivadas y sus imagenes."""
     conn = _get_connection()
-    try:
-        conn.execute("DELETE FROM posts WHERE post_id = ?", (post_id,))
-        conn.commit()
-    finally:
-        conn.close()
+    with conn:
+        _, files = _delete_posts_where(conn, "WHERE post_id = ?", (post_id,))
+    _remove_files(files)
+
+
+def delete_batches(batch_ids: list[str]) -> int:
+    """Elimina batches completos (posts, consumo, telemetria e imagenes). Retorna posts borrados."""
+    conn = _get_connection()
+    deleted = 0
+    for batch_id in batch_ids:
+        with conn:
+            count, files = _delete_posts_where(conn, "WHERE batch_id = ?", (batch_id,))
+            conn.execute("DELETE FROM analysis_telemetry WHERE batch_id = ?", (batch_id,))
+            conn.execute("DELETE FROM batch_usage WHERE batch_id = ?", (batch_id,))
+            conn.execute("DELETE FROM batches WHERE batch_id = ?", (batch_id,))
+        deleted += count
+        _remove_files(files)
+    return deleted
+
+
+# --- Tendencias ---
+def _record_batch_trends(conn: sqlite3.Connection, batch_ids: list[str]):
+    for batch_id in batch_ids:
+        with conn:
+            conn.execute("DELETE FROM trend_counts WHERE batch_id = ?", (batch_id,))
+            conn.execute("DELETE FROM trend_hashtags WHERE batch_id = ?", (batch_id,))
+            conn.execute("""
+                INSERT INTO trend_counts
+                (batch_id, day, platform, posts, cumple, no_cumple, errores, analyzed)
+                SELECT batch_id, day, platform, SUM(posts),
+                       SUM(CASE WHEN status = 'cumple' THEN posts ELSE 0 END),
+                       SUM(CASE WHEN status = 'no-cumple' THEN posts ELSE 0 END),
+                       SUM(CASE WHEN status = 'error' THEN posts ELSE 0 END),
+                       SUM(analyzed)
+                FROM summary_counts WHERE batch_id = ?
+                GROUP BY day, platform
+                HAVING SUM(posts) > 0
+            """, (batch_id,))
+            # post_hashtags ya guarda hashtag_key; ltrim por si quedan filas sin migrar
+            conn.execute("""
+                INSERT INTO trend_hashtags (batch_id, day, platform, hashtag, posts)
+                SELECT p.batch_id, substr(p.created_at, 1, 10), p.platform,
+                       ltrim(trim(h.hashtag), '#'), COUNT(DISTINCT p.post_id)
+                FROM posts AS p JOIN post_hashtags AS h ON h.post_id = p.post_id
+                WHERE p.batch_id = ? AND h.present = 1
+                GROUP BY 2, 3, 4
+            """, (batch_id,))
+
+
+def record_batch_trends(batch_ids: Iterable[str]):
+    """Registra (o reemplaza) el aporte de los batches a las series de tendencia.
+
+    Se llama al terminar un batch y cuando sus posts se re-evaluan. Los aportes de
+    batches ya eliminados por la retencion se conservan.
+    """
+    _record_batch_trends(_get_connection(), [b for b in dict.fromkeys(batch_ids) if b])
+
+
+_TREND_PERIODS = {
+    "day": "day",
+    # Lunes de la semana del dia
+    "week": "date(day, '-6 days', 'weekday 1')",
+}
+
+
+def _trend_where(date_from: Optional[date], date_to: Optional[date], platform=None) -> tuple[str, list]:
+    clauses, params = [], []
+    _add_match("platform", platform, clauses, params)
+    if date_from is not None:
+        clauses.append("day >= ?")
+        params.append(date_from.isoformat())
+    if date_to is not None:
+        clauses.append("day <= ?")
+        params.append(date_to.isoformat())
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def get_compliance_trend(
+    granularity: str = "day",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    platform=None,
+    by_platform: bool = False,
+) -> list[dict]:
+    """Serie de cumplimiento por dia o semana (opcionalmente por plataforma).
+
+    `tasa` es cumple / (cumple + no cumple); los errores no cuentan.
+    """
+    period = _TREND_PERIODS[granularity]
+    where, params = _trend_where(date_from, date_to, platform)
+    group = "periodo, platform" if by_platform else "periodo"
+    select_platform = "platform" if by_platform else "'todas'"
+    rows = _get_connection().execute(f"""
+        SELECT {period} AS periodo, {select_platform} AS plataforma,
+               SUM(posts) AS posts, SUM(cumple) AS cumple, SUM(no_cumple) AS no_cumple,
+               SUM(errores) AS errores, SUM(analyzed) AS analizados
+        FROM trend_counts {where}
+        GROUP BY {group}
+        ORDER BY periodo
+    """, params).fetchall()
+    trend = []
+    for row in rows:
+        entry = dict(row)
+        evaluated = entry["cumple"] + entry["no_cumple"]
+        entry["tasa"] = entry["cumple"] / evaluated if evaluated else None
+        trend.append(entry)
+    return trend
+
+
+def get_hashtag_trend(
+    hashtags: list[str],
+    granularity: str = "day",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    platform=None,
+) -> list[dict]:
+    """Uso de cada hashtag por periodo: posts donde se encontro / posts analizados.
+
+    Los hashtags se comparan por hashtag_key (sin '#' ni mayusculas).
+    """
+    if not hashtags:
+        return []
+    period = _TREND_PERIODS[granularity]
+    where, params = _trend_where(date_from, date_to, platform)
+    analyzed = {
+        row["periodo"]: row["n"]
+        for row in _get_connection().execute(f"""
+            SELECT {period} AS periodo, SUM(analyzed) AS n FROM trend_counts {where} GROUP BY periodo
+        """, params)
+    }
+    keys = {hashtag_key(h): h for h in hashtags}
+    where += (" AND " if where else "WHERE ") + f"hashtag IN ({', '.join('?' for _ in keys)})"
+    rows = _get_connection().execute(f"""
+        SELECT {period} AS periodo, hashtag, SUM(posts) AS n
+        FROM trend_hashtags {where}
+        GROUP BY periodo, hashtag
+    """, params + list(keys)).fetchall()
+    found = {(row["periodo"], row["hashtag"]): row["n"] for row in rows}
+    return [
+        {
+            "periodo": periodo,
+            "hashtag": original,
+            "posts": found.get((periodo, key), 0),
+            "analizados": total,
+            "tasa": found.get((periodo, key), 0) / total if total else None,
+        }
+        for periodo, total in sorted(analyzed.items())
+        for key, original in keys.items()
+    ]
+
+
+def expired_batches(retention_days: int = 0, max_batches: int = 0) -> list[str]:
+    """Batches no fijados que exceden la retencion (0 = sin limite).
+
+    Vencen los iniciados hace mas de `retention_days` dias y los que quedan fuera
+    de los `max_batches` mas recientes (los fijados no cuentan para el limite).
+    """
+    rows = _get_connection().execute(
+        "SELECT batch_id, started_at FROM batches WHERE pinned = 0 ORDER BY started_at DESC"
+    ).fetchall()
+    cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat() if retention_days > 0 else None
+    expired = []
+    for position, row in enumerate(rows):
+        too_old = cutoff is not None and row["started_at"] < cutoff
+        too_many = max_batches > 0 and position >= max_batches
+        if too_old or too_many:
+            expired.append(row["batch_id"])
+    return expired
+
+
+def referenced_image_paths() -> set[str]:
+    """Rutas de screenshots y thumbnails referenciadas por algun post."""
+    cursor = _tuple_cursor("SELECT screenshot_path, thumbnail_path FROM posts", [])
+    return {str(Path(path)) for row in cursor for path in row if path}
+
+
+def incremental_vacuum(max_pages: int = 0) -> int:
+    """Devuelve al sistema paginas libres de la DB (0 = todas). Retorna paginas liberadas."""
+    conn = _get_connection()
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    conn.execute(f"PRAGMA incremental_vacuum({int(max_pages)})").fetchall()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
 
 
 def delete_all_posts():
+    """Elimina todos los posts, batches y tendencias, y sus imagenes."""
     conn = _get_connection()
-    try:
-        conn.execute("DELETE FROM posts")
-        conn.commit()
-    finally:
-        conn.close()
+    with conn:
+        _, files = _delete_posts_where(conn, "")
+        conn.execute("DELETE FROM analysis_telemetry")
+        conn.execute("DELETE FROM batch_usage")
+        conn.execute("DELETE FROM batches")
+        conn.execute("DELETE FROM trend_counts")
+        conn.execute("DELETE FROM trend_hashtags")
+    _remove_files(files)
+
+
+def save_batch_usage(batch_id: str, usage_by_model: dict[str, UsageStats]):
+    """Guarda el consumo de cuota de un batch (una fila por modelo)."""
+    conn = _get_connection()
+    with conn:
+        for model, usage in usage_by_model.items():
+            conn.execute("""
+                INSERT OR REPLACE INTO batch_usage
+                (batch_id, model, requests, input_tokens, output_tokens,
+                 retries, rate_limited, throttled_seconds)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                batch_id, model, usage.requests, usage.input_tokens,
+                usage.output_tokens, usage.retries, usage.rate_limited,
+                usage.throttled_seconds,
+            ))
+
+
+def get_batch_usage(batch_id: Optional[str] = None) -> list[dict]:
+    """Consumo de cuota por batch y modelo."""
+    conn = _get_connection()
+    if batch_id:
+        rows = conn.execute(
+            "SELECT * FROM batch_usage WHERE batch_id = ?", (batch_id,)
+        ).fetchall()
+    else:
+        rows = conn.execute("SELECT * FROM batch_usage").fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_telemetry(batch_id: Optional[str] = None) -> list[dict]:
+    """Telemetria de llamadas de analisis, opcionalmente de un batch."""
+    conn = _get_connection()
+    if batch_id:
+        rows = conn.execute(
+            "SELECT * FROM analysis_telemetry WHERE batch_id = ? ORDER BY created_at",
+            (batch_id,),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT * FROM analysis_telemetry ORDER BY created_at"
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+# Cache de la configuracion por proceso: (version, config). La version es un
+# contador en la tabla config que sube con cada cambio, asi otros procesos
+# (ej: manage.py) tambien invalidan su cache.
+_config_cache: Optional[tuple[int, ComplianceConfig]] = None
+_config_lock = threading.Lock()
+
+_BUMP_VERSION_SQL = """
+    INSERT INTO config (key, value_json) VALUES ('config_version', '1')
+    ON CONFLICT(key) DO UPDATE SET value_json = CAST(value_json AS INTEGER) + 1
+"""
+
+
+def get_config_version() -> int:
+    """Version actual de la configuracion (0 si nunca se guardo).
+
+    Sirve como clave de invalidacion para caches que dependen de la configuracion.
+    """
+    row = _get_connection().execute(
+        "SELECT value_json FROM config WHERE key = 'config_version'"
+    ).fetchone()
+    return int(row["value_json"]) if row else 0
+
+
+def bump_config_version() -> int:
+    """Invalida los caches que dependen de la configuracion (ej: al cambiar los logos)."""
+    conn = _get_connection()
+    with conn:
+        conn.execute(_BUMP_VERSION_SQL)
+    return get_config_version()
 
 
 def save_config(config: ComplianceConfig):
+    global _config_cache
     conn = _get_connection()
-    try:
-        conn.execute(
-            "INSERT OR REPLACE INTO config (key, value_json) VALUES (?, ?)",
-            ("compliance_config", config.model_dump_json()),
-        )
-        conn.commit()
-    finally:
-        conn.close()
+    with _config_lock:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO config (key, value_json) VALUES (?, ?)",
+                ("compliance_config", config.model_dump_json()),
+            )
+            conn.execute(_BUMP_VERSION_SQL)
+        _config_cache = (get_config_version(), config)
 
 
 def load_config() -> ComplianceConfig:
-    conn = _get_connection()
-    try:
-        row = conn.execute(
+    """Configuracion guardada, leida de la DB solo si cambio su version.
+
+    La instancia es compartida: no modificarla (usar model_copy).
+    """
+    global _config_cache
+    version = get_config_version()
+    cached = _config_cache
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with _config_lock:
+        row = _get_connection().execute(
             "SELECT value_json FROM config WHERE key = ?", ("compliance_config",)
         ).fetchone()
-        if row:
-            return ComplianceConfig.model_validate_json(row["value_json"])
-        return ComplianceConfig()
-    finally:
-        conn.close()
+        config = ComplianceConfig.model_validate_json(row["value_json"]) if row else ComplianceConfig()
+        _config_cache = (version, config)
+    return config
 
 
-def _row_to_post(row: sqlite3.Row) -> PostResult:
-    analysis = None
-    if row["analysis_json"]:
-        try:
-            analysis = AnalysisResult.model_validate_json(row["analysis_json"])
-        except Exception:
-            analysis = None
+def config_version_of(config: ComplianceConfig) -> Optional[int]:
+    """Version de `config` si es la instancia retornada por load_config, si no None."""
+    cached = _config_cache
+    if cached is not None and cached[1] is config:
+        return cached[0]
+    return None
 
+
+def _row_to_post(row: sqlite3.Row) -> PostResult:
+    analysis = _parse_analysis(row["analysis_json"])
     return PostResult(
         post_id=row["post_id"],
         url=row["url"],
@@ -0,0 +1,155 @@
+"""Compactacion: retencion de batches, limpieza de imagenes huerfanas y vacuum incremental.
+
+Tambien migra los screenshots del esquema plano (<post_id>.png) al almacen por contenido.
+
+Se ejecuta en segundo plano al terminar cada batch y manualmente desde la pagina
+de Configuracion o con `python manage.py compact`.
+"""
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+import core.database as db
+from config.settings import SCREENSHOTS_DIR, DERIVATIVES_DIR
+from core.models import ComplianceConfig
+from utils import blob_store
+from utils.image_helpers import DERIVATIVES, get_derivative
+
+# Una imagen sin post puede ser de una captura en curso (se guarda antes que el post)
+ORPHAN_GRACE_SECONDS = 3600
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+
+_lock = threading.Lock()
+_last_report: Optional[dict] = None
+
+
+def _image_files(*roots: str):
+    for root in roots:
+        if Path(root).exists():
+            for path in Path(root).rglob("*"):
+                if path.suffix.lower() in IMAGE_SUFFIXES and path.is_file():
+                    yield path
+
+
+def collect_orphan_images(dry_run: bool = False, grace_seconds: float = ORPHAN_GRACE_SECONDS) -> list[str]:
+    """Borra las imagenes de SCREENSHOTS_DIR y DERIVATIVES_DIR que ningun post referencia.
+
+    Los derivados (<nombre>_<kind>.ext) se conservan mientras su original este
+    referenciado. Retorna las rutas borradas.
+    """
+    referenced = db.referenced_image_paths()
+    referenced_shas = {blob_store.blob_sha(p) for p in referenced} - {None}
+    referenced_stems = {(str(Path(p).parent), Path(p).stem) for p in referenced}
+    cutoff = time.time() - grace_seconds
+
+    orphans = []
+    for path in _image_files(SCREENSHOTS_DIR, DERIVATIVES_DIR):
+        source_stem, _, kind = path.stem.rpartition("_")
+        if kind in DERIVATIVES and (
+            blob_store.blob_sha(str(path)) in referenced_shas
+            or (str(path.parent), source_stem) in referenced_stems
+        ):
+            continue
+        if str(path) in referenced or path.stat().st_mtime > cutoff:
+            continue
+        orphans.append(str(path))
+        if not dry_run:
+            path.unlink(missing_ok=True)
+    return orphans
+
+
+def run_compaction(config: ComplianceConfig, dry_run: bool = False) -> dict:
+    """Aplica la retencion, limpia imagenes huerfanas y compacta la DB.
+
+    Con `dry_run` solo informa que se eliminaria.
+    """
+    with _lock:
+        return _run_compaction(config, dry_run)
+
+
+def _run_compaction(config: ComplianceConfig, dry_run: bool = False) -> dict:
+    """Cuerpo de run_compaction; quien llama ya tiene tomado `_lock`."""
+    global _last_report
+    started = time.perf_counter()
+    expired = db.expired_batches(config.retention_days, config.retention_max_batches)
+    report = {
+        "batches_eliminados": len(expired),
+        "posts_eliminados": 0,
+        "imagenes_eliminadas": 0,
+        "paginas_liberadas": 0,
+    }
+    if not dry_run:
+        report["posts_eliminados"] = db.delete_batches(expired)
+    report["imagenes_eliminadas"] = len(collect_orphan_images(dry_run=dry_run))
+    if not dry_run:
+        report["paginas_liberadas"] = db.incremental_vacuum()
+    report["segundos"] = round(time.perf_counter() - started, 2)
+    report["dry_run"] = dry_run
+    _last_report = report
+    return report
+
+
+def start_compaction(config: ComplianceConfig) -> bool:
+    """Lanza la compactacion en un thread de fondo. False si ya hay una en curso."""
+    # El lock se toma aca y lo libera el worker: dos llamadas simultaneas no lanzan dos threads
+    if not _lock.acquire(blocking=False):
+        return False
+
+    def worker():
+        try:
+            _run_compaction(config)
+        finally:
+            _lock.release()
+            db.close_connection()
+
+    try:
+        threading.Thread(target=worker, name="compaction", daemon=True).start()
+    except Exception:
+        _lock.release()
+        raise
+    return True
+
+
+def compaction_status() -> tuple[bool, Optional[dict]]:
+    """(en curso, reporte de la ultima compactacion)."""
+    return _lock.locked(), _last_report
+
+
+def migrate_to_blob_store(dry_run: bool = False) -> dict:
+    """Mueve los screenshots con ruta plana al almacen por contenido.
+
+    Los posts se re-apuntan al blob (y a su thumbnail) y los archivos viejos se
+    borran cuando ningun post los referencia. Capturas identicas quedan en un solo blob.
+    """
+    with _lock:
+        columns = db.query_post_columns(["post_id", "screenshot_path", "thumbnail_path"])
+        report = {"posts_migrados": 0, "duplicados": 0, "sin_archivo": 0, "archivos_eliminados": 0}
+        old_files, seen = set(), set()
+        for post_id, screenshot, thumbnail in zip(
+            columns["post_id"], columns["screenshot_path"], columns["thumbnail_path"]
+        ):
+            if not screenshot or blob_store.blob_sha(screenshot):
+                continue
+            src = Path(screenshot)
+            if not src.is_file():
+                report["sin_archivo"] += 1
+                continue
+            report["posts_migrados"] += 1
+            data = src.read_bytes()
+            sha = blob_store.content_hash(data)
+            if sha in seen or blob_store.blob_path(sha, src.suffix).exists():
+                report["duplicados"] += 1
+            seen.add(sha)
+            if dry_run:
+                continue
+            path = blob_store.put(data, src.suffix)
+            db.update_post_fields(post_id, screenshot_path=path, thumbnail_path=get_derivative(path, "grid"))
+            old_files.update(p for p in (screenshot, thumbnail) if p)
+
+        referenced = db.referenced_image_paths()
+        for path in old_files:
+            if str(Path(path)) not in referenced:
+                Path(path).unlink(missing_ok=True)
+                report["archivos_eliminados"] += 1
+        report["dry_run"] = dry_run
+        return report
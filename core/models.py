@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from datetime import datetime
 from enum import Enum
@@ -19,18 +19,46 @@ class ComplianceStatus(str, Enum):
     ERROR = "error"
 
 
+class LogoMatch(BaseModel):
+    logo_name: str = ""
+    present: bool = False
+    score: float = 0.0
+    x: int = 0
+    y: int = 0
+    width: int = 0
+    height: int = 0
+
+
 class AnalysisResult(BaseModel):
     hashtags_present: list[str] = []
     hashtags_missing: list[str] = []
     emotional_score: float = 0.0
     tone_label: str = "informativo"
     brand_identity: bool = False
+    ai_brand_identity: bool = False
+    logo_match: Optional[LogoMatch] = None
     design_errors: list[str] = []
     common_errors: list[str] = []
     suggested_corrections: list[str] = []
+    confidence: float = 0.0
+    analyzed_by: str = ""
+    model_fingerprint: str = ""
+    local_fingerprint: str = ""
     raw_ai_response: str = ""
 
 
+class AnalysisTelemetry(BaseModel):
+    backend: str = ""
+    model: str = ""
+    latency_ms: float = 0.0
+    payload_bytes: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    parse_strategy: str = ""
+    success: bool = False
+    created_at: datetime = datetime.now()
+
+
 class PostResult(BaseModel):
     post_id: str
     url: str
@@ -43,6 +71,120 @@ class PostResult(BaseModel):
     created_at: datetime = datetime.now()
     error_message: str = ""
     batch_id: str = ""
+    telemetry: list[AnalysisTelemetry] = []
+
+
+class PostRecord:
+    """Vista liviana de una fila de posts, sin validacion de pydantic.
+
+    Solo tiene las columnas que se consultaron (ver query_post_records); el
+    analisis se decodifica recien cuando se accede a `analysis`.
+    Para obtener el modelo completo usar to_post().
+    """
+
+    __slots__ = (
+        "post_id", "url", "platform", "status", "extracted_text", "screenshot_path",
+        "thumbnail_path", "created_at", "error_message", "batch_id",
+        "brand_identity", "tone_label", "emotional_score", "_analysis_json", "_analysis",
+    )
+
+    # Busqueda directa en el mapa del enum: mucho mas barata que Platform(value)
+    _CONVERTERS = {
+        "platform": Platform._value2member_map_.__getitem__,
+        "status": ComplianceStatus._value2member_map_.__getitem__,
+        "created_at": datetime.fromisoformat,
+    }
+
+    def __init__(self, **values):
+        for name, value in values.items():
+            if name == "analysis_json":
+                name = "_analysis_json"
+            elif value is not None and name in self._CONVERTERS:
+                value = self._CONVERTERS[name](value)
+            setattr(self, name, value)
+
+    @classmethod
+    def from_rows(cls, names: list[str], rows) -> list["PostRecord"]:
+        """Construye records desde tuplas con las columnas `names` (orden del SELECT)."""
+        slots = ["_analysis_json" if n == "analysis_json" else n for n in names]
+        converters = [cls._CONVERTERS.get(n) for n in names]
+        fields = list(zip(slots, converters))
+        records = []
+        for row in rows:
+            record = cls.__new__(cls)
+            for (slot, converter), value in zip(fields, row):
+                setattr(record, slot, converter(value) if converter and value is not None else value)
+            records.append(record)
+        return records
+
+    @property
+    def analysis(self) -> Optional[AnalysisResult]:
+        try:
+            return self._analysis
+        except AttributeError:
+            pass
+        self._analysis = None
+        if self._analysis_json:
+            try:
+                self._analysis = AnalysisResult.model_validate_json(self._analysis_json)
+            except Exception:
+                pass
+        return self._analysis
+
+    def to_post(self) -> PostResult:
+        """PostResult completo (requiere haber consultado todas las columnas)."""
+        return PostResult(
+            post_id=self.post_id,
+            url=self.url,
+            platform=self.platform,
+            status=self.status,
+            extracted_text=self.extracted_text,
+            screenshot_path=self.screenshot_path,
+            thumbnail_path=self.thumbnail_path,
+            analysis=self.analysis,
+            created_at=self.created_at,
+            error_message=self.error_message,
+            batch_id=self.batch_id,
+        )
+
+
+class UsageStats(BaseModel):
+    requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    throttled_seconds: float = 0.0
+
+
+class VisionResponse(BaseModel):
+    text: str = ""
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+class ComplianceSummary(BaseModel):
+    """Estadisticas de cumplimiento de un conjunto de posts.
+
+    Se calcula una vez (core.database.get_compliance_summary desde las tablas
+    resumen, o reports.summary.summarize_posts sobre posts en memoria) y la
+    consumen graficos, PDF, Excel y paginas. Inmutable.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    total: int = 0
+    analyzed: int = 0
+    by_status: dict[str, int] = {}
+    by_platform: dict[str, dict[str, int]] = {}
+    top_errors: list[tuple[str, int]] = []
+    hashtag_usage: dict[str, int] = {}
+
+    def count(self, status: "ComplianceStatus") -> int:
+        return self.by_status.get(status.value, 0)
+
+    def share(self, status: "ComplianceStatus") -> float:
+        """Fraccion del total con ese estado (0 si no hay posts)."""
+        return self.count(status) / self.total if self.total else 0.0
 
 
 class AIBackend(str, Enum):
@@ -50,6 +192,11 @@ class AIBackend(str, Enum):
     OLLAMA = "ollama"
 
 
+class OllamaEndpoint(BaseModel):
+    url: str
+    max_concurrent: int = 1
+
+
 class ComplianceConfig(BaseModel):
     required_hashtags: list[str] = []
     emotional_keywords: list[str] = []
@@ -58,4 +205,21 @@ class ComplianceConfig(BaseModel):
     ai_backend: AIBackend = AIBackend.GEMINI
     ollama_model: str = "llama3.2-vision"
     ollama_url: str = "http://localhost:11434"
+    ollama_max_concurrent: int = 1
+    ollama_extra_endpoints: list[OllamaEndpoint] = []
     gemini_model: str = "gemini-2.0-flash"
+    gemini_rpm: int = 15
+    gemini_tpm: int = 1_000_000
+    gemini_max_retries: int = 5
+    # Cascada: un modelo rapido evalua primero y solo escala los casos dudosos
+    cascade_enabled: bool = False
+    cascade_fast_backend: AIBackend = AIBackend.OLLAMA
+    cascade_fast_model: str = "moondream"
+    cascade_confidence_threshold: float = 0.75
+    cascade_escalate_no_cumple: bool = False
+    # Deteccion local del logo oficial (reemplaza el criterio del modelo)
+    logo_detection_enabled: bool = True
+    logo_match_threshold: float = 0.7
+    # Retencion de batches (0 = sin limite); los batches fijados nunca se eliminan
+    retention_days: int = 0
+    retention_max_batches: int = 0
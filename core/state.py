@@ -14,3 +14,33 @@ def init_session_state():
     for key, value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = value
+
+
+def page_cursor(key: str, filters: dict):
+    """Cursor de la pagina actual del paginador `key`.
+
+    Si cambian los filtros se vuelve a la primera pagina.
+    """
+    pager = st.session_state.setdefault(key, {"filters": None, "cursors": []})
+    if pager["filters"] != filters:
+        pager["filters"] = filters
+        pager["cursors"] = []
+    return pager["cursors"][-1] if pager["cursors"] else None
+
+
+def page_controls(key: str, next_cursor, shown: int):
+    """Botones Anterior/Siguiente del paginador `key` (pila de cursores en session_state)."""
+    pager = st.session_state[key]
+    page = len(pager["cursors"]) + 1
+
+    col_prev, col_info, col_next = st.columns([1, 3, 1])
+    with col_prev:
+        if st.button("← Anterior", key=f"{key}_prev", disabled=page == 1, use_container_width=True):
+            pager["cursors"].pop()
+            st.rerun()
+    with col_info:
+        st.caption(f"Pagina {page} · {shown} publicaciones")
+    with col_next:
+        if st.button("Siguiente →", key=f"{key}_next", disabled=next_cursor is None, use_container_width=True):
+            pager["cursors"].append(next_cursor)
+            st.rerun()
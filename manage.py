@@ -0,0 +1,112 @@
+"""Tareas de mantenimiento de la base de datos.
+
+Uso:
+    python manage.py check-summaries
+    python manage.py rebuild-summaries
+    python manage.py rebuild-search
+    python manage.py compact [--dry-run]
+    python manage.py record-trends
+    python manage.py migrate-blobs [--dry-run]
+    python manage.py export FORMATO SALIDA [--batch ID] [--status ESTADO] [--platform PLATAFORMA]
+"""
+import argparse
+import sys
+from core.database import (
+    init_db, check_summaries, rebuild_summaries, rebuild_search_index, load_config,
+    list_batches, record_batch_trends,
+)
+from core.maintenance import run_compaction, migrate_to_blob_store
+from reports.bulk_export import EXPORT_FORMATS, export_posts
+
+
+def cmd_check_summaries(args) -> int:
+    differences = check_summaries()
+    for table, count in differences.items():
+        print(f"{table}: {'OK' if count == 0 else f'{count} grupos inconsistentes'}")
+    if any(differences.values()):
+        print("Ejecuta 'python manage.py rebuild-summaries' para recalcularlas.")
+        return 1
+    return 0
+
+
+def cmd_rebuild_summaries(args) -> int:
+    for table, rows in rebuild_summaries().items():
+        print(f"{table}: {rows} filas")
+    return 0
+
+
+def cmd_rebuild_search(args) -> int:
+    print(f"posts_fts: {rebuild_search_index()} posts indexados")
+    return 0
+
+
+def cmd_compact(args) -> int:
+    report = run_compaction(load_config(), dry_run=args.dry_run)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    return 0
+
+
+def cmd_record_trends(args) -> int:
+    batch_ids = [b["batch_id"] for b in list_batches()]
+    record_batch_trends(batch_ids)
+    print(f"Tendencias registradas para {len(batch_ids)} batches")
+    return 0
+
+
+def cmd_migrate_blobs(args) -> int:
+    report = migrate_to_blob_store(dry_run=args.dry_run)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    return 0
+
+
+def cmd_export(args) -> int:
+    filters = {"batch_id": args.batch, "status": args.status, "platform": args.platform}
+    rows = export_posts(args.output, args.format, **{k: v for k, v in filters.items() if v})
+    print(f"{rows} posts exportados a {args.output}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mantenimiento de Social Compliance Monitor")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser(
+        "check-summaries", help="Verifica las tablas resumen contra un recalculo completo"
+    ).set_defaults(func=cmd_check_summaries)
+    commands.add_parser(
+        "rebuild-summaries", help="Recalcula las tablas resumen desde los posts"
+    ).set_defaults(func=cmd_rebuild_summaries)
+    commands.add_parser(
+        "rebuild-search", help="Regenera el indice de busqueda full-text"
+    ).set_defaults(func=cmd_rebuild_search)
+    compact = commands.add_parser(
+        "compact", help="Aplica la retencion, borra imagenes huerfanas y compacta la DB"
+    )
+    compact.add_argument("--dry-run", action="store_true", help="Solo informa que se eliminaria")
+    compact.set_defaults(func=cmd_compact)
+    commands.add_parser(
+        "record-trends",
+        help="Recalcula el aporte de los batches existentes a las tendencias (conserva los eliminados)",
+    ).set_defaults(func=cmd_record_trends)
+    migrate_blobs = commands.add_parser(
+        "migrate-blobs", help="Mueve los screenshots con ruta plana al almacen por contenido"
+    )
+    migrate_blobs.add_argument("--dry-run", action="store_true", help="Solo informa que se migraria")
+    migrate_blobs.set_defaults(func=cmd_migrate_blobs)
+    export = commands.add_parser("export", help="Exporta los posts para BI (CSV, JSON Lines o Parquet)")
+    export.add_argument("format", choices=list(EXPORT_FORMATS))
+    export.add_argument("output", help="Archivo de salida")
+    export.add_argument("--batch", help="Solo los posts de este batch")
+    export.add_argument("--status", help="Solo los posts con este estado (cumple, no-cumple, error, pendiente)")
+    export.add_argument("--platform", help="Solo los posts de esta plataforma")
+    export.set_defaults(func=cmd_export)
+
+    args = parser.parse_args(argv)
+    init_db()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -103,9 +103,15 @@ if st.session_state.url_queue:
 
     # --- Procesamiento ---
     if start_processing:
-        from core.database import init_db, save_post, load_config
+        from core.database import (
+            init_db, save_posts, load_config, save_batch_usage, start_batch, finish_batch,
+            record_batch_trends, update_post_status,
+        )
+        from core.maintenance import start_compaction
         from capture.capture_service import CaptureService
-        from analysis.analyzer import ComplianceAnalyzer, create_vision_client
+        from utils import image_buffers
+        from reports.summary import summarize_posts
+        from analysis.analyzer import create_analyzer, describe_model
         from core.models import ComplianceStatus
 
         init_db()
@@ -115,6 +121,7 @@ if st.session_state.url_queue:
         st.session_state.processing = True
 
         total = len(st.session_state.url_queue)
+        start_batch(batch_id, total, describe_model(config), config)
         progress_bar = st.progress(0, text="Iniciando captura...")
         status_text = st.empty()
 
@@ -129,18 +136,22 @@ if st.session_state.url_queue:
         captured_posts = capture_service.capture_batch(url_list)
         progress_bar.progress(0.5, text="Captura completada. Iniciando analisis...")
 
-        # Asignar batch_id
+        # Asignar batch_id y guardar las capturas (quedan en la DB aunque falle el analisis)
         for post in captured_posts:
             post.batch_id = batch_id
+        save_posts(captured_posts)
 
         # Fase 2: Analisis IA (usa el backend configurado: Gemini o Ollama)
+        analyzer = None
         try:
-            vision_client = create_vision_client(config)
-            backend_name = config.ai_backend.value.capitalize()
-            model_name = config.ollama_model if config.ai_backend.value == "ollama" else config.gemini_model
-            status_text.info(f"Usando {backend_name} ({model_name}) para el analisis...")
-
-            analyzer = ComplianceAnalyzer(vision_client)
+            analyzer = create_analyzer(config)
+            if config.cascade_enabled:
+                status_text.info(
+                    f"Usando cascada: {analyzer.fast.label} primero, "
+                    f"{analyzer.strong.label} para casos dudosos..."
+                )
+            else:
+                status_text.info(f"Usando {describe_model(config)} para el analisis...")
 
             def analysis_progress(pct, msg):
                 progress_bar.progress(0.5 + pct * 0.5, text=msg)
@@ -150,11 +161,25 @@ if st.session_state.url_queue:
             )
         except Exception as e:
             st.warning(f"No se pudo inicializar el motor de IA: {e}. Se omite el analisis.")
+            # Solo cambia el estado de las capturas pendientes: el resto de la fila ya esta guardado
+            for post in captured_posts:
+                if post.status == ComplianceStatus.PENDIENTE:
+                    post.status = ComplianceStatus.ERROR
+                    post.error_message = f"Analisis omitido: {e}"
+                    update_post_status(post.post_id, post.status, post.error_message)
             analyzed_posts = captured_posts
-
-        # Guardar en DB
-        for post in analyzed_posts:
-            save_post(post)
+        else:
+            # Guardar en DB (solo se reescriben las filas que cambiaron)
+            save_posts(analyzed_posts)
+        # Los screenshots del batch ya no se necesitan en memoria
+        image_buffers.discard(p.screenshot_path for p in captured_posts)
+        usage_by_model = analyzer.usage_by_model() if analyzer is not None else {}
+        if usage_by_model:
+            save_batch_usage(batch_id, usage_by_model)
+        finish_batch(batch_id)
+        record_batch_trends([batch_id])
+        # Retencion y limpieza de archivos en segundo plano
+        start_compaction(config)
 
         st.session_state.posts = analyzed_posts
         st.session_state.processing = False
@@ -163,14 +188,22 @@ if st.session_state.url_queue:
         progress_bar.progress(1.0, text="Procesamiento completado")
 
         # Mostrar resumen rapido
-        ok = sum(1 for p in analyzed_posts if p.status == ComplianceStatus.CUMPLE)
-        fail = sum(1 for p in analyzed_posts if p.status == ComplianceStatus.NO_CUMPLE)
-        err = sum(1 for p in analyzed_posts if p.status == ComplianceStatus.ERROR)
+        summary = summarize_posts(analyzed_posts, config.required_hashtags)
         st.success(
-            f"Se procesaron {len(analyzed_posts)} publicaciones: "
-            f"{ok} cumplen, {fail} no cumplen, {err} con error. "
+            f"Se procesaron {summary.total} publicaciones: "
+            f"{summary.count(ComplianceStatus.CUMPLE)} cumplen, "
+            f"{summary.count(ComplianceStatus.NO_CUMPLE)} no cumplen, "
+            f"{summary.count(ComplianceStatus.ERROR)} con error. "
             "Ve al Dashboard o la Galeria para ver los resultados."
         )
+        if analyzer is not None and config.cascade_enabled:
+            st.info(analyzer.stats_summary())
+        for model, usage in usage_by_model.items():
+            st.caption(
+                f"{model}: {usage.requests} llamadas, "
+                f"{usage.input_tokens:,} tokens de entrada, {usage.output_tokens:,} de salida, "
+                f"{usage.retries} reintentos ({usage.rate_limited} por limite de cuota)"
+            )
         st.balloons()
 
 else:
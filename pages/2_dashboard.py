@@ -1,24 +1,26 @@
 import streamlit as st
-from pathlib import Path
-from core.database import init_db, get_all_posts
+from core.database import (
+    init_db, get_posts_page, get_compliance_summary, list_batches, search_posts, get_status_rollup,
+)
 from core.models import ComplianceStatus
+from core.state import page_cursor, page_controls
+from utils.image_helpers import derivative_url, get_derivative
 
 init_db()
 
 st.header("Dashboard de Cumplimiento")
 
-# Cargar posts
-posts = get_all_posts()
+# --- Metricas resumen (tablas resumen en SQL) ---
+summary = get_compliance_summary([], top_errors=0)
+total = summary.total
 
-if not posts:
+if not total:
     st.info("No hay publicaciones analizadas. Ve a 'Carga de URLs' para comenzar.")
     st.stop()
 
-# --- Metricas resumen ---
-total = len(posts)
-cumple = sum(1 for p in posts if p.status == ComplianceStatus.CUMPLE)
-no_cumple = sum(1 for p in posts if p.status == ComplianceStatus.NO_CUMPLE)
-errores = sum(1 for p in posts if p.status == ComplianceStatus.ERROR)
+cumple = summary.count(ComplianceStatus.CUMPLE)
+no_cumple = summary.count(ComplianceStatus.NO_CUMPLE)
+errores = summary.count(ComplianceStatus.ERROR)
 
 col1, col2, col3, col4 = st.columns(4)
 with col1:
@@ -32,10 +34,44 @@ with col3:
 with col4:
     st.metric("Errores", errores)
 
+# Desglose por batch o por dia (desde las tablas resumen)
+batches = list_batches()
+with st.expander("Desglose por batch / dia"):
+    rollup_by = st.radio(
+        "Agrupar por", ["batch", "day"], horizontal=True, key="dashboard_rollup_by",
+        format_func=lambda g: "Batch" if g == "batch" else "Dia",
+    )
+    # Los batches se muestran por su fecha de inicio; los dias tal cual
+    group_labels = {b["batch_id"]: b["started_at"][:16].replace("T", " ") for b in batches} if rollup_by == "batch" else {}
+    st.dataframe(
+        [
+            {
+                "Grupo": group_labels.get(r["grupo"], r["grupo"] or "(sin batch)"),
+                "Total": r["total"],
+                "Cumple": r.get(ComplianceStatus.CUMPLE.value, 0),
+                "No cumple": r.get(ComplianceStatus.NO_CUMPLE.value, 0),
+                "Error": r.get(ComplianceStatus.ERROR.value, 0),
+                "Pendiente": r.get(ComplianceStatus.PENDIENTE.value, 0),
+            }
+            for r in get_status_rollup(rollup_by)
+        ],
+        use_container_width=True,
+        hide_index=True,
+    )
+
 st.markdown("---")
 
-# --- Filtros ---
-col_f1, col_f2, _ = st.columns([2, 2, 6])
+# --- Busqueda y filtros (se aplican en SQL) ---
+search_text = st.text_input(
+    "Buscar en texto y hallazgos",
+    placeholder="Ej: logo pixelado, nombre de un programa...",
+)
+
+batch_labels = {"Todos": None}
+for b in batches:
+    batch_labels[f"{b['started_at'][:16].replace('T', ' ')} ({b['posts']} posts)"] = b["batch_id"]
+
+col_f1, col_f2, col_f3, col_f4, col_f5 = st.columns([2, 2, 3, 3, 1])
 with col_f1:
     filter_platform = st.selectbox(
         "Filtrar por plataforma",
@@ -46,15 +82,32 @@ with col_f2:
         "Filtrar por estado",
         ["Todos", "cumple", "no-cumple", "error", "pendiente"],
     )
-
-# Aplicar filtros
-filtered = posts
-if filter_platform != "Todas":
-    filtered = [p for p in filtered if p.platform.value == filter_platform]
-if filter_status != "Todos":
-    filtered = [p for p in filtered if p.status.value == filter_status]
-
-st.caption(f"Mostrando {len(filtered)} de {total} publicaciones")
+with col_f3:
+    filter_batch = st.selectbox("Filtrar por batch", list(batch_labels.keys()))
+with col_f4:
+    filter_dates = st.date_input("Rango de fechas", value=(), format="DD/MM/YYYY")
+with col_f5:
+    page_size = st.selectbox("Por pagina", [25, 50, 100], key="dashboard_page_size")
+
+filters = {
+    "platform": None if filter_platform == "Todas" else filter_platform,
+    "status": None if filter_status == "Todos" else filter_status,
+    "batch_id": batch_labels[filter_batch],
+    "date_from": filter_dates[0] if len(filter_dates) > 0 else None,
+    "date_to": filter_dates[1] if len(filter_dates) > 1 else None,
+}
+
+snippets = {}
+if search_text.strip():
+    # Busqueda full-text: los resultados mas relevantes, sin paginar
+    hits = search_posts(search_text, limit=page_size, **filters)
+    filtered = [post for post, _ in hits]
+    snippets = {post.post_id: snippet for post, snippet in hits}
+    st.caption(f"{len(filtered)} resultados mas relevantes para \"{search_text.strip()}\"")
+else:
+    # --- Paginacion por keyset: cada vista carga solo una pagina ---
+    cursor = page_cursor("dashboard_pager", {**filters, "page_size": page_size})
+    filtered, next_cursor = get_posts_page(page_size=page_size, cursor=cursor, records=True, **filters)
 
 # --- Tabla de resultados ---
 if not filtered:
@@ -65,8 +118,13 @@ for post in filtered:
     col_img, col_info, col_status = st.columns([2, 6, 2])
 
     with col_img:
-        thumb = post.thumbnail_path or post.screenshot_path
-        if thumb and Path(thumb).exists():
+        thumb_url = derivative_url(post.screenshot_path, "row")
+        if thumb_url:
+            st.markdown(
+                f'<img src="{thumb_url}" loading="lazy" style="width:100%;border-radius:6px;">',
+                unsafe_allow_html=True,
+            )
+        elif thumb := get_derivative(post.screenshot_path, "row"):
             st.image(thumb, use_container_width=True)
         else:
             st.markdown("*Sin imagen*")
@@ -83,7 +141,9 @@ for post in filtered:
         else:
             st.markdown(f"[{post.url}]({post.url})")
 
-        if post.extracted_text:
+        if post.post_id in snippets:
+            st.markdown(f"🔎 {snippets[post.post_id]}")
+        elif post.extracted_text:
             text_preview = post.extracted_text[:150]
             if len(post.extracted_text) > 150:
                 text_preview += "..."
@@ -110,3 +170,6 @@ for post in filtered:
         )
 
     st.markdown("---")
+
+if not snippets:
+    page_controls("dashboard_pager", next_cursor, len(filtered))
@@ -1,29 +1,34 @@
 import streamlit as st
 from pathlib import Path
-from core.database import init_db, get_all_posts
+from core.database import init_db, get_posts_page
 from core.models import ComplianceStatus
+from core.state import page_cursor, page_controls
+from utils.image_helpers import derivative_url, get_derivative
 
 init_db()
 
 st.header("Galeria de Publicaciones")
 
-posts = get_all_posts()
-
-if not posts:
+# Filtro rapido (se aplica en SQL)
+col_filter, col_size = st.columns([4, 1])
+with col_filter:
+    filter_status = st.selectbox(
+        "Filtrar por estado",
+        ["Todos", "cumple", "no-cumple", "error"],
+        key="gallery_filter",
+    )
+with col_size:
+    page_size = st.selectbox("Por pagina", [12, 24, 48], key="gallery_page_size")
+
+# Paginacion por keyset: solo se cargan los screenshots de la pagina actual
+filters = {"status": None if filter_status == "Todos" else filter_status}
+cursor = page_cursor("gallery_pager", {**filters, "page_size": page_size})
+filtered, next_cursor = get_posts_page(page_size=page_size, cursor=cursor, records=True, **filters)
+
+if not filtered and cursor is None and filters["status"] is None:
     st.info("No hay publicaciones analizadas. Ve a 'Carga de URLs' para comenzar.")
     st.stop()
 
-# Filtro rapido
-filter_status = st.selectbox(
-    "Filtrar por estado",
-    ["Todos", "cumple", "no-cumple", "error"],
-    key="gallery_filter",
-)
-
-filtered = posts
-if filter_status != "Todos":
-    filtered = [p for p in filtered if p.status.value == filter_status]
-
 if not filtered:
     st.warning("No hay publicaciones que coincidan con el filtro.")
     st.stop()
@@ -40,12 +45,24 @@ for row_start in range(0, len(filtered), 3):
 
         with col:
             with st.container(border=True):
-                # Screenshot
-                img_path = post.screenshot_path
-                if img_path and Path(img_path).exists():
-                    st.image(img_path, use_container_width=True)
+                # Thumbnail servido como archivo estatico (el navegador lo cachea);
+                # la imagen completa solo se envia si el usuario la pide
+                thumb_url = derivative_url(post.screenshot_path, "grid")
+                if thumb_url:
+                    st.markdown(
+                        f'<img src="{thumb_url}" loading="lazy" style="width:100%;border-radius:6px;">',
+                        unsafe_allow_html=True,
+                    )
+                elif thumb := get_derivative(post.screenshot_path, "grid"):
+                    st.image(thumb, use_container_width=True)
                 else:
                     st.markdown("*Sin imagen disponible*")
+                if thumb_url or thumb:
+                    if st.toggle("Resolucion completa", key=f"full_{post.post_id}"):
+                        if Path(post.screenshot_path).exists():
+                            st.image(post.screenshot_path, use_container_width=True)
+                        else:
+                            st.caption("El archivo original ya no existe.")
 
                 # Badges
                 platform_icons = {
@@ -112,3 +129,5 @@ for row_start in range(0, len(filtered), 3):
 
                 # Link al post original
                 st.markdown(f"[Ver publicacion original]({post.url})")
+
+page_controls("gallery_pager", next_cursor, len(filtered))
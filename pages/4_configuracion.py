@@ -1,6 +1,14 @@
 import streamlit as st
-from core.database import init_db, save_config, load_config
-from core.models import ComplianceConfig, AIBackend
+from core.database import (
+    init_db, save_config, load_config, get_posts, save_posts, query_post_records,
+    get_data_version, get_config_version,
+    list_batches, set_batch_pinned, expired_batches, bump_config_version, record_batch_trends,
+)
+from core.maintenance import run_compaction, compaction_status
+from core.models import ComplianceConfig, AIBackend, OllamaEndpoint
+from analysis.logo_detector import list_logos, save_logo, delete_logo
+from analysis.local_checks import normalize_hashtag
+from analysis.reevaluate import CLASSIFY_COLUMNS, classify_posts, reevaluate_posts
 from config.settings import DEFAULT_HASHTAGS, DEFAULT_TONE_KEYWORDS_EMOTIVO, DEFAULT_TONE_KEYWORDS_INFORMATIVO
 
 init_db()
@@ -81,21 +89,207 @@ if selected_backend == "ollama":
             f"No se pudo conectar a Ollama en {ollama_url}. "
             "Asegurate de que Ollama este corriendo (`ollama serve`)."
         )
+
+    # Servidores adicionales para repartir la carga
+    with st.expander("Servidores Ollama adicionales (balanceo de carga)"):
+        ollama_max_concurrent = st.number_input(
+            "Peticiones simultaneas en el servidor principal",
+            min_value=1,
+            max_value=16,
+            value=config.ollama_max_concurrent,
+        )
+        extra_text = st.text_area(
+            "Servidores adicionales",
+            value="\n".join(
+                f"{e.url} {e.max_concurrent}" for e in config.ollama_extra_endpoints
+            ),
+            height=100,
+            placeholder="http://192.168.1.20:11434 2\nhttp://192.168.1.21:11434 1",
+            help="Uno por linea: URL y, opcionalmente, peticiones simultaneas (por defecto 1).",
+        )
+        ollama_extra_endpoints = []
+        for line in extra_text.strip().split("\n"):
+            parts = line.split()
+            if not parts:
+                continue
+            max_concurrent = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+            ollama_extra_endpoints.append(
+                OllamaEndpoint(url=parts[0], max_concurrent=max(1, max_concurrent))
+            )
+
+        for endpoint in ollama_extra_endpoints:
+            if OllamaClient.check_connection(endpoint.url):
+                st.markdown(f"✅ `{endpoint.url}` ({endpoint.max_concurrent} simultaneas)")
+            else:
+                st.markdown(f"❌ `{endpoint.url}` no responde")
     gemini_model = config.gemini_model
+    gemini_rpm = config.gemini_rpm
+    gemini_tpm = config.gemini_tpm
+    gemini_max_retries = config.gemini_max_retries
 else:
     ollama_url = config.ollama_url
     ollama_model = config.ollama_model
+    ollama_max_concurrent = config.ollama_max_concurrent
+    ollama_extra_endpoints = config.ollama_extra_endpoints
     gemini_model = st.text_input(
         "Modelo de Gemini",
         value=config.gemini_model,
         help="Ej: gemini-2.0-flash, gemini-1.5-pro",
     )
+    col_rpm, col_tpm, col_retries = st.columns(3)
+    with col_rpm:
+        gemini_rpm = st.number_input(
+            "Peticiones por minuto",
+            min_value=1,
+            value=config.gemini_rpm,
+            help="Limite de la cuota de tu proyecto (RPM).",
+        )
+    with col_tpm:
+        gemini_tpm = st.number_input(
+            "Tokens por minuto",
+            min_value=1000,
+            value=config.gemini_tpm,
+            step=10000,
+            help="Limite de la cuota de tu proyecto (TPM).",
+        )
+    with col_retries:
+        gemini_max_retries = st.number_input(
+            "Reintentos maximos",
+            min_value=0,
+            max_value=10,
+            value=config.gemini_max_retries,
+            help="Solo para errores temporales (429, 5xx).",
+        )
     import os
     if os.getenv("GEMINI_API_KEY"):
         st.success("GEMINI_API_KEY configurada")
     else:
         st.warning("GEMINI_API_KEY no encontrada en el archivo .env")
 
+# === Cascada de modelos ===
+st.markdown("---")
+st.subheader("Cascada de Modelos")
+st.caption(
+    "Un modelo rapido evalua primero cada publicacion; solo los casos con baja "
+    "confianza o con error se envian al modelo principal configurado arriba."
+)
+
+cascade_enabled = st.toggle("Activar cascada", value=config.cascade_enabled)
+cascade_fast_backend = config.cascade_fast_backend.value
+cascade_fast_model = config.cascade_fast_model
+cascade_confidence_threshold = config.cascade_confidence_threshold
+cascade_escalate_no_cumple = config.cascade_escalate_no_cumple
+
+if cascade_enabled:
+    col_fb, col_fm = st.columns(2)
+    with col_fb:
+        fast_backend_label = st.radio(
+            "Motor del modelo rapido",
+            options=list(backend_options.keys()),
+            index=list(backend_options.keys()).index(
+                backend_labels.get(cascade_fast_backend, "Ollama (Local)")
+            ),
+            horizontal=True,
+            key="cascade_fast_backend",
+        )
+        cascade_fast_backend = backend_options[fast_backend_label]
+    with col_fm:
+        cascade_fast_model = st.text_input(
+            "Modelo rapido",
+            value=config.cascade_fast_model,
+            help="Ej: moondream, llava:7b, gemini-2.0-flash-lite",
+        )
+
+    col_th, col_nc = st.columns(2)
+    with col_th:
+        cascade_confidence_threshold = st.slider(
+            "Confianza minima para aceptar al modelo rapido",
+            min_value=0.0,
+            max_value=1.0,
+            value=float(config.cascade_confidence_threshold),
+            step=0.05,
+            help="Por debajo de este valor la publicacion se escala al modelo principal.",
+        )
+    with col_nc:
+        cascade_escalate_no_cumple = st.checkbox(
+            "Escalar tambien los 'No Cumple'",
+            value=config.cascade_escalate_no_cumple,
+            help="Confirma con el modelo principal todo resultado negativo.",
+        )
+
+# === Logos oficiales (deteccion local) ===
+st.markdown("---")
+st.subheader("Logos Oficiales")
+st.caption(
+    "Sube las versiones del logo oficial. Si hay logos registrados, la presencia del "
+    "logo se detecta localmente en cada captura en lugar de preguntarle al modelo."
+)
+
+col_le, col_lt = st.columns(2)
+with col_le:
+    logo_detection_enabled = st.toggle(
+        "Detectar logo localmente", value=config.logo_detection_enabled
+    )
+with col_lt:
+    logo_match_threshold = st.slider(
+        "Similitud minima para considerar el logo presente",
+        min_value=0.3,
+        max_value=1.0,
+        value=float(config.logo_match_threshold),
+        step=0.05,
+        disabled=not logo_detection_enabled,
+    )
+
+uploaded_logos = st.file_uploader(
+    "Agregar logos de referencia",
+    type=["png", "jpg", "jpeg", "webp"],
+    accept_multiple_files=True,
+    help="Idealmente recortados al borde del logo. PNG con transparencia es compatible.",
+)
+if uploaded_logos and st.button("Registrar logos"):
+    for logo_file in uploaded_logos:
+        save_logo(logo_file.name, logo_file.getvalue())
+    bump_config_version()
+    st.toast(f"{len(uploaded_logos)} logo(s) registrados.")
+    st.rerun()
+
+registered_logos = list_logos()
+if registered_logos:
+    logo_cols = st.columns(min(len(registered_logos), 4))
+    for i, logo_path in enumerate(registered_logos):
+        with logo_cols[i % len(logo_cols)]:
+            st.image(str(logo_path), caption=logo_path.stem, width=120)
+            if st.button("Eliminar", key=f"del_logo_{logo_path.stem}"):
+                delete_logo(logo_path.stem)
+                bump_config_version()
+                st.rerun()
+else:
+    st.info("No hay logos registrados: el modelo de IA decide si el logo esta presente.")
+
+# === Retencion de datos ===
+st.markdown("---")
+st.subheader("Retencion de Datos")
+st.caption(
+    "Los batches que exceden la retencion se eliminan (con sus capturas) en la "
+    "compactacion que corre al terminar cada procesamiento. Los batches fijados se conservan."
+)
+
+col_rd, col_rb = st.columns(2)
+with col_rd:
+    retention_days = st.number_input(
+        "Conservar batches de los ultimos N dias",
+        min_value=0,
+        value=int(config.retention_days),
+        help="0 = sin limite de antiguedad.",
+    )
+with col_rb:
+    retention_max_batches = st.number_input(
+        "Conservar solo los ultimos N batches",
+        min_value=0,
+        value=int(config.retention_max_batches),
+        help="0 = sin limite de cantidad. Los batches fijados no cuentan.",
+    )
+
 st.markdown("---")
 
 # === Form de lineamientos ===
@@ -147,9 +341,9 @@ with st.form("config_form"):
     submitted = st.form_submit_button("Guardar Configuracion", use_container_width=True, type="primary")
 
     if submitted:
-        new_config = ComplianceConfig(
+        new_config = config.model_copy(update=dict(
             required_hashtags=[
-                h.strip() for h in hashtags_text.strip().split("\n") if h.strip()
+                normalize_hashtag(h) for h in hashtags_text.strip().split("\n") if h.strip("# \t")
             ],
             emotional_keywords=[
                 k.strip() for k in emotivo_text.strip().split("\n") if k.strip()
@@ -161,8 +355,130 @@ with st.form("config_form"):
             ai_backend=AIBackend(selected_backend),
             ollama_model=ollama_model,
             ollama_url=ollama_url,
+            ollama_max_concurrent=int(ollama_max_concurrent),
+            ollama_extra_endpoints=ollama_extra_endpoints,
             gemini_model=gemini_model,
-        )
+            gemini_rpm=int(gemini_rpm),
+            gemini_tpm=int(gemini_tpm),
+            gemini_max_retries=int(gemini_max_retries),
+            cascade_enabled=cascade_enabled,
+            cascade_fast_backend=AIBackend(cascade_fast_backend),
+            cascade_fast_model=cascade_fast_model.strip(),
+            cascade_confidence_threshold=cascade_confidence_threshold,
+            cascade_escalate_no_cumple=cascade_escalate_no_cumple,
+            logo_detection_enabled=logo_detection_enabled,
+            logo_match_threshold=logo_match_threshold,
+            retention_days=int(retention_days),
+            retention_max_batches=int(retention_max_batches),
+        ))
         save_config(new_config)
         st.session_state.config = new_config
         st.success("Configuracion guardada exitosamente.")
+
+# === Re-evaluacion de publicaciones existentes ===
+st.markdown("---")
+st.subheader("Re-evaluar Publicaciones")
+st.caption(
+    "Aplica la configuracion guardada a las publicaciones ya capturadas, sin volver a "
+    "capturarlas. Solo se consulta al modelo si cambio el prompt o el modelo; los "
+    "cambios de hashtags o logos se recalculan localmente."
+)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _classification(data_version: int, config_version: int) -> tuple[list[str], list[str], int]:
+    """Ids que requieren modelo, ids con solo recalculo local y cantidad al dia, por version."""
+    needs_model, needs_local, up_to_date = classify_posts(
+        query_post_records(CLASSIFY_COLUMNS), load_config()
+    )
+    return [p.post_id for p in needs_model], [p.post_id for p in needs_local], len(up_to_date)
+
+
+saved_config = load_config()
+model_ids, local_ids, up_to_date_count = _classification(get_data_version(), get_config_version())
+
+col_m, col_l, col_ok = st.columns(3)
+with col_m:
+    st.metric("Requieren modelo", len(model_ids))
+with col_l:
+    st.metric("Solo recalculo local", len(local_ids))
+with col_ok:
+    st.metric("Al dia", up_to_date_count)
+
+if st.button(
+    "Re-evaluar publicaciones desactualizadas",
+    disabled=not (model_ids or local_ids),
+    use_container_width=True,
+):
+    progress_bar = st.progress(0, text="Re-evaluando...")
+    try:
+        changed = reevaluate_posts(
+            get_posts(model_ids + local_ids),
+            saved_config,
+            progress_callback=lambda pct, msg: progress_bar.progress(pct, text=msg),
+        )
+    except Exception as e:
+        st.error(f"No se pudo re-evaluar: {e}")
+    else:
+        save_posts(changed["modelo"] + changed["local"])
+        record_batch_trends(p.batch_id for p in changed["modelo"] + changed["local"])
+        progress_bar.progress(1.0, text="Re-evaluacion completada")
+        st.success(
+            f"{len(changed['modelo'])} publicaciones re-analizadas con el modelo y "
+            f"{len(changed['local'])} recalculadas localmente."
+        )
+
+# === Batches y compactacion ===
+st.markdown("---")
+st.subheader("Batches y Almacenamiento")
+
+batches = list_batches()
+if batches:
+    expired = set(expired_batches(saved_config.retention_days, saved_config.retention_max_batches))
+    edited = st.data_editor(
+        [
+            {
+                "Fijado": bool(b["pinned"]),
+                "Inicio": b["started_at"][:16].replace("T", " "),
+                "Modelo": b["model"],
+                "URLs": b["url_count"],
+                "Posts": b["posts"],
+                "Vencido": b["batch_id"] in expired,
+            }
+            for b in batches
+        ],
+        disabled=["Inicio", "Modelo", "URLs", "Posts", "Vencido"],
+        hide_index=True,
+        use_container_width=True,
+        key="batches_editor",
+    )
+    pin_changes = [
+        (b["batch_id"], row["Fijado"])
+        for b, row in zip(batches, edited)
+        if row["Fijado"] != bool(b["pinned"])
+    ]
+    if pin_changes:
+        for batch_id, pinned in pin_changes:
+            set_batch_pinned(batch_id, pinned)
+        st.rerun()
+else:
+    st.info("Aun no hay batches registrados.")
+
+running, last_report = compaction_status()
+if running:
+    st.caption("Hay una compactacion en curso en segundo plano.")
+elif last_report:
+    st.caption(
+        f"Ultima compactacion: {last_report['batches_eliminados']} batches, "
+        f"{last_report['imagenes_eliminadas']} imagenes huerfanas y "
+        f"{last_report['paginas_liberadas']} paginas de la DB liberadas "
+        f"en {last_report['segundos']} s."
+    )
+
+if st.button("Compactar ahora", disabled=running, use_container_width=True):
+    with st.spinner("Aplicando retencion y limpiando archivos..."):
+        report = run_compaction(saved_config)
+    st.success(
+        f"Se eliminaron {report['batches_eliminados']} batches ({report['posts_eliminados']} posts) "
+        f"y {report['imagenes_eliminadas']} imagenes huerfanas."
+    )
@@ -1,83 +1,211 @@
+import os
+import tempfile
+import time
 import streamlit as st
-from core.database import init_db, get_all_posts, load_config, delete_all_posts
-from core.models import ComplianceStatus
+import matplotlib.pyplot as plt
+from datetime import date, timedelta
+from io import BytesIO
+from pathlib import Path
+from core.database import (
+    init_db, load_config, delete_all_posts, get_telemetry, get_compliance_summary,
+    get_compliance_trend, get_hashtag_trend, get_data_version, get_config_version,
+    list_batches, get_batch_usage,
+)
+from analysis.telemetry import summarize_telemetry
 from reports.charts import (
     generate_compliance_pie,
     generate_error_bar_chart,
     generate_hashtag_usage_chart,
     generate_platform_breakdown,
+    generate_compliance_trend_chart,
+    generate_hashtag_trend_chart,
 )
-from reports.pdf_export import generate_pdf_report
-from reports.excel_export import generate_excel_report
+from reports.bulk_export import EXPORT_FORMATS, export_posts
+from reports.report_cache import report_status, request_report
 
 init_db()
 
 st.header("Reportes de Cumplimiento")
 
-posts = get_all_posts()
+
+def _png(fig) -> bytes:
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png", dpi=150, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _summary(data_version: int, config_version: int):
+    """ComplianceSummary de todos los posts, recalculado solo si cambian los datos o la configuracion."""
+    return get_compliance_summary(load_config().required_hashtags)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _overview_charts(data_version: int, config_version: int) -> dict[str, bytes]:
+    """Graficos del resumen como PNG, dibujados una vez por version."""
+    summary = _summary(data_version, config_version)
+    return {
+        "estado": _png(generate_compliance_pie(summary)),
+        "plataforma": _png(generate_platform_breakdown(summary)),
+        "errores": _png(generate_error_bar_chart(summary)),
+        "hashtags": _png(generate_hashtag_usage_chart(summary)),
+    }
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _telemetry_summary(data_version: int) -> list[dict]:
+    """Resumen de telemetria; se guarda junto con los posts, asi que basta la version de datos."""
+    return summarize_telemetry(get_telemetry())
+
+
 config = load_config()
+versions = (get_data_version(), get_config_version())
 
-if not posts:
+if not _summary(*versions).total:
     st.info("No hay publicaciones analizadas para generar reportes.")
     st.stop()
 
 # --- Resumen General ---
 st.subheader("Resumen General")
 
-total = len(posts)
-cumple = sum(1 for p in posts if p.status == ComplianceStatus.CUMPLE)
-no_cumple = sum(1 for p in posts if p.status == ComplianceStatus.NO_CUMPLE)
+# Agregaciones en SQL, dibujadas una vez por version de datos y configuracion
+charts = _overview_charts(*versions)
 
 col1, col2 = st.columns(2)
 
 with col1:
-    fig_pie = generate_compliance_pie(posts)
-    st.pyplot(fig_pie)
+    st.image(charts["estado"], use_container_width=True)
 
 with col2:
-    fig_platform = generate_platform_breakdown(posts)
-    st.pyplot(fig_platform)
+    st.image(charts["plataforma"], use_container_width=True)
 
 st.markdown("---")
 
 # Errores mas comunes
 st.subheader("Errores Mas Comunes")
-fig_errors = generate_error_bar_chart(posts)
-st.pyplot(fig_errors)
+st.image(charts["errores"], use_container_width=True)
 
 st.markdown("---")
 
 # Uso de hashtags
 st.subheader("Uso de Hashtags Obligatorios")
-fig_hashtags = generate_hashtag_usage_chart(posts, config.required_hashtags)
-st.pyplot(fig_hashtags)
+st.image(charts["hashtags"], use_container_width=True)
+
+st.markdown("---")
+
+# Tendencias (se conservan aunque los batches se eliminen por retencion)
+st.subheader("Tendencia de Cumplimiento")
+col_range, col_gran, col_split = st.columns([3, 2, 2])
+with col_range:
+    trend_range = st.date_input(
+        "Rango de fechas",
+        value=(date.today() - timedelta(days=90), date.today()),
+        format="DD/MM/YYYY",
+        key="trend_range",
+    )
+with col_gran:
+    granularity = st.radio(
+        "Agrupar por", ["day", "week"], horizontal=True,
+        format_func=lambda g: "Dia" if g == "day" else "Semana",
+    )
+with col_split:
+    by_platform = st.toggle("Separar por plataforma", value=True)
+
+trend_from = trend_range[0] if len(trend_range) > 0 else None
+trend_to = trend_range[1] if len(trend_range) > 1 else None
+st.pyplot(generate_compliance_trend_chart(
+    get_compliance_trend(granularity, trend_from, trend_to, by_platform=by_platform)
+))
+if config.required_hashtags:
+    st.pyplot(generate_hashtag_trend_chart(
+        get_hashtag_trend(config.required_hashtags, granularity, trend_from, trend_to)
+    ))
+
+st.markdown("---")
+
+# Rendimiento del motor de IA
+st.subheader("Rendimiento del Analisis")
+telemetry_summary = _telemetry_summary(versions[0])
+if telemetry_summary:
+    st.caption(
+        "Latencia por llamada al modelo de vision, throughput del batch y costo estimado "
+        "segun los tokens reportados. Util para comparar modelos de Gemini y Ollama."
+    )
+    st.dataframe(telemetry_summary, use_container_width=True, hide_index=True)
+else:
+    st.info("Aun no hay telemetria de analisis registrada.")
+
+# Consumo de cuota por batch (una fila por batch y modelo)
+batch_info = {b["batch_id"]: b for b in list_batches()}
+usage_rows = [
+    {
+        "Inicio": batch_info[u["batch_id"]]["started_at"][:16].replace("T", " "),
+        "URLs": batch_info[u["batch_id"]]["url_count"],
+        "Posts": batch_info[u["batch_id"]]["posts"],
+        "Modelo": u["model"],
+        "Peticiones": u["requests"],
+        "Tokens entrada": u["input_tokens"],
+        "Tokens salida": u["output_tokens"],
+        "Reintentos": u["retries"],
+        "Limitadas (429)": u["rate_limited"],
+        "Espera (s)": round(u["throttled_seconds"], 1),
+    }
+    for u in get_batch_usage()
+    if u["batch_id"] in batch_info
+]
+if usage_rows:
+    st.markdown("**Consumo de cuota por batch**")
+    usage_rows.sort(key=lambda r: r["Inicio"], reverse=True)
+    st.dataframe(usage_rows, use_container_width=True, hide_index=True)
 
 st.markdown("---")
 
 # --- Exportar ---
 st.subheader("Exportar Reportes")
 
+REPORT_DOWNLOADS = {
+    "pdf": ("Reporte PDF", "reporte_cumplimiento.pdf", "application/pdf"),
+    "excel": (
+        "Reporte Excel", "reporte_cumplimiento.xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+}
+
+
+@st.fragment
+def _report_download(kind: str):
+    """Boton de un reporte cacheado: se genera en segundo plano solo si se pide.
+
+    Mientras se genera, solo este fragmento se refresca hasta que el archivo este listo.
+    """
+    label, file_name, mime = REPORT_DOWNLOADS[kind]
+    status, detail = report_status(kind)
+    if status == "listo":
+        with open(detail, "rb") as f:
+            st.download_button(
+                f"Descargar {label}", data=f, file_name=file_name, mime=mime,
+                use_container_width=True, key=f"download_{kind}",
+            )
+    elif status == "generando":
+        st.button(f"Generando {label}...", disabled=True, use_container_width=True, key=f"busy_{kind}")
+        time.sleep(1)
+        st.rerun(scope="fragment")
+    else:
+        if status == "error":
+            st.error(f"No se pudo generar: {detail}")
+        if st.button(f"Generar {label}", use_container_width=True, key=f"generate_{kind}"):
+            request_report(kind)
+            st.rerun(scope="fragment")
+
+
 col_pdf, col_excel, col_clear = st.columns(3)
 
 with col_pdf:
-    pdf_bytes = generate_pdf_report(posts, config)
-    st.download_button(
-        "Descargar Reporte PDF",
-        data=pdf_bytes,
-        file_name="reporte_cumplimiento.pdf",
-        mime="application/pdf",
-        use_container_width=True,
-    )
+    _report_download("pdf")
 
 with col_excel:
-    excel_bytes = generate_excel_report(posts)
-    st.download_button(
-        "Descargar Reporte Excel",
-        data=excel_bytes,
-        file_name="reporte_cumplimiento.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        use_container_width=True,
-    )
+    _report_download("excel")
 
 with col_clear:
     if st.button("Limpiar Todos los Datos", use_container_width=True, type="secondary"):
@@ -85,3 +213,31 @@ with col_clear:
         st.session_state.posts = []
         st.success("Todos los datos han sido eliminados.")
         st.rerun()
+
+# Exportacion plana para BI (una fila por post, leida de la DB por bloques)
+with st.expander("Exportar datos (CSV, JSON Lines, Parquet)"):
+    col_fmt, col_gen = st.columns([2, 1])
+    with col_fmt:
+        export_format = st.selectbox("Formato", list(EXPORT_FORMATS), key="bulk_export_format")
+    with col_gen:
+        st.write("")
+        if st.button("Generar archivo", use_container_width=True):
+            with st.spinner("Exportando..."):
+                previous = st.session_state.get("bulk_export")
+                if previous:
+                    Path(previous[0]).unlink(missing_ok=True)
+                fd, export_path = tempfile.mkstemp(prefix="posts_", suffix=EXPORT_FORMATS[export_format])
+                os.close(fd)
+                rows = export_posts(export_path, export_format)
+                st.session_state.bulk_export = (export_path, export_format, rows)
+    bulk_export = st.session_state.get("bulk_export")
+    if bulk_export and Path(bulk_export[0]).exists():
+        export_path, exported_format, rows = bulk_export
+        with open(export_path, "rb") as f:
+            st.download_button(
+                f"Descargar {exported_format} ({rows} posts)",
+                data=f,
+                file_name=f"posts{EXPORT_FORMATS[exported_format]}",
+                mime="application/octet-stream",
+                use_container_width=True,
+            )
@@ -0,0 +1,153 @@
+"""Exportaciones planas para BI: CSV (opcionalmente .gz), JSON Lines y Parquet.
+
+Una fila por post con los campos del analisis aplanados. Los posts se leen de
+la DB en bloques y cada bloque se escribe antes de leer el siguiente, por lo
+que la memoria no depende del tamano de la exportacion.
+"""
+import csv
+import gzip
+import json
+from typing import Callable, Optional
+from core.models import PostRecord
+
+# (columna, tipo) en el orden de salida; los tipos "list" van como listas en
+# JSONL/Parquet y unidos con LIST_SEPARATOR en CSV
+EXPORT_FIELDS = [
+    ("post_id", "str"),
+    ("url", "str"),
+    ("platform", "str"),
+    ("status", "str"),
+    ("batch_id", "str"),
+    ("created_at", "timestamp"),
+    ("extracted_text", "str"),
+    ("error_message", "str"),
+    ("brand_identity", "bool"),
+    ("tone_label", "str"),
+    ("emotional_score", "float"),
+    ("confidence", "float"),
+    ("analyzed_by", "str"),
+    ("hashtags_present", "list"),
+    ("hashtags_missing", "list"),
+    ("design_errors", "list"),
+    ("common_errors", "list"),
+    ("suggested_corrections", "list"),
+]
+LIST_SEPARATOR = " | "
+EXPORT_FORMATS = {
+    "csv": ".csv",
+    "csv.gz": ".csv.gz",
+    "jsonl": ".jsonl",
+    "jsonl.gz": ".jsonl.gz",
+    "parquet": ".parquet",
+}
+_POST_COLUMNS = [
+    "url", "platform", "status", "batch_id", "created_at",
+    "extracted_text", "error_message", "analysis_json",
+]
+
+
+def flatten_post(post: PostRecord) -> dict:
+    """Fila plana de un post (los campos de analisis quedan en None si no fue analizado)."""
+    a = post.analysis
+    return {
+        "post_id": post.post_id,
+        "url": post.url,
+        "platform": post.platform.value,
+        "status": post.status.value,
+        "batch_id": post.batch_id,
+        "created_at": post.created_at,
+        "extracted_text": post.extracted_text,
+        "error_message": post.error_message,
+        "brand_identity": a.brand_identity if a else None,
+        "tone_label": a.tone_label if a else None,
+        "emotional_score": a.emotional_score if a else None,
+        "confidence": a.confidence if a else None,
+        "analyzed_by": a.analyzed_by if a else None,
+        "hashtags_present": a.hashtags_present if a else [],
+        "hashtags_missing": a.hashtags_missing if a else [],
+        "design_errors": a.design_errors if a else [],
+        "common_errors": a.common_errors if a else [],
+        "suggested_corrections": a.suggested_corrections if a else [],
+    }
+
+
+def _flat_chunks(chunk_size: int, filters: dict):
+    from core.database import iter_post_records
+
+    for chunk in iter_post_records(_POST_COLUMNS, chunk_size=chunk_size, descending=False, **filters):
+        yield [flatten_post(post) for post in chunk]
+
+
+def _open_text(path: str, compress: bool):
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def export_csv(path: str, compress: bool = False, chunk_size: int = 5000, **filters) -> int:
+    """Exporta a CSV (gzip si `compress`). Retorna la cantidad de filas."""
+    names = [name for name, _ in EXPORT_FIELDS]
+    lists = [name for name, kind in EXPORT_FIELDS if kind == "list"]
+    rows = 0
+    with _open_text(path, compress) as f:
+        writer = csv.DictWriter(f, fieldnames=names)
+        writer.writeheader()
+        for chunk in _flat_chunks(chunk_size, filters):
+            for row in chunk:
+                for name in lists:
+                    row[name] = LIST_SEPARATOR.join(row[name])
+                row["created_at"] = row["created_at"].isoformat()
+            writer.writerows(chunk)
+            rows += len(chunk)
+    return rows
+
+
+def export_jsonl(path: str, compress: bool = False, chunk_size: int = 5000, **filters) -> int:
+    """Exporta a JSON Lines (gzip si `compress`). Retorna la cantidad de filas."""
+    rows = 0
+    with _open_text(path, compress) as f:
+        for chunk in _flat_chunks(chunk_size, filters):
+            for row in chunk:
+                row["created_at"] = row["created_at"].isoformat()
+            f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in chunk)
+            rows += len(chunk)
+    return rows
+
+
+def export_parquet(path: str, chunk_size: int = 50000, **filters) -> int:
+    """Exporta a Parquet con un row group por bloque. Retorna la cantidad de filas."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        "str": pa.string(),
+        "bool": pa.bool_(),
+        "float": pa.float64(),
+        "timestamp": pa.timestamp("us"),
+        "list": pa.list_(pa.string()),
+    }
+    schema = pa.schema([(name, types[kind]) for name, kind in EXPORT_FIELDS])
+    rows = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for chunk in _flat_chunks(chunk_size, filters):
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+            rows += len(chunk)
+        if rows == 0:
+            writer.write_table(schema.empty_table())
+    return rows
+
+
+def export_posts(path: str, fmt: str, chunk_size: Optional[int] = None, **filters) -> int:
+    """Exporta en el formato `fmt` (ver EXPORT_FORMATS). Retorna la cantidad de filas."""
+    exporters: dict[str, Callable[..., int]] = {
+        "csv": lambda **kw: export_csv(path, **kw),
+        "csv.gz": lambda **kw: export_csv(path, compress=True, **kw),
+        "jsonl": lambda **kw: export_jsonl(path, **kw),
+        "jsonl.gz": lambda **kw: export_jsonl(path, compress=True, **kw),
+        "parquet": lambda **kw: export_parquet(path, **kw),
+    }
+    if fmt not in exporters:
+        raise ValueError(f"Formato no soportado: {fmt}")
+    if chunk_size is not None:
+        filters["chunk_size"] = chunk_size
+    return exporters[fmt](**filters)
@@ -1,13 +1,15 @@
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-from collections import Counter
-from core.models import PostResult, ComplianceStatus
+from core.models import ComplianceSummary
 
 
-def generate_compliance_pie(posts: list[PostResult]) -> plt.Figure:
+# Los graficos reciben un ComplianceSummary ya calculado (ver get_compliance_summary
+# en core.database y summarize_posts en reports.summary).
+
+
+def generate_compliance_pie(summary: ComplianceSummary) -> plt.Figure:
     """Grafico de torta: distribucion de cumplimiento."""
-    counts = Counter(p.status.value for p in posts)
     labels = []
     sizes = []
     colors_map = {
@@ -24,7 +26,7 @@ def generate_compliance_pie(posts: list[PostResult]) -> plt.Figure:
     }
     colors = []
 
-    for status, count in counts.items():
+    for status, count in summary.by_status.items():
         labels.append(label_map.get(status, status))
         sizes.append(count)
         colors.append(colors_map.get(status, "#999"))
@@ -36,23 +38,15 @@ def generate_compliance_pie(posts: list[PostResult]) -> plt.Figure:
     return fig
 
 
-def generate_error_bar_chart(posts: list[PostResult]) -> plt.Figure:
+def generate_error_bar_chart(summary: ComplianceSummary) -> plt.Figure:
     """Grafico de barras horizontales: errores mas comunes."""
-    all_errors = []
-    for p in posts:
-        if p.analysis:
-            all_errors.extend(p.analysis.common_errors)
-            all_errors.extend(p.analysis.design_errors)
-
-    if not all_errors:
+    top_errors = summary.top_errors
+    if not top_errors:
         fig, ax = plt.subplots(figsize=(8, 3))
         ax.text(0.5, 0.5, "No se detectaron errores", ha="center", va="center", fontsize=14)
         ax.axis("off")
         return fig
 
-    error_counts = Counter(all_errors)
-    top_errors = error_counts.most_common(10)
-
     labels = [e[0][:50] for e in top_errors]
     values = [e[1] for e in top_errors]
 
@@ -72,29 +66,20 @@ def generate_error_bar_chart(posts: list[PostResult]) -> plt.Figure:
     return fig
 
 
-def generate_hashtag_usage_chart(
-    posts: list[PostResult], required_hashtags: list[str]
-) -> plt.Figure:
-    """Grafico de barras: tasa de uso de cada hashtag obligatorio."""
-    if not required_hashtags:
+def generate_hashtag_usage_chart(summary: ComplianceSummary) -> plt.Figure:
+    """Grafico de barras: % de los posts analizados donde se encontro cada hashtag obligatorio."""
+    usage = summary.hashtag_usage
+    total_posts = summary.analyzed
+    if not usage:
         fig, ax = plt.subplots(figsize=(6, 3))
         ax.text(0.5, 0.5, "No hay hashtags obligatorios configurados",
                 ha="center", va="center", fontsize=12)
         ax.axis("off")
         return fig
 
-    total_posts = len([p for p in posts if p.analysis])
     if total_posts == 0:
         total_posts = 1
 
-    usage = {}
-    for hashtag in required_hashtags:
-        count = sum(
-            1 for p in posts
-            if p.analysis and hashtag.lower() in [h.lower() for h in p.analysis.hashtags_present]
-        )
-        usage[hashtag] = count
-
     hashtags = list(usage.keys())
     counts = list(usage.values())
     percentages = [c / total_posts * 100 for c in counts]
@@ -116,15 +101,12 @@ def generate_hashtag_usage_chart(
     return fig
 
 
-def generate_platform_breakdown(posts: list[PostResult]) -> plt.Figure:
-    """Grafico de barras agrupadas por plataforma."""
-    platforms = {}
-    for p in posts:
-        plat = p.platform.value
-        if plat not in platforms:
-            platforms[plat] = {"cumple": 0, "no-cumple": 0, "error": 0}
-        if p.status.value in platforms[plat]:
-            platforms[plat][p.status.value] += 1
+def generate_platform_breakdown(summary: ComplianceSummary) -> plt.Figure:
+    """Grafico de barras agrupadas por plataforma y estado."""
+    platforms = {
+        plat: {status: by_status.get(status, 0) for status in ("cumple", "no-cumple", "error")}
+        for plat, by_status in summary.by_platform.items()
+    }
 
     if not platforms:
         fig, ax = plt.subplots(figsize=(6, 3))
@@ -152,3 +134,64 @@ def generate_platform_breakdown(posts: list[PostResult]) -> plt.Figure:
     ax.legend()
     fig.tight_layout()
     return fig
+
+
+def generate_compliance_trend_chart(trend: list[dict]) -> plt.Figure:
+    """Grafico de lineas: tasa de cumplimiento por periodo (una linea por plataforma).
+
+    `trend` viene de get_compliance_trend.
+    """
+    series: dict[str, list[tuple[str, float]]] = {}
+    for row in trend:
+        if row["tasa"] is not None:
+            series.setdefault(row["plataforma"], []).append((row["periodo"], row["tasa"] * 100))
+
+    if not series:
+        fig, ax = plt.subplots(figsize=(8, 3))
+        ax.text(0.5, 0.5, "Sin datos en el rango seleccionado", ha="center", va="center")
+        ax.axis("off")
+        return fig
+
+    colors = {
+        "instagram": "#a855f7", "facebook": "#3b82f6", "twitter": "#0ea5e9",
+        "tiktok": "#111827", "todas": "#003DA5",
+    }
+    fig, ax = plt.subplots(figsize=(10, 4))
+    for platform, points in series.items():
+        periods, rates = zip(*points)
+        ax.plot(periods, rates, marker="o", label=platform.capitalize(), color=colors.get(platform, "#999"))
+
+    ax.set_ylim(0, 105)
+    ax.set_ylabel("% cumple")
+    ax.set_title("Tasa de Cumplimiento")
+    ax.legend()
+    ax.tick_params(axis="x", rotation=45, labelsize=8)
+    fig.tight_layout()
+    return fig
+
+
+def generate_hashtag_trend_chart(trend: list[dict]) -> plt.Figure:
+    """Grafico de lineas: % de posts que usan cada hashtag por periodo (de get_hashtag_trend)."""
+    series: dict[str, list[tuple[str, float]]] = {}
+    for row in trend:
+        if row["tasa"] is not None:
+            series.setdefault(row["hashtag"], []).append((row["periodo"], row["tasa"] * 100))
+
+    if not series:
+        fig, ax = plt.subplots(figsize=(8, 3))
+        ax.text(0.5, 0.5, "Sin datos en el rango seleccionado", ha="center", va="center")
+        ax.axis("off")
+        return fig
+
+    fig, ax = plt.subplots(figsize=(10, 4))
+    for hashtag, points in series.items():
+        periods, rates = zip(*points)
+        ax.plot(periods, rates, marker="o", label=hashtag)
+
+    ax.set_ylim(0, 105)
+    ax.set_ylabel("% de publicaciones")
+    ax.set_title("Uso de Hashtags Obligatorios")
+    ax.legend()
+    ax.tick_params(axis="x", rotation=45, labelsize=8)
+    fig.tight_layout()
+    return fig
@@ -1,7 +1,21 @@
 from io import BytesIO
+from typing import Optional
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from core.models import PostResult, ComplianceStatus
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, NamedStyle
+from core.models import PostResult, ComplianceStatus, ComplianceSummary
+
+SUMMARY_HEADERS = [
+    "URL", "Plataforma", "Estado", "Texto Extraido",
+    "Logo Oficial", "Tono", "Puntaje Emotivo",
+    "Hashtags Encontrados", "Hashtags Faltantes",
+    "Cant. Errores", "Error del Sistema",
+]
+SUMMARY_WIDTHS = {"A": 50, "B": 12, "C": 12, "D": 40, "E": 12, "H": 25, "I": 25}
+ERROR_HEADERS = ["URL", "Plataforma", "Tipo Error", "Descripcion"]
+ERROR_WIDTHS = {"A": 50, "B": 12, "C": 15, "D": 60}
+ERROR_KIND_LABELS = {"diseno": "Diseno", "comun": "Comunicacion"}
+STATUS_LABELS = {"cumple": "Cumple", "no-cumple": "No Cumple", "error": "Error", "pendiente": "Pendiente"}
 
 
 def generate_excel_report(posts: list[PostResult]) -> bytes:
@@ -102,3 +116,126 @@ def generate_excel_report(posts: list[PostResult]) -> bytes:
     output = BytesIO()
     wb.save(output)
     return output.getvalue()
+
+
+def _named_styles() -> list[NamedStyle]:
+    header = NamedStyle(name="encabezado")
+    header.fill = PatternFill(start_color="003DA5", end_color="003DA5", fill_type="solid")
+    header.font = Font(color="FFFFFF", bold=True, size=10)
+    header.alignment = Alignment(horizontal="center")
+    cumple = NamedStyle(name="fila_cumple")
+    cumple.fill = PatternFill(start_color="DCFCE7", end_color="DCFCE7", fill_type="solid")
+    no_cumple = NamedStyle(name="fila_no_cumple")
+    no_cumple.fill = PatternFill(start_color="FEE2E2", end_color="FEE2E2", fill_type="solid")
+    return [header, cumple, no_cumple]
+
+
+_ROW_STYLES = {
+    ComplianceStatus.CUMPLE: "fila_cumple",
+    ComplianceStatus.NO_CUMPLE: "fila_no_cumple",
+}
+
+
+def _styled_row(ws, values: list, style: Optional[str]) -> list:
+    if style is None:
+        return values
+    cells = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        cells.append(cell)
+    return cells
+
+
+def _write_statistics(wb: Workbook, summary: ComplianceSummary):
+    ws = wb.create_sheet("Estadisticas")
+    ws.column_dimensions["A"].width = 50
+    for column in "BCD":
+        ws.column_dimensions[column].width = 15
+
+    def header(*titles):
+        ws.append([])
+        ws.append(_styled_row(ws, list(titles), "encabezado"))
+
+    ws.append(["Total de publicaciones", summary.total])
+    ws.append(["Publicaciones analizadas", summary.analyzed])
+
+    header("Estado", "Publicaciones", "%")
+    for status, count in summary.by_status.items():
+        pct = round(count / summary.total * 100, 1) if summary.total else 0
+        ws.append([STATUS_LABELS.get(status, status), count, pct])
+
+    header("Plataforma", "Cumple", "No Cumple", "Error")
+    for platform, counts in summary.by_platform.items():
+        ws.append([platform.capitalize()] + [counts.get(s, 0) for s in ("cumple", "no-cumple", "error")])
+
+    header("Error", "Veces")
+    for error, count in summary.top_errors:
+        ws.append([error, count])
+
+    header("Hashtag Obligatorio", "Publicaciones", "% de analizadas")
+    for hashtag, count in summary.hashtag_usage.items():
+        pct = round(count / summary.analyzed * 100, 1) if summary.analyzed else 0
+        ws.append([hashtag, count, pct])
+
+
+def write_excel_report(
+    path: str, chunk_size: int = 2000, summary: Optional[ComplianceSummary] = None, **filters
+) -> str:
+    """Escribe el reporte Excel directo a `path`.
+
+    Mismas hojas que generate_excel_report mas "Estadisticas" (de `summary`, o
+    de get_compliance_summary si no se pasa). Lee los posts de la DB en bloques
+    y usa el modo write-only de openpyxl con estilos con nombre: la memoria no
+    crece con la cantidad de filas. Acepta los filtros de query_posts
+    (platform, status, batch_id, fechas). Retorna `path`.
+    """
+    from core.database import iter_post_records, iter_post_errors, get_compliance_summary, load_config
+
+    if summary is None:
+        summary = get_compliance_summary(load_config().required_hashtags, **filters)
+
+    wb = Workbook(write_only=True)
+    for style in _named_styles():
+        wb.add_named_style(style)
+
+    ws_resumen = wb.create_sheet("Resumen")
+    for column, width in SUMMARY_WIDTHS.items():
+        ws_resumen.column_dimensions[column].width = width
+    ws_resumen.append(_styled_row(ws_resumen, SUMMARY_HEADERS, "encabezado"))
+
+    columns = ["url", "platform", "status", "extracted_text", "analysis_json", "error_message"]
+    for chunk in iter_post_records(columns, chunk_size=chunk_size, **filters):
+        for post in chunk:
+            a = post.analysis
+            values = [
+                post.url,
+                post.platform.value.capitalize(),
+                post.status.value,
+                post.extracted_text[:300] if post.extracted_text else "",
+            ]
+            if a:
+                values += [
+                    "Si" if a.brand_identity else "No",
+                    a.tone_label,
+                    round(a.emotional_score, 2),
+                    ", ".join(a.hashtags_present),
+                    ", ".join(a.hashtags_missing),
+                    len(a.design_errors) + len(a.common_errors),
+                ]
+            else:
+                values += [None, None, None, None, None, 0]
+            values.append(post.error_message)
+            ws_resumen.append(_styled_row(ws_resumen, values, _ROW_STYLES.get(post.status)))
+
+    ws_errores = wb.create_sheet("Detalle Errores")
+    for column, width in ERROR_WIDTHS.items():
+        ws_errores.column_dimensions[column].width = width
+    ws_errores.append(_styled_row(ws_errores, ERROR_HEADERS, "encabezado"))
+    for chunk in iter_post_errors(chunk_size=chunk_size, **filters):
+        for url, platform, kind, description in chunk:
+            ws_errores.append([url, platform, ERROR_KIND_LABELS.get(kind, kind), description])
+
+    _write_statistics(wb, summary)
+    wb.save(path)
+    return path
@@ -1,14 +1,49 @@
 from io import BytesIO
 from fpdf import FPDF
+from PIL import Image
 from datetime import datetime
-from core.models import PostResult, ComplianceConfig, ComplianceStatus
+from typing import Iterable, Optional, Union
+from core.models import PostRecord, PostResult, ComplianceConfig, ComplianceStatus, ComplianceSummary
+from reports.summary import summarize_posts
+
+# Columnas que usa el detalle (para generar desde iter_post_records)
+PDF_COLUMNS = ["url", "platform", "status", "extracted_text", "screenshot_path", "analysis_json", "error_message"]
+# Ancho (mm) de la captura en el detalle; se usa el derivado "pdf" (JPEG reducido)
+SCREENSHOT_WIDTH_MM = 60
+
+
+def _add_screenshot(pdf: FPDF, screenshot_path: str):
+    """Incrusta el derivado "pdf" de la captura (no el PNG original). Sin derivado no hace nada."""
+    from utils.image_helpers import get_derivative
+
+    path = get_derivative(screenshot_path, "pdf")
+    if not path:
+        return
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+    except OSError:
+        return
+    h = SCREENSHOT_WIDTH_MM * height / width
+    if pdf.get_y() + h > pdf.page_break_trigger:
+        pdf.add_page()
+    pdf.image(path, x=pdf.l_margin, w=SCREENSHOT_WIDTH_MM, h=h)
 
 
 def generate_pdf_report(
-    posts: list[PostResult],
+    posts: Iterable[Union[PostResult, PostRecord]],
     config: ComplianceConfig,
+    summary: Optional[ComplianceSummary] = None,
 ) -> bytes:
-    """Genera un reporte PDF con resumen y detalle de cumplimiento."""
+    """Genera un reporte PDF con resumen y detalle de cumplimiento.
+
+    `summary` (ver get_compliance_summary) evita recontar; si se pasa, `posts`
+    se recorre una sola vez y puede ser un generador. Si no, se calcula desde `posts`.
+    """
+    if summary is None:
+        posts = list(posts)
+        summary = summarize_posts(posts, config.required_hashtags)
+
     pdf = FPDF()
     pdf.set_auto_page_break(auto=True, margin=15)
 
@@ -19,7 +54,7 @@ def generate_pdf_report(
     pdf.cell(0, 15, "Reporte de Cumplimiento Social", ln=True, align="C")
     pdf.set_font("Helvetica", "", 14)
     pdf.cell(0, 10, f"Fecha: {datetime.now().strftime('%d/%m/%Y %H:%M')}", ln=True, align="C")
-    pdf.cell(0, 10, f"Total de publicaciones: {len(posts)}", ln=True, align="C")
+    pdf.cell(0, 10, f"Total de publicaciones: {summary.total}", ln=True, align="C")
 
     # --- Resumen ---
     pdf.add_page()
@@ -27,10 +62,10 @@ def generate_pdf_report(
     pdf.cell(0, 12, "Resumen General", ln=True)
     pdf.set_font("Helvetica", "", 11)
 
-    total = len(posts)
-    cumple = sum(1 for p in posts if p.status == ComplianceStatus.CUMPLE)
-    no_cumple = sum(1 for p in posts if p.status == ComplianceStatus.NO_CUMPLE)
-    errores = sum(1 for p in posts if p.status == ComplianceStatus.ERROR)
+    total = summary.total
+    cumple = summary.count(ComplianceStatus.CUMPLE)
+    no_cumple = summary.count(ComplianceStatus.NO_CUMPLE)
+    errores = summary.count(ComplianceStatus.ERROR)
 
     pdf.cell(0, 8, f"Publicaciones que cumplen: {cumple} ({cumple/total*100:.0f}%)" if total > 0 else "Sin datos", ln=True)
     pdf.cell(0, 8, f"Publicaciones que no cumplen: {no_cumple} ({no_cumple/total*100:.0f}%)" if total > 0 else "", ln=True)
@@ -42,22 +77,17 @@ def generate_pdf_report(
     pdf.cell(0, 10, "Hashtags Obligatorios:", ln=True)
     pdf.set_font("Helvetica", "", 11)
     for h in config.required_hashtags:
-        pdf.cell(0, 7, f"  - {h}", ln=True)
+        used = summary.hashtag_usage.get(h, 0)
+        pct = used / summary.analyzed * 100 if summary.analyzed else 0
+        pdf.cell(0, 7, f"  - {h} (en {used} publicaciones, {pct:.0f}%)", ln=True)
     pdf.ln(5)
 
     # Errores mas comunes
-    from collections import Counter
-    all_errors = []
-    for p in posts:
-        if p.analysis:
-            all_errors.extend(p.analysis.common_errors)
-            all_errors.extend(p.analysis.design_errors)
-
-    if all_errors:
+    if summary.top_errors:
         pdf.set_font("Helvetica", "B", 13)
         pdf.cell(0, 10, "Errores Mas Comunes:", ln=True)
         pdf.set_font("Helvetica", "", 11)
-        for error, count in Counter(all_errors).most_common(10):
+        for error, count in summary.top_errors:
             pct = count / total * 100 if total > 0 else 0
             pdf.cell(0, 7, f"  - {error[:70]} ({count} veces, {pct:.0f}%)", ln=True)
         pdf.ln(5)
@@ -97,6 +127,7 @@ def generate_pdf_report(
         if post.error_message:
             pdf.cell(0, 6, f"Error: {post.error_message[:80]}", ln=True)
 
+        _add_screenshot(pdf, post.screenshot_path)
         pdf.ln(3)
 
     # Retornar como bytes
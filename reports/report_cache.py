@@ -0,0 +1,97 @@
+"""Reportes descargables generados en segundo plano y cacheados en disco.
+
+Cada archivo se identifica por tipo + version de los datos + version de la
+configuracion: mientras ninguna cambie, las visitas siguientes lo sirven sin
+regenerarlo. La generacion solo ocurre cuando el usuario la pide.
+"""
+import os
+import threading
+from itertools import chain
+from pathlib import Path
+from typing import Callable, Optional
+from config.settings import REPORT_CACHE_DIR
+
+
+def _build_pdf(path: str):
+    from core.database import iter_post_records, load_config, get_compliance_summary
+    from reports.pdf_export import PDF_COLUMNS, generate_pdf_report
+
+    # Agregados desde las tablas resumen; el detalle se lee en bloques con solo
+    # las columnas que imprime, sin cargar todos los posts a la vez
+    config = load_config()
+    summary = get_compliance_summary(config.required_hashtags)
+    posts = chain.from_iterable(iter_post_records(PDF_COLUMNS, chunk_size=1000))
+    Path(path).write_bytes(generate_pdf_report(posts, config, summary=summary))
+
+
+def _build_excel(path: str):
+    from reports.excel_export import write_excel_report
+
+    write_excel_report(path)
+
+
+# tipo -> (extension, funcion que escribe el reporte en la ruta dada)
+REPORT_BUILDERS: dict[str, tuple[str, Callable[[str], None]]] = {
+    "pdf": (".pdf", _build_pdf),
+    "excel": (".xlsx", _build_excel),
+}
+
+_lock = threading.Lock()
+_running: dict[str, threading.Thread] = {}
+_errors: dict[str, str] = {}
+
+
+def report_path(kind: str) -> Path:
+    """Ruta del reporte `kind` para los datos y la configuracion actuales."""
+    from core.database import get_data_version, get_config_version
+
+    suffix = REPORT_BUILDERS[kind][0]
+    return Path(REPORT_CACHE_DIR) / f"{kind}-d{get_data_version()}-c{get_config_version()}{suffix}"
+
+
+def report_status(kind: str) -> tuple[str, Optional[str]]:
+    """Estado del reporte actual: ("listo", ruta), ("generando", None), ("error", mensaje) o ("pendiente", None)."""
+    path = report_path(kind)
+    if path.exists():
+        return "listo", str(path)
+    with _lock:
+        if path.name in _running:
+            return "generando", None
+        if path.name in _errors:
+            return "error", _errors[path.name]
+    return "pendiente", None
+
+
+def request_report(kind: str) -> bool:
+    """Genera el reporte actual en un thread de fondo. False si ya existe o esta en curso."""
+    path = report_path(kind)
+    with _lock:
+        if path.exists() or path.name in _running:
+            return False
+        _errors.pop(path.name, None)
+        thread = threading.Thread(target=_generate, args=(kind, path), name=f"report-{kind}", daemon=True)
+        _running[path.name] = thread
+    thread.start()
+    return True
+
+
+def _generate(kind: str, path: Path):
+    from core.database import close_connection
+
+    tmp = path.with_name(f".tmp-{path.name}")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        REPORT_BUILDERS[kind][1](str(tmp))
+        os.replace(tmp, path)
+        # Las versiones anteriores del mismo reporte ya no se van a servir
+        for old in path.parent.glob(f"{kind}-*"):
+            if old != path:
+                old.unlink(missing_ok=True)
+    except Exception as e:
+        tmp.unlink(missing_ok=True)
+        with _lock:
+            _errors[path.name] = str(e)
+    finally:
+        with _lock:
+            _running.pop(path.name, None)
+        close_connection()
@@ -0,0 +1,54 @@
+"""ComplianceSummary a partir de posts en memoria, en una sola pasada.
+
+Para datos guardados usar core.database.get_compliance_summary, que lee las
+tablas resumen sin cargar los posts.
+"""
+from collections import Counter
+from typing import Iterable, Union
+from analysis.local_checks import hashtag_key
+from core.models import ComplianceSummary, PostRecord, PostResult
+
+
+def summarize_posts(
+    posts: Iterable[Union[PostResult, PostRecord]],
+    hashtags: list[str],
+    top_errors: int = 10,
+) -> ComplianceSummary:
+    """Cuenta estados, plataformas, errores y uso de `hashtags` recorriendo `posts` una vez.
+
+    Los hashtags se comparan por hashtag_key (sin '#' ni mayusculas), como
+    check_hashtags y la DB.
+    """
+    required = {hashtag_key(h): h for h in hashtags}
+    by_platform: dict[str, Counter] = {}
+    errors: Counter = Counter()
+    usage: Counter = Counter()
+    analyzed = 0
+
+    for post in posts:
+        platform = by_platform.get(post.platform.value)
+        if platform is None:
+            platform = by_platform[post.platform.value] = Counter()
+        platform[post.status.value] += 1
+
+        a = post.analysis
+        if a is None:
+            continue
+        analyzed += 1
+        errors.update(a.design_errors)
+        errors.update(a.common_errors)
+        if required:
+            usage.update({required[h] for h in map(hashtag_key, a.hashtags_present) if h in required})
+
+    by_status: Counter = Counter()
+    for counts in by_platform.values():
+        by_status.update(counts)
+    ranked = sorted(errors.items(), key=lambda item: (-item[1], item[0]))[:top_errors]
+    return ComplianceSummary(
+        total=sum(by_status.values()),
+        analyzed=analyzed,
+        by_status=dict(by_status),
+        by_platform={p: dict(c) for p, c in by_platform.items()},
+        top_errors=ranked,
+        hashtag_usage={h: usage.get(h, 0) for h in hashtags},
+    )
@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """core.database sobre una DB temporal, con el esquema creado."""
+    import core.database as database
+
+    monkeypatch.setattr(database, "DATABASE_PATH", str(tmp_path / "test.db"))
+    database.init_db()
+    yield database
+    database.close_connection()
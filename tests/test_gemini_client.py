@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from google.genai import errors as genai_errors
+
+from analysis import gemini_client
+from analysis.gemini_client import GeminiClient, _is_retryable
+from analysis.rate_limiter import RateLimiter
+
+
+def _api_error(code: int) -> genai_errors.APIError:
+    return genai_errors.APIError(code, {"error": {"code": code, "message": "x", "status": "x"}})
+
+
+@pytest.mark.parametrize("error", [
+    httpx.ConnectError("refused"),
+    httpx.ReadTimeout("timeout"),
+    httpx.RemoteProtocolError("closed"),
+    ConnectionError("reset"),
+    TimeoutError(),
+    _api_error(429),
+    _api_error(503),
+])
+def test_retryable_errors(error):
+    assert _is_retryable(error)
+
+
+@pytest.mark.parametrize("error", [
+    _api_error(400),
+    _api_error(403),
+    ValueError("bad"),
+    httpx.HTTPStatusError(
+        "x", request=httpx.Request("POST", "http://x"), response=httpx.Response(400)
+    ),
+])
+def test_non_retryable_errors(error):
+    assert not _is_retryable(error)
+
+
+class _FlakyModels:
+    """Falla con los errores indicados y luego responde."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+
+    def generate_content(self, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        return SimpleNamespace(
+            text="{}",
+            usage_metadata=SimpleNamespace(prompt_token_count=10, candidates_token_count=5),
+        )
+
+
+def _client(errors, rate_limiter=None) -> GeminiClient:
+    client = GeminiClient(api_key="test", rate_limiter=rate_limiter)
+    client.client = SimpleNamespace(models=_FlakyModels(errors))
+    return client
+
+
+@pytest.fixture(autouse=True)
+def short_backoff(monkeypatch):
+    monkeypatch.setattr(gemini_client, "BACKOFF_BASE_SECONDS", 0.2)
+    monkeypatch.setattr(gemini_client.random, "uniform", lambda low, high: high)
+
+
+def test_transport_error_is_retried():
+    client = _client([httpx.ConnectError("refused")])
+    assert client.generate(b"img", "prompt").text == "{}"
+    assert client.usage.retries == 1
+    assert client.usage.requests == 1
+
+
+def test_429_throttled_time_counted_once():
+    client = _client([_api_error(429)], rate_limiter=RateLimiter(1000, 10_000_000))
+    client.generate(b"img", "prompt")
+    assert client.usage.rate_limited == 1
+    assert client.usage.retries == 1
+    # Una sola espera de ~0.2 s (la pausa del limitador), no la pausa mas el sleep
+    assert 0.15 <= client.usage.throttled_seconds < 0.35
+
+
+def test_retry_without_limiter_counts_sleep():
+    client = _client([_api_error(503)])
+    client.generate(b"img", "prompt")
+    assert client.usage.retries == 1
+    assert client.usage.throttled_seconds == pytest.approx(0.2)
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from analysis.local_checks import check_hashtags
+from core.models import AnalysisResult, ComplianceStatus, Platform, PostResult
+
+REQUIRED = ["A", "#B", "#Ciudad"]
+
+
+def _post(post_id: str, text: str) -> PostResult:
+    present, missing = check_hashtags(text, REQUIRED)
+    return PostResult(
+        post_id=post_id,
+        url=f"https://www.instagram.com/p/{post_id}/",
+        platform=Platform.INSTAGRAM,
+        status=ComplianceStatus.NO_CUMPLE if missing else ComplianceStatus.CUMPLE,
+        analysis=AnalysisResult(hashtags_present=present, hashtags_missing=missing, tone_label="emotivo"),
+        created_at=datetime(2026, 3, 1, 12),
+        batch_id="b1",
+    )
+
+
+def test_usage_matches_checker_for_tags_without_hash(db):
+    db.save_posts([_post("p1", "#a y #b"), _post("p2", "solo #A"), _post("p3", "#ciudad")])
+    usage = db.get_hashtag_usage(REQUIRED)
+    assert usage == {"A": 2, "#B": 1, "#Ciudad": 1}
+    # Con fechas con hora se consulta post_hashtags en vez de la tabla resumen
+    by_time = db.get_hashtag_usage(REQUIRED, date_from=datetime(2026, 3, 1))
+    assert by_time == usage
+    assert db.check_summaries() == {"summary_counts": 0, "summary_errors": 0, "summary_hashtags": 0}
+
+
+def test_migration_normalizes_stored_hashtags(db):
+    db.save_posts([_post("p1", "#a y #b")])
+    conn = db._get_connection()
+    with conn:
+        # Filas como las guardaba la version anterior (con '#')
+        conn.execute("DELETE FROM post_hashtags")
+        conn.executemany(
+            "INSERT INTO post_hashtags (post_id, hashtag, present) VALUES (?, ?, ?)",
+            [("p1", "#a", 1), ("p1", "a", 1), ("p1", "#b", 1), ("p1", "#ciudad", 0)],
+        )
+        conn.execute("PRAGMA user_version = 5")
+    db._migrate(conn)
+    rows = sorted(tuple(r) for r in conn.execute("SELECT hashtag, present FROM post_hashtags"))
+    assert rows == [("a", 1), ("b", 1), ("ciudad", 0)]
+    assert db.get_hashtag_usage(REQUIRED) == {"A": 1, "#B": 1, "#Ciudad": 0}
+    assert db.check_summaries()["summary_hashtags"] == 0
+
+
+def test_hashtag_trend_uses_key_and_migrates_history(db):
+    db.save_posts([_post("p1", "#a y #b"), _post("p2", "solo #A")])
+    db.record_batch_trends(["b1"])
+    trend = {row["hashtag"]: row["posts"] for row in db.get_hashtag_trend(REQUIRED)}
+    assert trend == {"A": 2, "#B": 1, "#Ciudad": 0}
+
+    conn = db._get_connection()
+    with conn:
+        # Historia de un batch ya borrado, guardada con '#' por la version anterior
+        conn.execute(
+            "INSERT INTO trend_hashtags (batch_id, day, platform, hashtag, posts) VALUES (?, ?, ?, ?, ?)",
+            ("viejo", "2026-03-01", "instagram", "#a", 3),
+        )
+        conn.execute("PRAGMA user_version = 6")
+    db._migrate(conn)
+    trend = {row["hashtag"]: row["posts"] for row in db.get_hashtag_trend(REQUIRED)}
+    assert trend["A"] == 5
+    assert conn.execute("SELECT COUNT(*) FROM trend_hashtags WHERE hashtag LIKE '#%'").fetchone()[0] == 0
@@ -0,0 +1,46 @@
+import pytest
+
+from analysis.fingerprint import model_fingerprint
+from analysis.local_checks import check_hashtags
+from core.models import AIBackend, ComplianceConfig
+
+
+@pytest.mark.parametrize("required", [["#Verano", "#Marca"], ["verano", "marca"], ["#VERANO", "Marca"]])
+def test_required_with_or_without_hash(required):
+    present, missing = check_hashtags("Llego el #verano con #marca", required)
+    assert missing == []
+    assert [h.lower() for h in present] == ["#verano", "#marca"]
+
+
+@pytest.mark.parametrize("detected", [["#Marca"], ["marca"], ["MARCA"]])
+def test_model_tags_with_or_without_hash(detected):
+    present, missing = check_hashtags("Llego el #verano", ["#verano", "marca"], detected)
+    assert missing == []
+    assert "#marca" in [h.lower() for h in present]
+
+
+def test_missing_keeps_required_spelling():
+    present, missing = check_hashtags("sin etiquetas", ["#Verano", "marca"], ["", "#"])
+    assert present == []
+    assert missing == ["#Verano", "marca"]
+
+
+def test_model_fingerprint_tracks_cascade_settings():
+    base = ComplianceConfig(cascade_enabled=True)
+    changes = [
+        {"cascade_enabled": False},
+        {"cascade_fast_backend": AIBackend.GEMINI},
+        {"cascade_fast_model": "otro"},
+        {"cascade_confidence_threshold": 0.9},
+        {"cascade_escalate_no_cumple": True},
+    ]
+    fingerprints = {model_fingerprint(base)}
+    for change in changes:
+        fingerprints.add(model_fingerprint(base.model_copy(update=change)))
+    assert len(fingerprints) == len(changes) + 1
+
+
+def test_model_fingerprint_ignores_cascade_settings_when_disabled():
+    base = ComplianceConfig(cascade_enabled=False)
+    other = base.model_copy(update={"cascade_fast_model": "otro"})
+    assert model_fingerprint(base) == model_fingerprint(other)
@@ -0,0 +1,32 @@
+import threading
+
+from core import maintenance
+from core.models import ComplianceConfig
+
+
+def test_start_compaction_launches_one_worker(monkeypatch):
+    gate = threading.Event()
+    runs = []
+
+    def fake_run(config, dry_run=False):
+        runs.append(config)
+        gate.wait(5)
+
+    monkeypatch.setattr(maintenance, "_run_compaction", fake_run)
+    results = []
+    callers = [
+        threading.Thread(target=lambda: results.append(maintenance.start_compaction(ComplianceConfig())))
+        for _ in range(8)
+    ]
+    for t in callers:
+        t.start()
+    for t in callers:
+        t.join(5)
+
+    assert results.count(True) == 1
+    assert maintenance.compaction_status()[0] is True
+    gate.set()
+    # El worker libera el lock al terminar
+    assert maintenance._lock.acquire(timeout=5)
+    maintenance._lock.release()
+    assert len(runs) == 1
@@ -0,0 +1,213 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+
+import pytest
+
+from analysis.ollama_client import OllamaClient
+from analysis.ollama_pool import OllamaPool
+from core.models import OllamaEndpoint
+
+
+class _ErrorHandler(BaseHTTPRequestHandler):
+    """Responde 500 a toda peticion, como Ollama ante un error interno."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b'{"error": "model crashed"}'
+        self.send_response(500)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def error_server():
+    server = HTTPServer(("127.0.0.1", 0), _ErrorHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_error_is_not_connection_error(error_server):
+    client = OllamaClient(base_url=error_server)
+    with pytest.raises(RuntimeError, match="HTTP 500") as exc:
+        client.generate(b"img", "prompt")
+    assert not isinstance(exc.value, ConnectionError)
+
+
+def test_unreachable_server_is_connection_error():
+    # Puerto sin servidor: falla la conexion
+    client = OllamaClient(base_url="http://127.0.0.1:9")
+    with pytest.raises(ConnectionError):
+        client.generate(b"img", "prompt")
+
+
+def test_pool_keeps_node_on_http_error(error_server):
+    pool = OllamaPool(
+        "llava",
+        [OllamaEndpoint(url=error_server, max_concurrent=1)],
+        health_check=lambda url: True,
+    )
+    with pytest.raises(RuntimeError):
+        pool.generate(b"img", "prompt")
+    stats = pool.stats()[0]
+    assert stats["saludable"] is True
+    assert stats["fallos"] == 0
+    assert stats["en_curso"] == 0
+
+
+class _FakeOllama:
+    """Servidor Ollama falso: responde /api/tags y /api/generate y cuenta las llamadas.
+
+    Con `gate` cada generate espera a que el evento se active.
+    """
+
+    def __init__(self, gate: threading.Event = None):
+        self.hits = 0
+        self.gate = gate
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._reply(b'{"models": []}')
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                fake.hits += 1
+                if fake.gate is not None:
+                    fake.gate.wait(5)
+                self._reply(b'{"response": "ok", "prompt_eval_count": 3, "eval_count": 2}')
+
+            def _reply(self, body: bytes):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_servers():
+    servers = []
+
+    def start(gate=None):
+        server = _FakeOllama(gate)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        try:
+            server.stop()
+        except Exception:
+            pass
+
+
+def _pool(*servers, health_check=lambda url: False) -> OllamaPool:
+    return OllamaPool(
+        "llava",
+        [OllamaEndpoint(url=s.url, max_concurrent=2) for s in servers],
+        health_check=health_check,
+    )
+
+
+def _stats(pool: OllamaPool) -> dict[str, dict]:
+    return {s["url"]: s for s in pool.stats()}
+
+
+def test_pool_fails_over_from_dead_node_and_ejects_it(fake_servers):
+    dead, live = fake_servers(), fake_servers()
+    dead.stop()
+    # El nodo caido va primero: es el que el pool elige ante un empate
+    pool = _pool(dead, live)
+
+    assert pool.generate(b"img", "prompt").text == "ok"
+    stats = _stats(pool)
+    assert stats[dead.url]["saludable"] is False
+    assert stats[dead.url]["fallos"] == 1
+    assert stats[live.url]["atendidas"] == 1
+    assert live.hits == 1
+
+    # Las llamadas siguientes ya no pasan por el nodo expulsado
+    pool.generate(b"img", "prompt")
+    assert _stats(pool)[dead.url]["fallos"] == 1
+    assert live.hits == 2
+
+
+def test_pool_routes_to_least_outstanding(fake_servers):
+    gate = threading.Event()
+    slow, fast_a, fast_b = fake_servers(gate), fake_servers(), fake_servers()
+    pool = _pool(slow, fast_a, fast_b)
+
+    blocked = threading.Thread(target=pool.generate, args=(b"img", "prompt"))
+    blocked.start()
+    for _ in range(200):
+        if slow.hits:
+            break
+        time.sleep(0.01)
+    assert slow.hits == 1
+    assert _stats(pool)[slow.url]["en_curso"] == 1
+
+    # Con una llamada en curso en `slow`, las siguientes van a los libres
+    for _ in range(3):
+        pool.generate(b"img", "prompt")
+    assert slow.hits == 1
+    assert fast_a.hits + fast_b.hits == 3
+
+    gate.set()
+    blocked.join(5)
+    assert _stats(pool)[slow.url]["en_curso"] == 0
+
+
+def test_check_health_brings_ejected_node_back(fake_servers):
+    dead, live = fake_servers(), fake_servers()
+    alive = {live.url: True, dead.url: False}
+    pool = _pool(dead, live, health_check=lambda url: alive[url])
+    dead_url = dead.url
+    dead.stop()
+    pool.generate(b"img", "prompt")
+    assert _stats(pool)[dead_url]["saludable"] is False
+
+    alive[dead_url] = True
+    assert pool.check_health() == {dead_url: True, live.url: True}
+    assert _stats(pool)[dead_url]["saludable"] is True
+
+
+def test_analyze_batch_checks_pool_health_first():
+    from analysis.analyzer import ComplianceAnalyzer
+    from core.models import ComplianceConfig, ComplianceStatus, Platform, PostResult
+
+    class Client:
+        checks = 0
+
+        def check_health(self):
+            Client.checks += 1
+
+        def analyze_image_and_text(self, image_bytes, prompt):
+            return "{}"
+
+    analyzer = ComplianceAnalyzer(Client(), label="ollama:llava")
+    post = PostResult(
+        post_id="p1", url="https://x.com/p/1", platform=Platform.TWITTER,
+        status=ComplianceStatus.ERROR, error_message="sin captura",
+    )
+    analyzer.analyze_batch([post], ComplianceConfig())
+    assert Client.checks == 1
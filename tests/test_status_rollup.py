@@ -0,0 +1,52 @@
+from benchmarks.bench_read_path import _make_posts
+
+RAW = {
+    "batch": "SELECT batch_id, status, COUNT(*) FROM posts GROUP BY batch_id, status",
+    "day": "SELECT substr(created_at, 1, 10), status, COUNT(*) FROM posts GROUP BY 1, status",
+}
+
+
+def _assert_rollup_matches_raw(db):
+    conn = db._get_connection()
+    for by, sql in RAW.items():
+        expected = {(group, status): n for group, status, n in conn.execute(sql)}
+        rollup = db.get_status_rollup(by)
+        got = {
+            (r["grupo"], status): n
+            for r in rollup
+            for status, n in r.items()
+            if status not in ("grupo", "desde", "total")
+        }
+        assert got == expected, by
+        for r in rollup:
+            assert r["total"] == sum(n for (group, _), n in expected.items() if group == r["grupo"])
+
+
+def test_rollup_matches_group_by_after_save_and_deletes(db):
+    posts = list(_make_posts(2500))
+    db.save_posts(posts)
+    _assert_rollup_matches_raw(db)
+
+    # Re-guardar con otro estado mueve los conteos
+    for post in posts[:40]:
+        post.status = type(post.status)("pendiente")
+    db.save_posts(posts[:40])
+    _assert_rollup_matches_raw(db)
+
+    db.delete_post(posts[100].post_id)
+    db.delete_post(posts[1500].post_id)
+    _assert_rollup_matches_raw(db)
+
+    db.delete_batches(["batch-1"])
+    _assert_rollup_matches_raw(db)
+    assert "batch-1" not in {r["grupo"] for r in db.get_status_rollup("batch")}
+
+
+def test_update_post_status_keeps_rollup_in_sync(db):
+    posts = list(_make_posts(50))
+    db.save_posts(posts)
+    assert db.update_post_status(posts[0].post_id, "error", "Analisis omitido: sin conexion")
+    row = db.get_posts([posts[0].post_id])[0]
+    assert (row.status.value, row.error_message) == ("error", "Analisis omitido: sin conexion")
+    _assert_rollup_matches_raw(db)
+    assert set(db.check_summaries().values()) == {0}
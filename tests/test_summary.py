@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from analysis.local_checks import check_hashtags
+from core.models import AnalysisResult, ComplianceStatus, Platform, PostResult
+from reports.summary import summarize_posts
+
+REQUIRED = ["Ciudad", "#Bogota"]
+
+
+def _posts():
+    texts = ["#ciudad #bogota", "#Ciudad", "sin etiquetas", "#BOGOTA y #otra"]
+    posts = []
+    for i, text in enumerate(texts):
+        present, missing = check_hashtags(text, REQUIRED)
+        posts.append(PostResult(
+            post_id=f"p{i}",
+            url=f"https://x.com/p/{i}",
+            platform=list(Platform)[i % 2],
+            status=ComplianceStatus.NO_CUMPLE if missing else ComplianceStatus.CUMPLE,
+            analysis=AnalysisResult(
+                hashtags_present=present,
+                hashtags_missing=missing,
+                design_errors=["Logo pixelado"] if i % 2 else [],
+                tone_label="emotivo",
+            ),
+            created_at=datetime(2026, 3, 1) + timedelta(hours=i),
+            batch_id="b1",
+        ))
+    posts.append(PostResult(
+        post_id="err", url="https://x.com/p/err", platform=Platform.TIKTOK,
+        status=ComplianceStatus.ERROR, error_message="timeout", created_at=datetime(2026, 3, 2), batch_id="b1",
+    ))
+    return posts
+
+
+def test_summary_usage_ignores_hash_and_case():
+    summary = summarize_posts(_posts(), REQUIRED)
+    assert summary.hashtag_usage == {"Ciudad": 2, "#Bogota": 2}
+    assert summary.total == 5
+    assert summary.analyzed == 4
+
+
+def test_summary_from_memory_matches_db(db):
+    posts = _posts()
+    db.save_posts(posts)
+    assert db.get_compliance_summary(REQUIRED) == summarize_posts(posts, REQUIRED)
@@ -0,0 +1,59 @@
+"""Almacen de imagenes direccionado por contenido.
+
+Cada imagen se guarda una sola vez en SCREENSHOTS_DIR/<ab>/<cd>/<sha256><ext>,
+donde ab y cd son los primeros caracteres del hash. Dos posts con la misma
+captura comparten archivo; los borrados de la DB solo eliminan un blob cuando
+ningun post lo referencia (ver core.database._delete_posts_where).
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+from config.settings import SCREENSHOTS_DIR
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def blob_path(sha: str, suffix: str = ".png") -> Path:
+    """Ruta del blob: dos niveles de 256 directorios cada uno."""
+    return Path(SCREENSHOTS_DIR) / sha[:2] / sha[2:4] / f"{sha}{suffix}"
+
+
+def blob_sha(path: str) -> Optional[str]:
+    """Hash de un blob o derivado a partir de su ruta. None si la ruta no es del almacen."""
+    p = Path(path)
+    sha = p.stem.split("_", 1)[0]
+    if len(sha) != 64 or p.parent.name != sha[2:4] or p.parent.parent.name != sha[:2]:
+        return None
+    return sha
+
+
+def atomic_write(path: Path, data: bytes):
+    """Escribe en un temporal del mismo directorio y lo renombra: nunca queda un archivo a medias."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=path.suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def touch(path: Path):
+    """Renueva el mtime de un blob reutilizado para que la limpieza de huerfanas respete su periodo de gracia."""
+    os.utime(path)
+
+
+def put(data: bytes, suffix: str = ".png") -> str:
+    """Guarda los bytes si no existen y retorna la ruta del blob."""
+    path = blob_path(content_hash(data), suffix)
+    if path.exists():
+        touch(path)
+    else:
+        atomic_write(path, data)
+    return str(path)
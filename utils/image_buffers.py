@@ -0,0 +1,103 @@
+"""Screenshots en memoria entre la captura y el analisis.
+
+La captura deja los bytes aqui y el blob se escribe a disco en un thread de
+fondo; thumbnails, hash y analisis usan el mismo buffer sin releer el archivo.
+La memoria esta acotada por IMAGE_BUFFER_BUDGET_MB: al excederse se descartan
+los buffers mas antiguos (esperando su escritura si aun no termino) y esas
+imagenes se leen de disco.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from config.settings import IMAGE_BUFFER_BUDGET_MB
+from utils import blob_store
+
+_lock = threading.Lock()
+_buffers: "OrderedDict[str, tuple[bytes, Future]]" = OrderedDict()
+_used = 0
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="blob-writer")
+
+
+def _persist(path: Path, data: bytes):
+    if path.exists():
+        blob_store.touch(path)
+    else:
+        blob_store.atomic_write(path, data)
+
+
+def store(data: bytes, suffix: str = ".png") -> str:
+    """Guarda la imagen en memoria, agenda su escritura al almacen y retorna la ruta del blob."""
+    global _used
+    path = blob_store.blob_path(blob_store.content_hash(data), suffix)
+    key = str(path)
+    with _lock:
+        if key in _buffers:
+            _buffers.move_to_end(key)
+            return key
+        written = _writer.submit(_persist, path, data)
+        _buffers[key] = (data, written)
+        _used += len(data)
+        spilled = _evict_over_budget()
+    for future in spilled:
+        future.result()
+    return key
+
+
+def _evict_over_budget() -> list[Future]:
+    """Descarta los buffers mas antiguos hasta entrar en el presupuesto (con _lock tomado).
+
+    Retorna las escrituras pendientes de lo descartado: hay que esperarlas para
+    que la imagen siga disponible en disco.
+    """
+    global _used
+    budget = IMAGE_BUFFER_BUDGET_MB * 1024 * 1024
+    pending = []
+    while _used > budget and len(_buffers) > 1:
+        _, (data, written) = _buffers.popitem(last=False)
+        _used -= len(data)
+        if not written.done():
+            pending.append(written)
+    return pending
+
+
+def read(path: str) -> memoryview:
+    """Bytes de la imagen: desde memoria si sigue ahi, si no desde disco."""
+    with _lock:
+        entry = _buffers.get(str(path))
+    if entry is not None:
+        return memoryview(entry[0])
+    return memoryview(Path(path).read_bytes())
+
+
+def written(path: str) -> Future:
+    """Future que se completa cuando la imagen ya esta en disco (ya completado si no esta en memoria)."""
+    with _lock:
+        entry = _buffers.get(str(path))
+    if entry is not None:
+        return entry[1]
+    done: Future = Future()
+    done.set_result(None)
+    return done
+
+
+def flush():
+    """Espera a que todas las imagenes en memoria esten escritas en disco."""
+    with _lock:
+        pending = [written for _, written in _buffers.values()]
+    for future in pending:
+        future.result()
+
+
+def discard(paths):
+    """Libera los buffers de las rutas indicadas (esperando su escritura)."""
+    global _used
+    released = []
+    with _lock:
+        for path in paths:
+            entry = _buffers.pop(str(path), None)
+            if entry is not None:
+                _used -= len(entry[0])
+                released.append(entry[1])
+    for future in released:
+        future.result()
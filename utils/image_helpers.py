@@ -1,34 +1,101 @@
 import base64
 from pathlib import Path
+from typing import Optional
 from PIL import Image
 from io import BytesIO
-from config.settings import SCREENSHOTS_DIR
+from config.settings import DERIVATIVES_DIR, STATIC_DIR, STATIC_URL
+from utils import blob_store, image_buffers
 
 
-def save_screenshot(post_id: str, image_bytes: bytes) -> str:
-    """Guarda screenshot en disco y retorna la ruta."""
-    screenshots_dir = Path(SCREENSHOTS_DIR)
-    screenshots_dir.mkdir(parents=True, exist_ok=True)
+def save_screenshot(image_bytes: bytes) -> str:
+    """Guarda el screenshot en el almacen por contenido y retorna la ruta.
 
-    path = screenshots_dir / f"{post_id}.png"
-    path.write_bytes(image_bytes)
-    return str(path)
+    La escritura a disco es asincrona; hasta terminar, image_buffers.read sirve los bytes.
+    """
+    return image_buffers.store(image_bytes, ".png")
 
 
-def create_thumbnail(screenshot_path: str, size: tuple[int, int] = (300, 300)) -> str:
-    """Crea un thumbnail del screenshot y retorna la ruta."""
+# Derivados de cada screenshot: tamano maximo, formato y extension
+DERIVATIVES = {
+    "grid": ((480, 480), "WEBP", ".webp"),   # tarjeta de la Galeria
+    "row": ((200, 200), "WEBP", ".webp"),    # fila del Dashboard
+    "pdf": ((1200, 1200), "JPEG", ".jpg"),   # para incrustar en reportes
+}
+# Los que se generan al capturar; el resto se crea la primera vez que se pide
+EAGER_DERIVATIVES = ("grid", "row")
+
+
+def derivative_path(screenshot_path: str, kind: str) -> str:
+    """Ruta del derivado `kind`.
+
+    Los de blobs van a DERIVATIVES_DIR con el mismo reparto en subcarpetas, para
+    servirse como archivos estaticos; los de screenshots con ruta plana quedan
+    junto al original como <nombre>_<kind><ext>.
+    """
+    ext = DERIVATIVES[kind][2]
+    sha = blob_store.blob_sha(screenshot_path)
+    if sha:
+        return str(Path(DERIVATIVES_DIR) / sha[:2] / sha[2:4] / f"{sha}_{kind}{ext}")
+    src = Path(screenshot_path)
+    return str(src.parent / f"{src.stem}_{kind}{ext}")
+
+
+def create_derivatives(
+    screenshot_path: str, kinds=EAGER_DERIVATIVES, data: Optional[bytes] = None
+) -> dict[str, str]:
+    """Genera los derivados que falten decodificando el original una sola vez.
+
+    Con `data` se usan esos bytes en vez de leer `screenshot_path` (que puede no
+    estar escrito todavia).
+
+    Se procesan de mayor a menor y cada uno se reduce desde el anterior.
+    `draft` acelera la decodificacion de JPEG y `reducing_gap` hace que
+    `thumbnail` use `reduce` (submuestreo entero) antes del filtro LANCZOS.
+    Retorna {kind: ruta}; los que fallan quedan fuera.
+    """
     src = Path(screenshot_path)
-    if not src.exists():
+    paths = {kind: derivative_path(screenshot_path, kind) for kind in kinds}
+    missing = sorted(
+        (kind for kind, path in paths.items() if not Path(path).exists()),
+        key=lambda kind: DERIVATIVES[kind][0], reverse=True,
+    )
+    if missing and data is None and not src.exists():
+        return {kind: path for kind, path in paths.items() if kind not in missing}
+
+    failed = set()
+    if missing:
+        try:
+            with Image.open(BytesIO(data) if data is not None else src) as img:
+                img.draft("RGB", DERIVATIVES[missing[0]][0])
+                current = img.convert("RGB")
+            for kind in missing:
+                size, fmt, _ = DERIVATIVES[kind]
+                current.thumbnail(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+                buffer = BytesIO()
+                current.save(buffer, fmt, quality=80)
+                blob_store.atomic_write(Path(paths[kind]), buffer.getvalue())
+        except Exception:
+            failed = {kind for kind in missing if not Path(paths[kind]).exists()}
+    return {kind: path for kind, path in paths.items() if kind not in failed}
+
+
+def get_derivative(screenshot_path: str, kind: str) -> str:
+    """Ruta del derivado, generandolo si falta. "" si no hay original."""
+    if not screenshot_path:
         return ""
+    return create_derivatives(screenshot_path, (kind,)).get(kind, "")
 
-    thumb_path = src.parent / f"{src.stem}_thumb.png"
+
+def derivative_url(screenshot_path: str, kind: str) -> str:
+    """URL estatica del derivado (cacheable por el navegador). "" si no se puede servir."""
+    path = get_derivative(screenshot_path, kind)
+    if not path:
+        return ""
     try:
-        img = Image.open(src)
-        img.thumbnail(size, Image.Resampling.LANCZOS)
-        img.save(thumb_path, "PNG")
-        return str(thumb_path)
-    except Exception:
+        relative = Path(path).relative_to(STATIC_DIR)
+    except ValueError:
         return ""
+    return f"{STATIC_URL}/{relative.as_posix()}"
 
 
 def image_to_base64(path: str) -> str: